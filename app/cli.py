@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+"""Консольный интерфейс Focus Scenes без Qt.
+
+`python -m app.cli status|stats|tasks|export|start|stop`. Модули ядра
+импортируются лениво внутри команд, а запросы открывают SQLite только
+на чтение (`mode=ro`), поэтому проверка статуса из shell-промпта или
+скрипта стартует за десятки миллисекунд и не трогает файл БД.
+
+Сессия, начатая `start`, живет только в контрольной точке
+`active_session`: `status` и `stop` досчитывают ее по времени, как будто
+таймер шел все это время.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+
+class CliError(Exception):
+    """Ошибка команды: печатается в stderr, код выхода 1."""
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except CliError as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Focus Scenes command line")
+    parser.add_argument("--db", type=Path, default=None, help="SQLite file (default: ./app.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    status = commands.add_parser("status", help="show the active session")
+    status.add_argument("--json", action="store_true", help="machine-readable output")
+    status.set_defaults(handler=_cmd_status)
+
+    stats = commands.add_parser("stats", help="today's totals, streak and coin balance")
+    stats.add_argument("--json", action="store_true", help="machine-readable output")
+    stats.set_defaults(handler=_cmd_stats)
+
+    tasks = commands.add_parser("tasks", help="list tasks in manual order")
+    tasks.add_argument("--limit", type=int, default=20)
+    tasks.add_argument("--open", action="store_true", help="hide completed tasks")
+    tasks.set_defaults(handler=_cmd_tasks)
+
+    export = commands.add_parser("export", help="export session history")
+    export.add_argument("--format", choices=("csv", "json"), default="csv")
+    export.add_argument("--output", type=Path, default=None, help="file to write (default: stdout)")
+    export.add_argument("--since", type=_parse_day, default=None, metavar="YYYY-MM-DD")
+    export.set_defaults(handler=_cmd_export)
+
+    start = commands.add_parser("start", help="start a focus session")
+    start.add_argument("--minutes", type=int, default=None, help="focus length (default: saved setting)")
+    start.add_argument("--break-minutes", type=int, default=None, help="break length (default: saved setting)")
+    start.add_argument("--auto-cycle", action=argparse.BooleanOptionalAction, default=None)
+    start.add_argument("--theme", default=None)
+    start.set_defaults(handler=_cmd_start)
+
+    stop = commands.add_parser("stop", help="stop the active session and record the result")
+    stop.set_defaults(handler=_cmd_stop)
+    return parser
+
+
+def _parse_day(value: str):
+    from datetime import date
+
+    try:
+        return date.fromisoformat(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"invalid date: {value!r}") from error
+
+
+def _db_path(args: argparse.Namespace) -> Path:
+    if args.db is not None:
+        return args.db
+    from app.data.storage import default_db_path
+
+    return default_db_path()
+
+
+def _open_read_only(args: argparse.Namespace):
+    """Открывает существующую БД только на чтение и проверяет версию схемы."""
+    import sqlite3
+
+    from app.data.storage import SCHEMA_VERSION, Storage
+
+    path = _db_path(args)
+    if not path.exists():
+        raise CliError(f"database not found: {path}")
+    storage = Storage(path, read_only=True)
+    try:
+        version = storage.schema_version()
+    except sqlite3.DatabaseError:
+        version = 0
+    if version < SCHEMA_VERSION:
+        storage.close()
+        raise CliError("database schema is outdated; run `start`, `stop` or the app once to migrate it")
+    return storage
+
+
+def _open_writable(args: argparse.Namespace):
+    from app.core.app_state import AppState
+    from app.data.storage import BACKLOG_TASK_LIMIT, Storage
+
+    storage = Storage(_db_path(args), task_limit=BACKLOG_TASK_LIMIT)
+    try:
+        storage.init_db()
+        state = AppState()
+        state.load_from_storage(storage)
+    except BaseException:
+        storage.close()  # вызывающий код еще не вошел в `with storage`
+        raise
+    return storage, state
+
+
+def _format_seconds(seconds: int) -> str:
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def _cmd_status(args: argparse.Namespace) -> int:
+    import json
+    from datetime import datetime
+
+    from app.core.timer import FocusTimer
+    from app.data.storage import checkpoint_from_row
+
+    with _open_read_only(args) as storage:
+        row = storage.load_active_session()
+    if row is None:
+        print(json.dumps({"state": "idle"}) if args.json else "idle")
+        return 0
+
+    checkpoint, offline_sec = checkpoint_from_row(row, datetime.now())
+    timer = FocusTimer()
+    timer.restore(checkpoint, offline_sec if offline_sec != float("inf") else 0.0)
+    timer.advance()
+    snapshot = timer.snapshot()
+    if args.json:
+        payload = {
+            "state": snapshot.state.value,
+            "remaining_seconds": snapshot.remaining_seconds,
+            "theme": row.theme,
+            "started_at": row.started_at,
+            "completed_focus_sessions": snapshot.completed_focus_sessions,
+        }
+        print(json.dumps(payload))
+    else:
+        print(
+            f"{snapshot.state.value} {_format_seconds(snapshot.remaining_seconds)} left · {row.theme} "
+            f"· started {row.started_at} · {snapshot.completed_focus_sessions} focus done"
+        )
+    return 0
+
+
+def _cmd_stats(args: argparse.Namespace) -> int:
+    import json
+    from dataclasses import asdict
+    from datetime import date
+
+    with _open_read_only(args) as storage:
+        summary = storage.get_stats_summary(date.today())
+        balance = storage.get_coins_balance()
+    today = summary.today
+    if args.json:
+        print(json.dumps({"today": asdict(today), "streak_days": summary.streak_days, "coins_balance": balance}))
+        return 0
+    print(
+        f"{today.day}: {today.successes} ok / {today.failures} failed, "
+        f"focus {today.focus_seconds // 60} min, +{today.coins} coins"
+    )
+    print(f"streak: {summary.streak_days} days · balance: {balance} coins")
+    return 0
+
+
+def _cmd_tasks(args: argparse.Namespace) -> int:
+    with _open_read_only(args) as storage:
+        tasks = storage.list_tasks(limit=args.limit, include_done=not args.open)
+    for task in tasks:
+        print(f"[{'x' if task.is_done else ' '}] {task.title}")
+    return 0
+
+
+def _cmd_export(args: argparse.Namespace) -> int:
+    import csv
+    import json
+    from dataclasses import asdict, fields
+    from datetime import datetime, time
+
+    from app.data.storage import SessionRow
+
+    start = datetime.combine(args.since, time.min) if args.since else None
+    output = args.output.open("w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        with _open_read_only(args) as storage:
+            sessions = storage.iter_sessions(start=start)
+            if args.format == "json":
+                # Массив пишется построчно, как CSV: история не собирается в памяти.
+                separator = "\n  "
+                output.write("[")
+                for row in sessions:
+                    output.write(separator + json.dumps(asdict(row), ensure_ascii=False))
+                    separator = ",\n  "
+                output.write("]\n" if separator == "\n  " else "\n]\n")
+            else:
+                writer = csv.writer(output)
+                writer.writerow([field.name for field in fields(SessionRow)])
+                for row in sessions:
+                    writer.writerow(
+                        [row.id, row.started_at, row.duration_sec, row.theme, int(row.success), row.coins_earned]
+                    )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+def _cmd_start(args: argparse.Namespace) -> int:
+    from app.core.engine import FocusEngine
+    from app.core.timer import FocusTimer
+
+    storage, state = _open_writable(args)
+    with storage:
+        if storage.load_active_session() is not None:
+            raise CliError("a session is already running; use `stop` first")
+        settings = state.settings
+        focus_minutes = args.minutes if args.minutes is not None else int(settings.get("focus_minutes", 25))
+        break_minutes = args.break_minutes if args.break_minutes is not None else int(settings.get("break_minutes", 5))
+        auto_cycle = args.auto_cycle if args.auto_cycle is not None else bool(settings.get("auto_cycle", False))
+        if focus_minutes <= 0 or break_minutes <= 0:
+            raise CliError("durations must be positive")
+
+        timer = FocusTimer()
+        timer.configure(focus_minutes * 60, break_minutes * 60, auto_cycle)
+        FocusEngine(timer, state).start(args.theme or state.selected_theme)
+    print(f"focus started: {_format_seconds(focus_minutes * 60)}{' (auto-cycle)' if auto_cycle else ''}")
+    return 0
+
+
+def _cmd_stop(args: argparse.Namespace) -> int:
+    from app.core.engine import FocusEngine
+    from app.core.timer import FOCUS_ACTIVE_STATES, FocusTimer
+
+    storage, state = _open_writable(args)
+    with storage:
+        timer = FocusTimer()
+        if not state.adopt_active_session(timer):
+            raise CliError("no active session")
+        engine = FocusEngine(timer, state)
+        completed = sum(1 for transition in engine.step() if transition.completes_focus)
+        elapsed = timer.snapshot().elapsed_seconds
+        state_before_stop = engine.stop()
+        state.flush_settings()
+    if completed:
+        print(f"{completed} focus session(s) completed")
+    if state_before_stop in FOCUS_ACTIVE_STATES:
+        print(f"focus stopped early after {_format_seconds(elapsed)}; recorded as failed")
+    elif not completed:
+        print("session stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,29 +2,22 @@ from __future__ import annotations
 
 """Централизованное состояние приложения и бизнес-событий UI."""
 
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Any
+import logging
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Callable
 
-try:
-    from PyQt6.QtCore import QObject, pyqtSignal
-except ModuleNotFoundError:  # pragma: no cover - test fallback without Qt runtime
-    class QObject:  # type: ignore[override]
-        def __init__(self, *args, **kwargs) -> None:
-            pass
+from app.core.clock import SYSTEM_CLOCK, Clock
+from app.core.events import Dispatcher, Signal, call_now
+from app.core.timer import FOCUS_ACTIVE_STATES, FocusTimer, TimerCheckpoint, TimerState, TimerTransition
+from app.data.storage import MAX_TASKS, ActiveSessionRow, SessionResult, SessionRow, Storage, TaskRow, checkpoint_from_row
 
-    class _DummySignal:
-        def connect(self, *_args, **_kwargs) -> None:
-            pass
 
-        def emit(self, *_args, **_kwargs) -> None:
-            pass
-
-    def pyqtSignal(*_args, **_kwargs):  # type: ignore[override]
-        return _DummySignal()
-
-from app.data.storage import MAX_TASKS, Storage, TaskRow
+logger = logging.getLogger(__name__)
 
+SETTINGS_KEY_PREFIX = "settings."
+LEGACY_SETTINGS_KEY = "settings"
 
 THEME_ALIASES = {
     "forest": "forest",
@@ -47,51 +40,104 @@ class SessionState:
     progress: float = 0.0
 
 
-class AppState(QObject):
-    """Единая точка управления темой, настройками, монетами и задачами."""
-    state_changed = pyqtSignal()
-    coins_changed = pyqtSignal(int)
-    theme_changed = pyqtSignal(str)
-    settings_changed = pyqtSignal(str, object)
-    tasks_changed = pyqtSignal()
+def _log_write_failure(future: Future) -> None:
+    error = future.exception()
+    if error is not None:
+        logger.error("Storage write failed", exc_info=error)
+
+
+class AppState:
+    """Единая точка управления темой, настройками, монетами и задачами.
+
+    Оперативное состояние (настройки, баланс, список задач) является
+    источником истины для UI: записи в `Storage` отправляются через
+    `Storage.submit` и при включенном write-behind не блокируют UI-поток.
 
-    def __init__(self) -> None:
-        super().__init__()
+    Модуль не зависит от Qt. Сигналы, порожденные фоновой записью,
+    доставляются через диспетчер (`set_dispatcher`): в окне это Qt-мост,
+    в асинхронном движке — `loop.call_soon_threadsafe`.
+    """
+    state_changed = Signal()
+    coins_changed = Signal(int)
+    theme_changed = Signal(str)
+    settings_changed = Signal(str, object)
+    # tasks_changed — сводное уведомление (счетчики); остальные сигналы описывают точечный diff списка.
+    tasks_changed = Signal()
+    tasks_reset = Signal()
+    task_inserted = Signal(int, object)
+    task_removed = Signal(int)
+    task_moved = Signal(int, int)
+    task_toggled = Signal(int, bool)
+    session_recorded = Signal(object)
+
+    def __init__(self, clock: Clock | None = None, dispatcher: Dispatcher | None = None) -> None:
+        self.clock = clock or SYSTEM_CLOCK
+        self._dispatch: Dispatcher = dispatcher or call_now
         self.current_session: SessionState | None = None
         self.selected_theme: str = "forest"
         self.settings: dict[str, Any] = {}
         self.coins_balance: int = 0
         self._storage: Storage | None = None
+        self._dirty_settings: set[str] = set()
+        # `tasks` — фокус-панель: первые MAX_TASKS задач бэклога в ручном порядке.
         self.tasks: list[TaskRow] = []
+        self.backlog_size: int = 0
+
+    def set_dispatcher(self, dispatcher: Dispatcher | None) -> None:
+        """Задает, как вызовы из фонового потока записи попадают в поток владельца."""
+        self._dispatch = dispatcher or call_now
 
     def load_from_storage(self, storage: Storage) -> None:
         """Инициализирует состояние из постоянного хранилища."""
         self._storage = storage
         saved_theme = storage.get_setting("selected_theme", "forest")
         self.selected_theme = self._normalize_theme(str(saved_theme))
-        raw_settings = storage.get_setting("settings", {})
-        self.settings = raw_settings if isinstance(raw_settings, dict) else {}
+        self.settings = self._load_settings(storage)
+        self._dirty_settings.clear()
         self.coins_balance = storage.get_coins_balance()
         self.tasks = storage.list_tasks(limit=MAX_TASKS, include_done=True)
+        self.backlog_size = storage.count_tasks()
         self.state_changed.emit()
         self.theme_changed.emit(self.selected_theme)
         self.coins_changed.emit(self.coins_balance)
+        self.tasks_reset.emit()
         self.tasks_changed.emit()
 
-    def save_setting(self, key: str, value: Any) -> None:
-        """Сохраняет настройку и уведомляет подписчиков о смене состояния."""
+    @property
+    def has_pending_settings(self) -> bool:
+        return bool(self._dirty_settings)
+
+    def save_setting(self, key: str, value: Any, defer: bool = False) -> None:
+        """Обновляет настройку в кэше и уведомляет подписчиков о смене состояния.
+
+        Неизмененные значения не записываются. С `defer=True` запись копится
+        до `flush_settings()`, что позволяет схлопнуть серию изменений в одну
+        транзакцию.
+        """
+        if key in self.settings and self.settings[key] == value:
+            return
         self.settings[key] = value
-        if self._storage:
-            self._storage.set_setting("settings", self.settings)
+        self._dirty_settings.add(key)
+        if not defer:
+            self.flush_settings()
         self.settings_changed.emit(key, value)
         self.state_changed.emit()
 
+    def flush_settings(self) -> None:
+        """Записывает одной транзакцией только изменившиеся ключи настроек."""
+        if not self._dirty_settings:
+            return
+        changed = {SETTINGS_KEY_PREFIX + key: self.settings[key] for key in sorted(self._dirty_settings)}
+        self._dirty_settings.clear()
+        if self._storage:
+            self._write(self._storage.set_settings, changed)
+
     def set_theme(self, theme: str) -> None:
         """Нормализует и применяет выбранную пользователем тему."""
         normalized = self._normalize_theme(theme)
         self.selected_theme = normalized
         if self._storage:
-            self._storage.set_setting("selected_theme", normalized)
+            self._write(self._storage.set_setting, "selected_theme", normalized)
         self.theme_changed.emit(normalized)
         self.state_changed.emit()
 
@@ -99,16 +145,20 @@ class AppState(QObject):
         """Изменяет баланс монет с защитой от отрицательных значений."""
         self.coins_balance = max(0, self.coins_balance + amount)
         if self._storage:
-            self._storage.set_coins_balance(self.coins_balance)
+            self._write(self._storage.add_coins, amount, reason)
+        self._on_coins_changed(reason)
+
+    def _on_coins_changed(self, reason: str) -> None:
         self.coins_changed.emit(self.coins_balance)
         if reason:
-            self.settings["last_coin_reason"] = reason
+            # Отложенная запись: окно по `settings_changed` планирует общий сброс настроек.
+            self.save_setting("last_coin_reason", reason, defer=True)
         self.state_changed.emit()
 
     def start_session(self, duration_sec: int, theme: str) -> None:
         """Создает новую активную сессию в оперативном состоянии."""
         self.current_session = SessionState(
-            started_at=datetime.now().isoformat(timespec="seconds"),
+            started_at=self.clock.now().isoformat(timespec="seconds"),
             duration_sec=duration_sec,
             theme=self._normalize_theme(theme),
             state="focus_running",
@@ -119,60 +169,276 @@ class AppState(QObject):
     def update_session_state(self, state: str, progress: float) -> None:
         if not self.current_session:
             return
+        if state == TimerState.FOCUS_RUNNING.value and self.current_session.state == TimerState.BREAK_RUNNING.value:
+            # Авто-цикл начал следующий фокус: неудачная остановка будет датирована им.
+            self.current_session.started_at = self.clock.now().isoformat(timespec="seconds")
+        progress = max(0.0, min(1.0, progress))
+        if state == self.current_session.state and progress == self.current_session.progress:
+            return
         self.current_session.state = state
-        self.current_session.progress = max(0.0, min(1.0, progress))
+        self.current_session.progress = progress
         self.state_changed.emit()
 
     def finish_session(self, success: bool, coins_earned: int, duration_sec: int | None = None) -> None:
         """Завершает сессию, пишет результат в БД и начисляет награду при успехе."""
         if not self.current_session:
             return
-        session_id: int | None = None
+        session = self.current_session
+        credited = coins_earned if success else 0
         if self._storage:
-            session_id = self._storage.insert_session(
-                started_at=self.current_session.started_at,
-                duration_sec=duration_sec if duration_sec is not None else self.current_session.duration_sec,
-                theme=self.current_session.theme,
+            recorded_duration = duration_sec if duration_sec is not None else session.duration_sec
+            future = self._write(
+                self._storage.record_session_result,
+                started_at=session.started_at,
+                duration_sec=recorded_duration,
+                theme=session.theme,
                 success=success,
-                coins_earned=coins_earned if success else 0,
+                coins_earned=credited,
+                tasks=list(self.tasks),
+                close_active=True,
             )
-            if success and session_id is not None:
-                self._storage.insert_session_tasks_snapshot(session_id, self.tasks)
-        if success and coins_earned:
-            self.add_coins(coins_earned, reason="session_success")
+
+            def emit_recorded(done: Future) -> None:
+                # При write-behind колбэк придет из фонового потока: сигнал уходит через диспетчер.
+                if done.exception() is None:
+                    self._dispatch(
+                        self.session_recorded.emit,
+                        SessionRow(done.result(), session.started_at, recorded_duration, session.theme, success, credited),
+                    )
+
+            future.add_done_callback(emit_recorded)
+        if credited:
+            self.coins_balance = max(0, self.coins_balance + credited)
+            self._on_coins_changed("session_success")
         self.current_session = None
         self.state_changed.emit()
 
+    def record_focus_transitions(
+        self,
+        transitions: list[TimerTransition],
+        coins_per_session: int,
+        now: float | None = None,
+    ) -> int:
+        """Записывает все завершенные фокус-фазы из `transitions` одной пакетной записью.
+
+        Монотонные границы фаз переводятся в локальное время относительно
+        `now`. При авто-цикле активная сессия продолжается, иначе она
+        закрывается на переходе в FINISHED. Возвращает число засчитанных сессий.
+        """
+        completed = [transition for transition in transitions if transition.completes_focus]
+        session = self.current_session
+        if now is None:
+            now = self.clock.monotonic()
+        wall_now = self.clock.now()
+        finished = bool(transitions) and transitions[-1].to_state == TimerState.FINISHED
+        if session and transitions:
+            if finished:
+                self.current_session = None
+                self.state_changed.emit()
+            elif transitions[-1].to_state == TimerState.FOCUS_RUNNING:
+                last = transitions[-1]
+                session.started_at = (wall_now - timedelta(seconds=now - last.ended_at)).isoformat(timespec="seconds")
+        if not completed:
+            if finished and self._storage:
+                self._write(self._storage.clear_active_session)
+            return 0
+
+        theme = session.theme if session else self.selected_theme
+        credited = max(0, coins_per_session)
+        results = [
+            SessionResult(
+                started_at=(wall_now - timedelta(seconds=now - transition.phase_started_at)).isoformat(timespec="seconds"),
+                duration_sec=transition.phase_seconds,
+                theme=theme,
+                success=True,
+                coins_earned=credited,
+            )
+            for transition in completed
+        ]
+        if self._storage:
+            future = self._write(self._storage.record_session_results, results, list(self.tasks), close_active=finished)
+
+            def emit_recorded(done: Future) -> None:
+                if done.exception() is None:
+                    for session_id, result in zip(done.result(), results):
+                        self._dispatch(
+                            self.session_recorded.emit,
+                            SessionRow(session_id, result.started_at, result.duration_sec, result.theme, True, credited),
+                        )
+
+            future.add_done_callback(emit_recorded)
+        if credited:
+            self.coins_balance = max(0, self.coins_balance + credited * len(results))
+            self._on_coins_changed("session_success")
+        self.state_changed.emit()
+        return len(results)
+
+    def checkpoint_session(self, checkpoint: TimerCheckpoint | None) -> None:
+        """Сохраняет контрольную точку активной сессии.
+
+        Вызывается только на переходах таймера (старт, пауза, продолжение,
+        смена фазы), а не на каждом тике: несколько записей за сессию.
+        """
+        if not self._storage:
+            return
+        if checkpoint is None or not self.current_session:
+            self._write(self._storage.clear_active_session)
+            return
+        session = self.current_session
+        self._write(
+            self._storage.save_active_session,
+            ActiveSessionRow(
+                started_at=session.started_at,
+                theme=session.theme,
+                state=checkpoint.state.value,
+                focus_seconds=checkpoint.focus_seconds,
+                break_seconds=checkpoint.break_seconds,
+                auto_cycle=checkpoint.auto_cycle,
+                phase_total_sec=checkpoint.phase_total_sec,
+                phase_elapsed_sec=checkpoint.phase_elapsed_sec,
+                phase_age_sec=checkpoint.phase_age_sec,
+                completed_focus_sessions=checkpoint.completed_focus_sessions,
+                saved_at=self.clock.now().isoformat(timespec="seconds"),
+            ),
+        )
+
+    def discard_session(self) -> None:
+        """Закрывает активную сессию без записи результата (остановка на перерыве)."""
+        self.current_session = None
+        if self._storage:
+            self._write(self._storage.clear_active_session)
+        self.state_changed.emit()
+
+    def restore_active_session(self, timer: FocusTimer) -> bool:
+        """Восстанавливает сессию, прерванную падением процесса.
+
+        Если фаза еще не истекла (или стоит на паузе), таймер продолжает ее
+        с верным остатком и возвращается `True`. Фокус, истекший пока процесс
+        не работал, засчитать нельзя: он записывается как неуспешная сессия
+        с длительностью до конца фазы.
+        """
+        loaded = self._load_active_session()
+        if loaded is None:
+            return False
+        row, checkpoint, offline_sec = loaded
+        if checkpoint.remaining_after(offline_sec) > 0:
+            timer.restore(checkpoint, offline_sec)
+            logger.info("Resumed %s session started at %s", row.state, row.started_at)
+            self.state_changed.emit()
+            return True
+        if checkpoint.state in FOCUS_ACTIVE_STATES:
+            logger.warning("Focus session started at %s was interrupted; recorded as failed", row.started_at)
+            # Фаза шла и без процесса: записываем фактически прошедшее время, а не время контрольной точки.
+            elapsed = min(row.phase_total_sec, row.phase_elapsed_sec + offline_sec)
+            self.finish_session(success=False, coins_earned=0, duration_sec=int(elapsed))
+        else:
+            self.discard_session()
+        return False
+
+    def adopt_active_session(self, timer: FocusTimer) -> bool:
+        """Продолжает сессию из контрольной точки так, будто таймер шел все это время.
+
+        В отличие от `restore_active_session` истекшие фазы не считаются
+        сбоем: следующий `advance` вернет их как обычные переходы. Так работает
+        CLI, где между `start` и `stop` процесс и не должен жить.
+        """
+        loaded = self._load_active_session()
+        if loaded is None:
+            return False
+        _row, checkpoint, offline_sec = loaded
+        # Нечитаемое время сохранения: продолжаем с момента контрольной точки.
+        timer.restore(checkpoint, offline_sec if offline_sec != float("inf") else 0.0)
+        return True
+
+    def _load_active_session(self) -> tuple[ActiveSessionRow, TimerCheckpoint, float] | None:
+        if not self._storage:
+            return None
+        row = self._storage.load_active_session()
+        if row is None:
+            return None
+        checkpoint, offline_sec = checkpoint_from_row(row, self.clock.now())
+        self.current_session = SessionState(
+            started_at=row.started_at,
+            duration_sec=row.focus_seconds,
+            theme=self._normalize_theme(row.theme),
+            state=row.state,
+            progress=min(1.0, row.phase_elapsed_sec / row.phase_total_sec) if row.phase_total_sec > 0 else 0.0,
+        )
+        return row, checkpoint, offline_sec
+
+    @staticmethod
+    def _load_settings(storage: Storage) -> dict[str, Any]:
+        """Читает настройки по ключам, переводя старый JSON-словарь в построчный формат."""
+        settings = storage.get_settings(SETTINGS_KEY_PREFIX)
+        legacy = storage.get_setting(LEGACY_SETTINGS_KEY)
+        if isinstance(legacy, dict):
+            merged = {**legacy, **settings}
+            storage.set_settings({SETTINGS_KEY_PREFIX + key: value for key, value in merged.items()})
+            storage.delete_setting(LEGACY_SETTINGS_KEY)
+            return merged
+        return settings
+
+    def _write(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future | None:
+        """Отправляет запись в хранилище; ошибки фоновой записи попадают в лог."""
+        if not self._storage:
+            return None
+        future = self._storage.submit(fn, *args, **kwargs)
+        future.add_done_callback(_log_write_failure)
+        return future
+
+    def _after_write(self, future: Future | None, callback: Callable[[Future], None]) -> None:
+        """Вызывает `callback(future)` через диспетчер, когда запись зафиксирована."""
+        if future is not None:
+            future.add_done_callback(lambda done: self._dispatch(callback, done))
+
     def _normalize_theme(self, theme: str) -> str:
         return THEME_ALIASES.get(theme, "forest")
 
+    @property
+    def task_limit_reached(self) -> bool:
+        limit = self._storage.task_limit if self._storage else None
+        return limit is not None and self.backlog_size >= limit
+
     def add_task(self, title: str) -> bool:
-        if not self._storage:
-            return False
-        try:
-            self._storage.create_task(title)
-        except ValueError:
+        """Ставит задачу в конец бэклога, не дожидаясь очереди записи.
+
+        Пустой заголовок и исчерпанный лимит отклоняются сразу по оперативному
+        состоянию. В панели строка появляется, когда запись зафиксирована и
+        известен id (если в панели есть место).
+        """
+        if not self._storage or not title.strip() or self.task_limit_reached:
             return False
-        self.tasks = self._storage.list_tasks(limit=MAX_TASKS, include_done=True)
-        self.tasks_changed.emit()
-        self.state_changed.emit()
+        self.backlog_size += 1
+        self._after_write(self._write(self._storage.create_task, title), self._on_task_created)
+        self._emit_tasks_changed()
         return True
 
     def remove_task(self, task_id: int) -> None:
         if not self._storage:
             return
-        self._storage.delete_task(task_id)
-        self.tasks = self._storage.list_tasks(limit=MAX_TASKS, include_done=True)
-        self.tasks_changed.emit()
-        self.state_changed.emit()
+        row = self._task_row(task_id)
+        if row is None:
+            return
+        deleted = self._write(self._storage.delete_task, task_id)
+        del self.tasks[row]
+        self.backlog_size = max(0, self.backlog_size - 1)
+        self.task_removed.emit(row)
+        if self.backlog_size > len(self.tasks):
+            # Освободившееся место займет следующая задача бэклога, но только после
+            # фиксации удаления: иначе дозагрузка может снова прочитать эту строку.
+            self._after_write(deleted, self._refill_panel)
+        self._emit_tasks_changed()
 
     def toggle_task_done(self, task_id: int, done: bool) -> None:
         if not self._storage:
             return
-        self._storage.set_task_done(task_id, done)
-        self.tasks = self._storage.list_tasks(limit=MAX_TASKS, include_done=True)
-        self.tasks_changed.emit()
-        self.state_changed.emit()
+        row = self._task_row(task_id)
+        if row is None or self.tasks[row].is_done == done:
+            return
+        self._write(self._storage.set_task_done, task_id, done)
+        self.tasks[row] = replace(self.tasks[row], is_done=done)
+        self.task_toggled.emit(row, done)
+        self._emit_tasks_changed()
 
     def move_task_up(self, task_id: int) -> None:
         self._move_task(task_id, -1)
@@ -183,18 +449,74 @@ class AppState(QObject):
     def set_task_order(self, list_ids: list[int]) -> None:
         if not self._storage:
             return
-        self._storage.reorder_tasks(list_ids)
-        self.tasks = self._storage.list_tasks(limit=MAX_TASKS, include_done=True)
-        self.tasks_changed.emit()
-        self.state_changed.emit()
+        self._write(self._storage.reorder_tasks, list(list_ids))
+        by_id = {task.id: task for task in self.tasks}
+        ordered = [by_id[task_id] for task_id in list_ids if task_id in by_id]
+        keys = sorted(task.sort_order for task in ordered)
+        self.tasks = [replace(task, sort_order=key) for task, key in zip(ordered, keys)]
+        self.tasks_reset.emit()
+        self._emit_tasks_changed()
 
     def _move_task(self, task_id: int, direction: int) -> None:
-        ids = [task.id for task in self.tasks]
-        if task_id not in ids:
+        if not self._storage:
+            return
+        idx = self._task_row(task_id)
+        if idx is None:
             return
-        idx = ids.index(task_id)
         new_idx = idx + direction
-        if new_idx < 0 or new_idx >= len(ids):
+        if new_idx < 0 or new_idx >= len(self.tasks):
             return
-        ids[idx], ids[new_idx] = ids[new_idx], ids[idx]
-        self.set_task_order(ids)
+        # Перемещение пишет одну строку: задача встает после нового предшественника.
+        if direction < 0:
+            after_id = self.tasks[new_idx - 1].id if new_idx > 0 else None
+        else:
+            after_id = self.tasks[new_idx].id
+        moved = self._write(self._storage.move_task, task_id, after_id)
+        self.tasks.insert(new_idx, self.tasks.pop(idx))
+        self.task_moved.emit(idx, new_idx)
+        # Новый ключ считает хранилище; он придет раньше дозагрузки, поставленной в очередь позже.
+        self._after_write(moved, lambda done: self._apply_sort_key(task_id, done))
+        self._emit_tasks_changed()
+
+    def _on_task_created(self, done: Future) -> None:
+        if done.exception() is not None:
+            self.backlog_size = max(0, self.backlog_size - 1)
+        elif self._storage and len(self.tasks) < MAX_TASKS:
+            self._append_to_panel(self._storage.get_task(done.result()))
+        self._emit_tasks_changed()
+
+    def _refill_panel(self, _done: Future) -> None:
+        """Дополняет панель задачами бэклога после ее последней строки."""
+        if not self._storage or len(self.tasks) >= MAX_TASKS or self.backlog_size <= len(self.tasks):
+            return
+        after = None
+        if self.tasks:
+            # Ключ из БД: перестановка могла перераспределить ключи всех задач.
+            after = self._storage.get_task(self.tasks[-1].id) or self.tasks[-1]
+        # С запасом: еще не записанная перестановка может вернуть строки, которые уже в панели.
+        for task in self._storage.list_tasks(limit=MAX_TASKS, include_done=True, after=after):
+            if len(self.tasks) >= MAX_TASKS:
+                break
+            self._append_to_panel(task)
+        self._emit_tasks_changed()
+
+    def _apply_sort_key(self, task_id: int, done: Future) -> None:
+        row = self._task_row(task_id)
+        if row is not None and done.exception() is None:
+            self.tasks[row] = replace(self.tasks[row], sort_order=done.result())
+
+    def _append_to_panel(self, task: TaskRow | None) -> None:
+        if task is None or self._task_row(task.id) is not None:
+            return
+        self.tasks.append(task)
+        self.task_inserted.emit(len(self.tasks) - 1, task)
+
+    def _task_row(self, task_id: int) -> int | None:
+        for row, task in enumerate(self.tasks):
+            if task.id == task_id:
+                return row
+        return None
+
+    def _emit_tasks_changed(self) -> None:
+        self.tasks_changed.emit()
+        self.state_changed.emit()
@@ -1,14 +1,206 @@
 from __future__ import annotations
 
-"""Загрузка графических ресурсов (ассетов) с кэшированием в памяти."""
+"""Загрузка графических ресурсов (ассетов) с кэшированием в памяти.
 
+Кадры анимации хранятся атласом: одно упакованное изображение
+`<папка>/atlas.png` и таблица кадров `<папка>/atlas.json`
+(`{"version": 1, "image": "atlas.png", "frames": [{"name", "x", "y", "w", "h"}]}`).
+Атлас собирает `python -m app.tools.pack_atlas assets/<папка>`; если его
+нет, кадры читаются отдельными файлами и упаковываются в памяти.
+
+Сцены не декодируют файлы в UI-потоке: `request_image` и
+`request_sprite_atlas` ставят декодирование `QImage` в фоновый пул и
+возвращают `Future`, а `AsyncAsset` переводит готовый результат в
+`QPixmap` при первом обращении из UI-потока (`QPixmap` вне него
+создавать нельзя). Декодирование `AsyncAsset` ленивое: если нужный
+сцене вариант уже лежит в дисковом кэше, исходник не декодируется вовсе.
+
+Готовые `QPixmap` и атласы живут только в `PIXMAP_CACHE` — LRU с
+бюджетом в байтах. Ассеты активной сцены закреплены (`AsyncAsset.pin`),
+остальные вытесняются и при следующем выборе сцены декодируются заново.
+
+Отмасштабированные под экран варианты (`scaled_variant`) переживают
+перезапуск в дисковом кэше `app.core.disk_cache`, если он включен
+`configure_scaled_cache`: попадание отображает сырые пиксели в память
+вместо сглаженного масштабирования в UI-потоке.
+"""
+
+import json
+import math
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from threading import Lock
+from typing import Callable, Generic, Hashable, TypeVar
+
+from PyQt6.QtCore import QPoint, QRect, QSize, Qt
+from PyQt6.QtGui import QImage, QImageReader, QPainter, QPixmap
 
-from PyQt6.QtGui import QPixmap
+from app.core.disk_cache import DEFAULT_DISK_CACHE_BUDGET_BYTES, ScaledImageCache
+from app.core.lru import LRUCache
 
 
 ASSETS_DIR = Path(__file__).resolve().parents[2] / "assets"
-_PIXMAP_CACHE: dict[str, QPixmap | None] = {}
+ATLAS_IMAGE_NAME = "atlas.png"
+ATLAS_TABLE_NAME = "atlas.json"
+ATLAS_FORMAT_VERSION = 1
+# Прозрачная рамка вокруг кадра: при сглаженном масштабировании атласа соседи не просвечивают.
+ATLAS_PADDING = 4
+PIXMAP_CACHE_BUDGET_BYTES = 96 * 1024 * 1024
+# Условный размер записи «файла нет»: отрицательные записи тоже ограничены бюджетом.
+_NEGATIVE_ENTRY_BYTES = 64
+_DECODE_WORKERS = 2
+_MISSING = object()
+
+T = TypeVar("T")
+R = TypeVar("R")
+# Изображение атласа, прямоугольники кадров и файлы, из которых он собран.
+DecodedAtlas = tuple[QImage, tuple[QRect, ...], tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class AtlasLayout:
+    """Размер изображения атласа и прямоугольники кадров — без декодирования пикселей."""
+    size: QSize
+    rects: tuple[QRect, ...]
+    sources: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class SpriteAtlas:
+    """Кадры анимации в одном изображении: прямоугольники идут в порядке кадров."""
+    pixmap: QPixmap
+    rects: tuple[QRect, ...]
+    sources: tuple[str, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.rects)
+
+    def frame(self, index: int) -> QPixmap:
+        """Копия одного кадра; для отрисовки дешевле рисовать `pixmap` по `rects[index]`."""
+        return self.pixmap.copy(self.rects[index])
+
+    @property
+    def layout(self) -> AtlasLayout:
+        return AtlasLayout(self.pixmap.size(), self.rects, self.sources)
+
+    @classmethod
+    def from_decoded(cls, decoded: DecodedAtlas) -> SpriteAtlas:
+        image, rects, sources = decoded
+        return cls(QPixmap.fromImage(image), rects, sources)
+
+
+def _asset_bytes(value: QPixmap | SpriteAtlas | None) -> int:
+    if value is None:
+        return _NEGATIVE_ENTRY_BYTES
+    pixmap = value.pixmap if isinstance(value, SpriteAtlas) else value
+    return pixmap.width() * pixmap.height() * max(1, pixmap.depth()) // 8
+
+
+PIXMAP_CACHE: LRUCache[Hashable, QPixmap | SpriteAtlas | None] = LRUCache(PIXMAP_CACHE_BUDGET_BYTES, _asset_bytes)
+# Декодирования в работе; запись удаляется по готовности, результат хранит только `PIXMAP_CACHE`.
+_PENDING_DECODES: dict[Hashable, Future] = {}
+_pending_lock = Lock()
+_decoder: ThreadPoolExecutor | None = None
+_scaled_cache: ScaledImageCache | None = None
+
+
+class AsyncAsset(Generic[T]):
+    """Ассет, декодируемый в фоне; `value()` конвертирует результат в UI-потоке.
+
+    Значение хранит `PIXMAP_CACHE` под ключом `key`. Декодирование
+    ставится в пул при первом обращении к `future`, `ready` или `value()`,
+    а если запись вытеснена — при следующем; до его завершения `ready`
+    ложно. `ready_for` и `scaled` сначала ищут вариант нужного размера в
+    дисковом кэше по `sources` (файлам внутри `assets/`) и при попадании
+    исходник не декодируют.
+    """
+
+    def __init__(
+        self,
+        key: Hashable,
+        request: Callable[[], Future[R | None]],
+        convert: Callable[[R], T],
+        sources: tuple[str, ...] = (),
+    ) -> None:
+        self.key = key
+        self.sources = sources
+        self._request = request
+        self._convert = convert
+        self._future: Future[R | None] | None = None
+
+    @property
+    def future(self) -> Future[R | None]:
+        """Текущее декодирование; запускается заново, если значения нет ни в кэше, ни в работе."""
+        if self._future is None:
+            self._future = self._request()
+        return self._future
+
+    @property
+    def pending(self) -> Future[R | None] | None:
+        """Идущее декодирование, если его уже запросили; сам запрос не ставит."""
+        future = self._future
+        return future if future is not None and not future.done() else None
+
+    @property
+    def ready(self) -> bool:
+        return self.key in PIXMAP_CACHE or self.future.done()
+
+    @property
+    def missing(self) -> bool:
+        """Ассета заведомо нет: исходников нет на диске или декодирование вернуло `None`.
+
+        Декодирование не запускает: пока оно не запрошено, известен только ответ `stat`.
+        """
+        if not all(asset_exists(relative) for relative in self.sources):
+            return True
+        if self.key in PIXMAP_CACHE or (self._future is not None and self._future.done()):
+            return self.value() is None
+        return False
+
+    def ready_for(self, size: QSize) -> bool:
+        """Можно ли рисовать вариант `size`: попадание в дисковый кэш не требует декодирования."""
+        return self.key in PIXMAP_CACHE or has_scaled_variant(self.sources, size) or self.future.done()
+
+    def scaled(self, size: QSize) -> QPixmap | None:
+        """Вариант `size` пикселей устройства: с диска, если ассет не декодирован, иначе из значения.
+
+        `None`, если ассета нет или он еще декодируется (см. `ready_for`).
+        """
+        if self.key not in PIXMAP_CACHE:
+            cached = load_scaled_variant(self.sources, size)
+            if cached is not None:
+                return cached
+        value = self.value()
+        if value is None:
+            return None
+        if isinstance(value, SpriteAtlas):
+            return scaled_variant(value.sources, value.pixmap, size)
+        return scaled_variant(self.sources, value, size)
+
+    def value(self) -> T | None:
+        """Готовый ассет или `None`, если файла нет (или декодирование еще идет — см. `ready`)."""
+        cached = PIXMAP_CACHE.get(self.key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        future = self.future
+        if not future.done():
+            return None
+        self._future = None
+        try:
+            result = future.result()
+        except Exception:  # noqa: BLE001 - битый ассет не должен ронять отрисовку
+            result = None
+        value = None if result is None else self._convert(result)
+        PIXMAP_CACHE.put(self.key, value)
+        return value
+
+    def pin(self) -> None:
+        """Закрепляет ассет в кэше, пока его сцена на экране."""
+        PIXMAP_CACHE.pin(self.key)
+
+    def unpin(self) -> None:
+        PIXMAP_CACHE.unpin(self.key)
 
 
 def get_asset_path(relative: str) -> Path:
@@ -23,21 +215,120 @@ def asset_exists(relative: str) -> bool:
 
 def load_pixmap(relative: str) -> QPixmap | None:
     """Загружает `QPixmap` с кэшем; возвращает `None`, если файл невалиден."""
-    if relative in _PIXMAP_CACHE:
-        return _PIXMAP_CACHE[relative]
+    cached = PIXMAP_CACHE.get(relative, _MISSING)
+    if cached is not _MISSING:
+        return cached
 
     path = get_asset_path(relative)
-    if not path.exists():
-        _PIXMAP_CACHE[relative] = None
+    pixmap = QPixmap(str(path)) if path.exists() else None
+    if pixmap is not None and pixmap.isNull():
+        pixmap = None
+    PIXMAP_CACHE.put(relative, pixmap)
+    return pixmap
+
+
+def request_image(relative: str) -> Future[QImage | None]:
+    """Ставит декодирование `QImage` в фоновый пул; пока оно идет, повторный запрос получает тот же future."""
+    return _submit_decode(relative, decode_image, relative)
+
+
+def request_sprite_atlas(directory: str, frame_names: list[str]) -> Future[DecodedAtlas | None]:
+    """Фоновая версия `load_sprite_atlas`: future с `QImage` атласа и прямоугольниками кадров."""
+    return _submit_decode(_atlas_key(directory, frame_names), decode_sprite_atlas, directory, list(frame_names))
+
+
+def async_pixmap(relative: str) -> AsyncAsset[QPixmap]:
+    return AsyncAsset(relative, lambda: request_image(relative), QPixmap.fromImage, (relative,))
+
+
+def async_sprite_atlas(directory: str, frame_names: list[str]) -> AsyncAsset[SpriteAtlas]:
+    return AsyncAsset(
+        _atlas_key(directory, frame_names),
+        lambda: request_sprite_atlas(directory, frame_names),
+        SpriteAtlas.from_decoded,
+        atlas_sources(directory, frame_names),
+    )
+
+
+def atlas_sources(directory: str, frame_names: list[str]) -> tuple[str, ...]:
+    """Файлы, из которых собирается атлас: упакованный, если есть `atlas.json`, иначе отдельные кадры."""
+    table = _read_atlas_table(directory, frame_names)
+    if table is not None:
+        return table[2]
+    return tuple(f"{directory}/{name}" for name in frame_names)
+
+
+def read_atlas_layout(directory: str, frame_names: list[str]) -> AtlasLayout | None:
+    """Раскладка упакованного атласа по `atlas.json` и заголовку изображения, без декодирования.
+
+    `None`, если атлас не упакован или таблица не сходится с изображением.
+    """
+    table = _read_atlas_table(directory, frame_names)
+    if table is None:
         return None
+    _, rects, sources = table
+    size = QImageReader(str(get_asset_path(sources[1]))).size()
+    bounds = QRect(QPoint(0, 0), size)
+    if not size.isValid() or not all(bounds.contains(rect) for rect in rects):
+        return None
+    return AtlasLayout(size, rects, sources)
+
+
+def configure_scaled_cache(directory: Path | None, budget_bytes: int = DEFAULT_DISK_CACHE_BUDGET_BYTES) -> None:
+    """Включает дисковый кэш вариантов `scaled_variant` в `directory`; `None` выключает его."""
+    global _scaled_cache
+    _scaled_cache = None if directory is None else ScaledImageCache(directory, budget_bytes)
+
+
+def has_scaled_variant(sources: tuple[str, ...], size: QSize) -> bool:
+    """Есть ли на диске вариант `sources` размера `size`; исходники не читаются и не декодируются."""
+    cache = _scaled_cache
+    if cache is None or not sources:
+        return False
+    return cache.contains([get_asset_path(relative) for relative in sources], size.width(), size.height())
+
 
-    pixmap = QPixmap(str(path))
-    if pixmap.isNull():
-        _PIXMAP_CACHE[relative] = None
+def load_scaled_variant(sources: tuple[str, ...], size: QSize) -> QPixmap | None:
+    """Вариант `sources` размера `size` из дискового кэша или `None` при промахе."""
+    cache = _scaled_cache
+    if cache is None or not sources:
         return None
+    raw = cache.get([get_asset_path(relative) for relative in sources], size.width(), size.height())
+    if raw is None:
+        return None
+    with raw:
+        image = QImage(raw.pixels, raw.width, raw.height, raw.stride, QImage.Format(raw.pixel_format))
+        # Копия до закрытия mmap: `QImage` над чужим буфером его не удерживает.
+        return QPixmap.fromImage(image.copy())
+
+
+def scaled_variant(sources: tuple[str, ...], pixmap: QPixmap, size: QSize) -> QPixmap:
+    """Сглаженно масштабирует `pixmap` до `size` пикселей устройства.
+
+    `sources` — файлы внутри `assets/`, из которых получен `pixmap`: по их
+    содержимому и `size` вариант ищется на диске. Промах масштабирует
+    в UI-потоке, а запись на диск уходит в фоновый пул.
+    """
+    cached = load_scaled_variant(sources, size)
+    if cached is not None:
+        return cached
+
+    cache = _scaled_cache
+    paths = [get_asset_path(relative) for relative in sources]
+    scaled = pixmap.scaled(size, Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    if cache is not None and paths:
+        image = scaled.toImage().convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+        _decode_pool().submit(_store_scaled_variant, cache, paths, image)
+    return scaled
 
-    _PIXMAP_CACHE[relative] = pixmap
-    return pixmap
+
+def decode_image(relative: str) -> QImage | None:
+    """Декодирует изображение в `QImage`; безопасно вызывать из любого потока."""
+    path = get_asset_path(relative)
+    if not path.exists():
+        return None
+    image = QImage(str(path))
+    return None if image.isNull() else image
 
 
 def load_pixmap_sequence(relatives: list[str]) -> list[QPixmap]:
@@ -49,3 +340,141 @@ def load_pixmap_sequence(relatives: list[str]) -> list[QPixmap]:
             return []
         pixmaps.append(pixmap)
     return pixmaps
+
+
+def load_sprite_atlas(directory: str, frame_names: list[str]) -> SpriteAtlas | None:
+    """Загружает кадры `frame_names` из атласа папки одним декодированием.
+
+    Без `atlas.json` кадры читаются по отдельности и упаковываются в
+    памяти, так что сцена всегда рисует из одного изображения. `None`,
+    если какого-то кадра нет или файлы невалидны.
+    """
+    key = _atlas_key(directory, frame_names)
+    cached = PIXMAP_CACHE.get(key, _MISSING)
+    if cached is not _MISSING:
+        return cached
+    decoded = decode_sprite_atlas(directory, frame_names)
+    atlas = None if decoded is None else SpriteAtlas.from_decoded(decoded)
+    PIXMAP_CACHE.put(key, atlas)
+    return atlas
+
+
+def decode_sprite_atlas(directory: str, frame_names: list[str]) -> DecodedAtlas | None:
+    """Декодирует атлас папки (или упаковывает отдельные кадры) в `QImage`; безопасно вне UI-потока."""
+    return _decode_packed_atlas(directory, frame_names) or _pack_separate_frames(directory, frame_names)
+
+
+def pack_frames(images: list[QImage], padding: int = ATLAS_PADDING) -> tuple[QImage, list[QRect]]:
+    """Раскладывает кадры полками почти квадратной сеткой; прямоугольники — в порядке `images`."""
+    cell_width = max(image.width() for image in images) + 2 * padding
+    columns = math.ceil(math.sqrt(len(images)))
+    row_limit = cell_width * columns
+
+    rects: list[QRect] = []
+    x = y = shelf_height = 0
+    for image in images:
+        width = image.width() + 2 * padding
+        height = image.height() + 2 * padding
+        if x + width > row_limit:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        rects.append(QRect(x + padding, y + padding, image.width(), image.height()))
+        x += width
+        shelf_height = max(shelf_height, height)
+
+    atlas = QImage(
+        max(rect.right() + 1 + padding for rect in rects),
+        y + shelf_height,
+        QImage.Format.Format_ARGB32_Premultiplied,
+    )
+    atlas.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(atlas)
+    for image, rect in zip(images, rects):
+        painter.drawImage(rect.topLeft(), image)
+    painter.end()
+    return atlas, rects
+
+
+def atlas_table(frame_names: list[str], rects: list[QRect]) -> dict:
+    """Таблица кадров в формате `atlas.json`."""
+    return {
+        "version": ATLAS_FORMAT_VERSION,
+        "image": ATLAS_IMAGE_NAME,
+        "frames": [
+            {"name": name, "x": rect.x(), "y": rect.y(), "w": rect.width(), "h": rect.height()}
+            for name, rect in zip(frame_names, rects)
+        ],
+    }
+
+
+def _atlas_key(directory: str, frame_names: list[str]) -> tuple[str, str, tuple[str, ...]]:
+    return ("atlas", directory, tuple(frame_names))
+
+
+def _submit_decode(key: Hashable, fn: Callable[..., R], *args) -> Future[R]:
+    with _pending_lock:
+        future = _PENDING_DECODES.get(key)
+        if future is not None:
+            return future
+        future = _PENDING_DECODES[key] = _decode_pool().submit(fn, *args)
+    # Вне блокировки: у уже завершенного future колбэк вызывается сразу в этом потоке.
+    future.add_done_callback(lambda _future: _forget_decode(key, _future))
+    return future
+
+
+def _forget_decode(key: Hashable, future: Future) -> None:
+    with _pending_lock:
+        if _PENDING_DECODES.get(key) is future:
+            del _PENDING_DECODES[key]
+
+
+def _decode_pool() -> ThreadPoolExecutor:
+    global _decoder
+    if _decoder is None:
+        _decoder = ThreadPoolExecutor(max_workers=_DECODE_WORKERS, thread_name_prefix="asset-decoder")
+    return _decoder
+
+
+def _store_scaled_variant(cache: ScaledImageCache, paths: list[Path], image: QImage) -> None:
+    pixels = image.constBits().asstring(image.sizeInBytes())
+    cache.put(paths, image.width(), image.height(), image.bytesPerLine(), image.format().value, pixels)
+
+
+def _read_atlas_table(directory: str, frame_names: list[str]) -> tuple[str, tuple[QRect, ...], tuple[str, str]] | None:
+    """Имя изображения, прямоугольники кадров и файлы упакованного атласа из `atlas.json`."""
+    table_path = get_asset_path(f"{directory}/{ATLAS_TABLE_NAME}")
+    if not table_path.exists():
+        return None
+    try:
+        table = json.loads(table_path.read_text(encoding="utf-8"))
+        if table.get("version") != ATLAS_FORMAT_VERSION:
+            return None
+        by_name = {frame["name"]: QRect(frame["x"], frame["y"], frame["w"], frame["h"]) for frame in table["frames"]}
+        rects = tuple(by_name[name] for name in frame_names)
+        image_name = table["image"]
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None  # битая или устаревшая таблица: читаем отдельные кадры
+    return image_name, rects, (f"{directory}/{ATLAS_TABLE_NAME}", f"{directory}/{image_name}")
+
+
+def _decode_packed_atlas(directory: str, frame_names: list[str]) -> DecodedAtlas | None:
+    table = _read_atlas_table(directory, frame_names)
+    if table is None:
+        return None
+    image_name, rects, sources = table
+    image = decode_image(f"{directory}/{image_name}")
+    if image is None or not all(image.rect().contains(rect) for rect in rects):
+        return None
+    return image, rects, sources
+
+
+def _pack_separate_frames(directory: str, frame_names: list[str]) -> DecodedAtlas | None:
+    images: list[QImage] = []
+    for name in frame_names:
+        image = QImage(str(get_asset_path(f"{directory}/{name}")))
+        if image.isNull():
+            return None
+        images.append(image)
+    if not images:
+        return None
+    atlas, rects = pack_frames(images)
+    return atlas, tuple(rects), tuple(f"{directory}/{name}" for name in frame_names)
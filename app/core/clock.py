@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+"""Источник времени для таймера, состояния приложения и хранилища.
+
+Вся доменная логика берет время через `Clock`, поэтому в тестах и
+симуляции реальное время подменяется `ManualClock`, который двигается
+только явно.
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Protocol
+
+
+class Clock(Protocol):
+    """Пара согласованных часов: монотонные секунды и локальное время."""
+
+    def monotonic(self) -> float: ...
+
+    def now(self) -> datetime: ...
+
+
+class SystemClock:
+    """Реальное время процесса."""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class ManualClock:
+    """Часы, которые идут только через `advance`/`set`; обе шкалы сдвигаются вместе."""
+
+    def __init__(self, start: datetime | None = None, monotonic_start: float = 0.0) -> None:
+        self._wall = start if start is not None else datetime(2026, 1, 1, 9, 0, 0)
+        self._monotonic = monotonic_start
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def now(self) -> datetime:
+        return self._wall
+
+    def advance(self, seconds: float) -> None:
+        if seconds < 0:
+            raise ValueError("ManualClock cannot go backwards")
+        self._monotonic += seconds
+        self._wall += timedelta(seconds=seconds)
+
+    def set(self, when: datetime) -> None:
+        """Переводит часы вперед до `when`."""
+        self.advance((when - self._wall).total_seconds())
+
+
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+"""Дисковый кэш заранее отмасштабированных изображений между запусками.
+
+Вариант хранится файлом `<исходники>-<содержимое>-<w>x<h>.raw`: хэш путей
+исходных файлов, хэш их содержимого и целевой размер в пикселях
+устройства. Внутри — 32-байтный заголовок (магия, ширина, высота,
+stride, формат пикселей, размер данных) и сразу за ним сырые строки
+пикселей, поэтому файл отображается в память через `mmap` и отдается без
+декодирования и пересэмплирования. Модуль не зависит от Qt: формат
+пикселей — просто число, которое понимает вызывающий код.
+
+Хэш содержимого исходника запоминается в `sources.json` каталога по
+(путь, mtime, размер): файл перечитывается и хэшируется, только когда
+они изменились, так что холодный старт обходится `stat` без чтения.
+
+Устаревшие записи удаляются сами: при записи нового варианта — все
+варианты тех же исходников с другим хэшем содержимого, а сверх бюджета —
+давно не использованные (время использования — mtime файла, попадание
+его обновляет).
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Sequence
+
+
+DEFAULT_DISK_CACHE_BUDGET_BYTES = 128 * 1024 * 1024
+RAW_SUFFIX = ".raw"
+SOURCE_INDEX_NAME = "sources.json"
+_MAGIC = b"FSRAW\x00\x01\x00"
+# magic, width, height, stride, pixel_format, data_size — ровно 32 байта, данные выровнены.
+_HEADER = struct.Struct("<8sIIIIQ")
+
+
+def default_cache_dir() -> Path:
+    """Каталог кэша рядом с БД по умолчанию (в текущей директории)."""
+    return Path.cwd() / ".cache" / "scaled"
+
+
+@dataclass(frozen=True)
+class RawImage:
+    """Отображенный в память вариант; `pixels` действителен до `close()`."""
+    width: int
+    height: int
+    stride: int
+    pixel_format: int
+    pixels: memoryview
+    _mapping: mmap.mmap = field(repr=False)
+
+    def close(self) -> None:
+        self.pixels.release()
+        self._mapping.close()
+
+    def __enter__(self) -> RawImage:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ScaledImageCache:
+    """Каталог сырых вариантов изображений с бюджетом в байтах."""
+
+    def __init__(self, directory: Path, budget_bytes: int = DEFAULT_DISK_CACHE_BUDGET_BYTES) -> None:
+        self.directory = Path(directory)
+        self.budget_bytes = budget_bytes
+        # путь -> [mtime_ns, размер, sha256]; читается с диска лениво, пишется при изменениях.
+        self._source_index: dict[str, list] | None = None
+        # Вариант пишет фоновый пул, читает UI-поток: индекс общий.
+        self._index_lock = threading.Lock()
+
+    def contains(self, sources: Sequence[Path], width: int, height: int) -> bool:
+        """Есть ли вариант на диске; без отображения в память и без чтения исходников."""
+        path = self._variant_path(sources, width, height)
+        return path is not None and path.is_file()
+
+    def get(self, sources: Sequence[Path], width: int, height: int) -> RawImage | None:
+        """Отображает вариант в память или возвращает `None`, если его нет или он битый."""
+        path = self._variant_path(sources, width, height)
+        if path is None:
+            return None
+        try:
+            with path.open("rb") as file:
+                mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None  # нет файла или он пустой
+        magic, raw_width, raw_height, stride, pixel_format, data_size = _HEADER.unpack_from(
+            mapping.read(_HEADER.size).ljust(_HEADER.size, b"\0")
+        )
+        if (
+            magic != _MAGIC
+            or (raw_width, raw_height) != (width, height)
+            or data_size != stride * height
+            or len(mapping) < _HEADER.size + data_size
+        ):
+            mapping.close()
+            self._unlink(path)
+            return None
+        try:
+            os.utime(path)  # отметка использования для вытеснения
+        except OSError:
+            pass
+        pixels = memoryview(mapping)[_HEADER.size:_HEADER.size + data_size]
+        return RawImage(width, height, stride, pixel_format, pixels, mapping)
+
+    def put(
+        self,
+        sources: Sequence[Path],
+        width: int,
+        height: int,
+        stride: int,
+        pixel_format: int,
+        pixels: bytes | memoryview,
+    ) -> Path | None:
+        """Атомарно записывает вариант и вытесняет устаревшие; `None`, если исходников нет."""
+        path = self._variant_path(sources, width, height)
+        if path is None:
+            return None
+        data_size = stride * height
+        if len(pixels) < data_size:
+            raise ValueError("pixel buffer is smaller than stride * height")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(_HEADER.pack(_MAGIC, width, height, stride, pixel_format, data_size))
+                file.write(memoryview(pixels)[:data_size])
+            os.replace(temp_name, path)
+        except OSError:
+            self._unlink(Path(temp_name))
+            return None
+        self._drop_other_contents(path)
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Удаляет давно не использованные варианты сверх бюджета; возвращает их число."""
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.budget_bytes:
+                break
+            if self._unlink(path):
+                total -= size
+                removed += 1
+        return removed
+
+    def size_bytes(self) -> int:
+        return sum(path.stat().st_size for path in self._entries())
+
+    def clear(self) -> None:
+        for path in self._entries():
+            self._unlink(path)
+
+    def _variant_path(self, sources: Sequence[Path], width: int, height: int) -> Path | None:
+        content = self._content_digest(sources)
+        if content is None:
+            return None
+        return self.directory / f"{self._source_digest(sources)}-{content}-{width}x{height}{RAW_SUFFIX}"
+
+    @staticmethod
+    def _source_digest(sources: Sequence[Path]) -> str:
+        joined = "\0".join(str(Path(source).resolve()) for source in sources)
+        return hashlib.sha1(joined.encode("utf-8")).hexdigest()[:16]
+
+    def _content_digest(self, sources: Sequence[Path]) -> str | None:
+        if not sources:
+            return None
+        digest = hashlib.sha256()
+        with self._index_lock:
+            index = self._load_source_index()
+            changed = False
+            for source in sources:
+                try:
+                    stat = os.stat(source)
+                except OSError:
+                    return None
+                entry = index.get(str(source))
+                if entry is None or entry[:2] != [stat.st_mtime_ns, stat.st_size]:
+                    # Новый или измененный файл: только здесь содержимое читается целиком.
+                    try:
+                        entry = [stat.st_mtime_ns, stat.st_size, hashlib.sha256(Path(source).read_bytes()).hexdigest()]
+                    except OSError:
+                        return None
+                    index[str(source)] = entry
+                    changed = True
+                digest.update(entry[2].encode("ascii"))
+            if changed:
+                self._save_source_index(index)
+        return digest.hexdigest()[:24]
+
+    def _load_source_index(self) -> dict[str, list]:
+        if self._source_index is None:
+            try:
+                loaded = json.loads((self.directory / SOURCE_INDEX_NAME).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                loaded = {}
+            self._source_index = loaded if isinstance(loaded, dict) else {}
+        return self._source_index
+
+    def _save_source_index(self, index: dict[str, list]) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            descriptor, temp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(index, file)
+            os.replace(temp_name, self.directory / SOURCE_INDEX_NAME)
+        except OSError:
+            pass  # без индекса исходники просто перехэшируются при следующем запуске
+
+    def _drop_other_contents(self, path: Path) -> None:
+        """Исходник изменился: варианты со старым хэшем содержимого больше не нужны."""
+        source_digest, content_digest, _ = path.name.split("-", 2)
+        for other in self.directory.glob(f"{source_digest}-*{RAW_SUFFIX}"):
+            if other.name.split("-", 2)[1] != content_digest:
+                self._unlink(other)
+
+    def _entries(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return list(self.directory.glob(f"*{RAW_SUFFIX}"))
+
+    @staticmethod
+    def _unlink(path: Path) -> bool:
+        try:
+            path.unlink()
+        except OSError:
+            return False  # на Windows файл может быть отображен другим процессом
+        return True
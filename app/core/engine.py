@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+"""Движок фокус-сессий без Qt: команды таймера и асинхронный драйвер.
+
+`FocusEngine` связывает `FocusTimer` с `AppState`: запускает и
+останавливает сессии, записывает завершенные фазы и сохраняет
+контрольные точки на переходах. Окно вызывает `step` по своему
+Qt-таймеру, а `run` — цикл asyncio для демона или CLI, который спит
+до `FocusTimer.next_deadline` и не загружает Qt.
+"""
+
+import asyncio
+
+from app.core.app_state import AppState
+from app.core.events import Signal
+from app.core.timer import BREAK_ACTIVE_STATES, FOCUS_ACTIVE_STATES, FocusTimer, TimerState, TimerTransition
+
+
+STARTABLE_STATES = frozenset({TimerState.IDLE, TimerState.FINISHED, TimerState.FAILED})
+
+
+def coins_for_focus(focus_seconds: int) -> int:
+    """Награда за один завершенный фокус: монета за каждые 5 минут, минимум одна."""
+    return max(1, focus_seconds // 300)
+
+
+class FocusEngine:
+    """Команды и шаг продвижения таймера поверх `AppState`."""
+    # Видимое изменение таймера в цикле `run` (снимок переиспользуется, хранить его нельзя).
+    frame = Signal(object)
+
+    def __init__(self, timer: FocusTimer, app_state: AppState) -> None:
+        self.timer = timer
+        self.app_state = app_state
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+
+    def start(self, theme: str) -> bool:
+        """Начинает фокус с текущей конфигурацией таймера; `False`, если сессия уже идет."""
+        if self.timer.state not in STARTABLE_STATES:
+            return False
+        self.timer.start()
+        self.app_state.start_session(self.timer.focus_duration_sec, theme)
+        self._checkpoint()
+        return True
+
+    def pause(self) -> None:
+        self.timer.pause()
+        self._checkpoint()
+
+    def resume(self) -> None:
+        self.timer.resume()
+        self._checkpoint()
+
+    def stop(self) -> TimerState:
+        """Останавливает сессию и возвращает состояние таймера до остановки.
+
+        Остановка во время фокуса пишет неуспешную сессию, во время перерыва
+        просто закрывает цикл. Таймер остается в итоговом состоянии
+        (FAILED/IDLE), сброс — на стороне вызывающего кода.
+        """
+        state_before_stop = self.timer.state
+        self.timer.stop()
+        if state_before_stop in FOCUS_ACTIVE_STATES:
+            elapsed = self.timer.snapshot().elapsed_seconds
+            self.app_state.finish_session(success=False, coins_earned=0, duration_sec=elapsed)
+        elif state_before_stop in BREAK_ACTIVE_STATES:
+            self.app_state.discard_session()
+        self.wake()
+        return state_before_stop
+
+    def step(self, now: float | None = None) -> list[TimerTransition]:
+        """Продвигает таймер, записывает завершенные фокусы и отмечает смену фазы."""
+        if now is None:
+            now = self.timer.clock.monotonic()
+        transitions = self.timer.advance(now)
+        if transitions:
+            self.app_state.record_focus_transitions(transitions, coins_for_focus(self.timer.focus_duration_sec), now)
+            if self.timer.state != TimerState.FINISHED:
+                self._checkpoint()  # смена фазы в авто-цикле
+        return transitions
+
+    def wake(self) -> None:
+        """Будит цикл `run`, чтобы он пересчитал дедлайн после внешней команды."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def shutdown(self) -> None:
+        self._stopping = True
+        self.wake()
+
+    async def run(self) -> None:
+        """Крутит таймер до `shutdown`, просыпаясь только к его дедлайнам.
+
+        На время работы диспетчер `AppState` переключается на
+        `loop.call_soon_threadsafe`, поэтому сигналы фоновой записи
+        приходят в поток цикла.
+        """
+        loop = asyncio.get_running_loop()
+        self.app_state.set_dispatcher(loop.call_soon_threadsafe)
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        clock = self.timer.clock
+        try:
+            while not self._stopping:
+                # Сбрасываем флаг до шага: команды внутри шага и обработчиков снова разбудят цикл.
+                self._wakeup.clear()
+                now = clock.monotonic()
+                self.step(now)
+                snapshot = self.timer.poll(now)
+                if snapshot is not None:
+                    self.app_state.update_session_state(snapshot.state.value, snapshot.progress)
+                    self.frame.emit(snapshot)
+                deadline = self.timer.next_deadline(now)
+                timeout = None if deadline is None else max(0.0, deadline - clock.monotonic())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._wakeup = None
+            self.app_state.set_dispatcher(None)
+
+    def _checkpoint(self) -> None:
+        self.app_state.checkpoint_session(self.timer.checkpoint())
+        self.wake()
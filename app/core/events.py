@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+"""Минимальные сигналы для ядра без зависимости от Qt.
+
+`Signal` объявляется атрибутом класса (как `pyqtSignal`) и у каждого
+экземпляра превращается в свой `BoundSignal`. Обработчики вызываются
+синхронно в потоке, который вызвал `emit`; доставку в нужный поток
+обеспечивает диспетчер владельца (см. `AppState.set_dispatcher`).
+"""
+
+from typing import Any, Callable
+
+
+Dispatcher = Callable[..., Any]
+
+
+def call_now(fn: Callable[..., Any], *args: Any) -> None:
+    """Диспетчер по умолчанию: выполняет вызов сразу в текущем потоке."""
+    fn(*args)
+
+
+class BoundSignal:
+    __slots__ = ("_slots",)
+
+    def __init__(self) -> None:
+        self._slots: list[Callable[..., Any]] = []
+
+    def connect(self, slot: Callable[..., Any]) -> None:
+        self._slots.append(slot)
+
+    def disconnect(self, slot: Callable[..., Any] | None = None) -> None:
+        if slot is None:
+            self._slots.clear()
+        else:
+            self._slots.remove(slot)
+
+    def emit(self, *args: Any) -> None:
+        # Копия списка: обработчик может отключиться прямо во время рассылки.
+        for slot in tuple(self._slots):
+            slot(*args)
+
+
+class Signal:
+    """Дескриптор сигнала; типы аргументов служат только документацией."""
+
+    def __init__(self, *arg_types: Any) -> None:
+        self.arg_types = arg_types
+        self._name = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._name = name
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+        bound = BoundSignal()
+        # Кэшируем в __dict__ экземпляра: дальше атрибут читается без дескриптора.
+        instance.__dict__[self._name] = bound
+        return bound
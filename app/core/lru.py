@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+"""LRU-кэш с бюджетом в байтах, закреплением ключей и счетчиками.
+
+Размер записи считает переданная функция (`size_of`), поэтому модуль не
+зависит от Qt: для ассетов это байты `QPixmap`, для тестов — что угодно.
+Закрепленные ключи (`pin`) не вытесняются и могут временно превышать
+бюджет. Кэш не потокобезопасен и рассчитан на один (UI) поток.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Generic, Hashable, Iterator, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    budget_bytes: int
+    pinned: int
+
+
+class LRUCache(Generic[K, V]):
+    """Вытесняет давно не использованные записи, пока сумма размеров больше бюджета."""
+
+    def __init__(self, budget_bytes: int, size_of: Callable[[V], int]) -> None:
+        if budget_bytes < 0:
+            raise ValueError("budget_bytes must be non-negative")
+        self._budget = budget_bytes
+        self._size_of = size_of
+        self._entries: OrderedDict[K, tuple[V, int]] = OrderedDict()
+        self._size = 0
+        self._pinned: set[K] = set()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __contains__(self, key: object) -> bool:
+        """Проверка без учета в статистике и без смены порядка."""
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    @property
+    def budget_bytes(self) -> int:
+        return self._budget
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return default
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: K, value: V) -> None:
+        """Кладет запись как самую свежую и вытесняет старые сверх бюджета.
+
+        Только что добавленная запись не вытесняется, даже если одна больше
+        бюджета: иначе ее пришлось бы декодировать заново на каждом кадре.
+        """
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= old[1]
+        size = self._size_of(value)
+        self._entries[key] = (value, size)
+        self._size += size
+        self._evict(keep=key)
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        self._size -= entry[1]
+        return entry[0]
+
+    def pin(self, key: K) -> None:
+        """Запрещает вытеснять ключ; можно закрепить еще не загруженную запись."""
+        self._pinned.add(key)
+
+    def unpin(self, key: K) -> None:
+        self._pinned.discard(key)
+        self._evict()
+
+    def is_pinned(self, key: K) -> bool:
+        return key in self._pinned
+
+    def set_budget(self, budget_bytes: int) -> None:
+        if budget_bytes < 0:
+            raise ValueError("budget_bytes must be non-negative")
+        self._budget = budget_bytes
+        self._evict()
+
+    def clear(self) -> None:
+        """Удаляет все записи; закрепления и счетчики сохраняются."""
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            entries=len(self._entries),
+            size_bytes=self._size,
+            budget_bytes=self._budget,
+            pinned=len(self._pinned),
+        )
+
+    def _evict(self, keep: K | None = None) -> None:
+        if self._size <= self._budget:
+            return
+        # Снимок ключей от самых старых: словарь меняется прямо в цикле.
+        for key in list(self._entries):
+            if self._size <= self._budget:
+                break
+            if key == keep or key in self._pinned:
+                continue
+            _, size = self._entries.pop(key)
+            self._size -= size
+            self._evictions += 1
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+"""Ускоренная симуляция работы таймера поверх настоящего SQLite-файла.
+
+Связка `FocusTimer` + `AppState` + `Storage` работает на `ManualClock`:
+недели авто-цикла с паузами и досрочными остановками проигрываются за
+миллисекунды, а результат пишется в обычную БД. Это нагрузочный стенд для
+роста истории и запросов статистики.
+
+Запуск: `python -m app.core.simulation sim.db --days 28`.
+"""
+
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.core.app_state import AppState
+from app.core.clock import ManualClock
+from app.core.timer import FocusTimer, TimerState
+from app.data.storage import BACKLOG_TASK_LIMIT, Storage
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    days: int = 7
+    focus_seconds: int = 25 * 60
+    break_seconds: int = 5 * 60
+    blocks_per_day: int = 3
+    max_cycles_per_block: int = 4
+    pause_chance: float = 0.3
+    stop_chance: float = 0.2
+    coins_per_session: int = 5
+    theme: str = "forest"
+    seed: int = 0
+    start: datetime = datetime(2026, 1, 5, 9, 0, 0)
+
+
+@dataclass(frozen=True)
+class SimulationReport:
+    successes: int
+    failures: int
+    coins_balance: int
+    simulated_seconds: float
+    run_seconds: float
+    stats_query_seconds: float
+
+    @property
+    def sessions(self) -> int:
+        return self.successes + self.failures
+
+
+class _Simulation:
+    def __init__(self, storage: Storage, state: AppState, clock: ManualClock, config: SimulationConfig) -> None:
+        self.storage = storage
+        self.state = state
+        self.clock = clock
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.timer = FocusTimer(clock)
+        self.timer.configure(config.focus_seconds, config.break_seconds, auto_cycle=True)
+        self.successes = 0
+        self.failures = 0
+
+    def run_day(self, day_start: datetime) -> None:
+        # Длинные блоки могли перевалить за полночь: тогда день начинается сразу, часы назад не идут.
+        self.clock.set(max(day_start, self.clock.now()))
+        for _ in range(self.config.blocks_per_day):
+            self.run_block()
+            # Перерыв между блоками работы: от получаса до двух часов.
+            self.clock.advance(self.rng.uniform(30 * 60, 2 * 60 * 60))
+
+    def run_block(self) -> None:
+        config = self.config
+        cycle_sec = config.focus_seconds + config.break_seconds
+        self.timer.start()
+        self.state.start_session(config.focus_seconds, config.theme)
+
+        if self.rng.random() < config.pause_chance:
+            self.advance(self.rng.uniform(0, config.focus_seconds))
+            self.timer.pause()
+            self.clock.advance(self.rng.uniform(60, 20 * 60))
+            self.timer.resume()
+
+        # Сразу прыгаем на середину последнего перерыва: `advance` догоняет все циклы разом.
+        cycles = self.rng.randint(1, config.max_cycles_per_block)
+        in_phase = self.timer.snapshot().elapsed_seconds if self.timer.state == TimerState.FOCUS_RUNNING else 0
+        self.advance(cycles * cycle_sec - config.break_seconds / 2 - in_phase)
+
+        if self.rng.random() < config.stop_chance:
+            self.advance(config.break_seconds / 2 + self.rng.uniform(1, config.focus_seconds - 1))
+            elapsed = self.timer.snapshot().elapsed_seconds
+            self.timer.stop()
+            self.state.finish_session(success=False, coins_earned=0, duration_sec=elapsed)
+            self.failures += 1
+        else:
+            self.timer.stop()
+            self.state.discard_session()
+        self.timer.reset()
+
+    def advance(self, seconds: float) -> None:
+        self.clock.advance(max(0.0, seconds))
+        transitions = self.timer.advance()
+        if transitions:
+            self.successes += self.state.record_focus_transitions(transitions, self.config.coins_per_session)
+        snapshot = self.timer.snapshot()
+        self.state.update_session_state(snapshot.state.value, snapshot.progress)
+
+
+def run_simulation(db_path: str | Path, config: SimulationConfig = SimulationConfig()) -> SimulationReport:
+    """Проигрывает `config.days` дней работы и возвращает сводку прогона."""
+    clock = ManualClock(config.start)
+    started = time.perf_counter()
+    with Storage(db_path, task_limit=BACKLOG_TASK_LIMIT, clock=clock) as storage:
+        storage.init_db()
+        state = AppState(clock)
+        state.load_from_storage(storage)
+        simulation = _Simulation(storage, state, clock, config)
+        for day in range(config.days):
+            simulation.run_day(config.start + timedelta(days=day))
+        run_seconds = time.perf_counter() - started
+
+        query_started = time.perf_counter()
+        storage.get_stats_summary(clock.now().date())
+        storage.list_sessions_page()
+        stats_query_seconds = time.perf_counter() - query_started
+
+        return SimulationReport(
+            successes=simulation.successes,
+            failures=simulation.failures,
+            coins_balance=storage.get_coins_balance(),
+            simulated_seconds=(clock.now() - config.start).total_seconds(),
+            run_seconds=run_seconds,
+            stats_query_seconds=stats_query_seconds,
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Fast-forward simulation of focus sessions")
+    parser.add_argument("db_path", type=Path)
+    parser.add_argument("--days", type=int, default=SimulationConfig.days)
+    parser.add_argument("--seed", type=int, default=SimulationConfig.seed)
+    args = parser.parse_args(argv)
+    report = run_simulation(args.db_path, SimulationConfig(days=args.days, seed=args.seed))
+    print(
+        f"{report.sessions} sessions ({report.successes} ok / {report.failures} failed), "
+        f"{report.coins_balance} coins, {report.simulated_seconds / 86400:.1f} simulated days "
+        f"in {report.run_seconds:.3f}s; stats queries {report.stats_query_seconds * 1000:.2f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 """Доменная логика таймера Pomodoro без привязки к UI."""
 
-import time
+import math
 from dataclasses import dataclass
 from enum import Enum
 
+from app.core.clock import SYSTEM_CLOCK, Clock
+
 
 class TimerState(str, Enum):
     IDLE = "idle"
@@ -17,9 +19,27 @@ class TimerState(str, Enum):
     FAILED = "failed"
 
 
-@dataclass(frozen=True)
+# Множества состояний вынесены на уровень модуля, чтобы горячий путь тика не собирал их заново.
+RUNNING_STATES = frozenset({TimerState.FOCUS_RUNNING, TimerState.BREAK_RUNNING})
+ACTIVE_STATES = frozenset(
+    {TimerState.FOCUS_RUNNING, TimerState.FOCUS_PAUSED, TimerState.BREAK_RUNNING, TimerState.BREAK_PAUSED}
+)
+FOCUS_ACTIVE_STATES = frozenset({TimerState.FOCUS_RUNNING, TimerState.FOCUS_PAUSED})
+BREAK_ACTIVE_STATES = frozenset({TimerState.BREAK_RUNNING, TimerState.BREAK_PAUSED})
+FOCUS_VIEW_STATES = frozenset(
+    {TimerState.FOCUS_RUNNING, TimerState.FOCUS_PAUSED, TimerState.FAILED, TimerState.FINISHED, TimerState.IDLE}
+)
+# Шаг квантования прогресса для `poll`: более мелкие изменения не видны на кольце прогресса.
+PROGRESS_STEPS = 1000
+
+
+@dataclass(slots=True)
 class TimerSnapshot:
-    """Иммутабельный снимок состояния таймера для UI-рендера."""
+    """Снимок состояния таймера для UI-рендера.
+
+    `snapshot()` каждый раз возвращает новый объект, а `poll()` переиспользует
+    один экземпляр: его нельзя хранить между кадрами.
+    """
     total_seconds: int
     remaining_seconds: int
     elapsed_seconds: int
@@ -29,11 +49,52 @@ class TimerSnapshot:
     completed_focus_sessions: int
 
 
+@dataclass(frozen=True)
+class TimerTransition:
+    """Завершение фазы, обнаруженное при продвижении таймера.
+
+    Времена монотонные: `phase_started_at` — фактическое начало фазы
+    (паузы его не сдвигают), `ended_at` — граница, на которой фаза истекла.
+    """
+    from_state: TimerState
+    to_state: TimerState
+    phase_started_at: float
+    ended_at: float
+    phase_seconds: int
+
+    @property
+    def completes_focus(self) -> bool:
+        return self.from_state == TimerState.FOCUS_RUNNING
+
+
+@dataclass(frozen=True)
+class TimerCheckpoint:
+    """Состояние активной фазы, переносимое между запусками процесса.
+
+    Монотонные отметки не переживают перезапуск, поэтому фаза хранится как
+    прошедшее время (`phase_elapsed_sec`) и возраст с ее начала (`phase_age_sec`).
+    """
+    state: TimerState
+    focus_seconds: int
+    break_seconds: int
+    auto_cycle: bool
+    phase_total_sec: float
+    phase_elapsed_sec: float
+    phase_age_sec: float
+    completed_focus_sessions: int
+
+    def remaining_after(self, offline_sec: float) -> float:
+        """Остаток фазы, если процесс простоял `offline_sec` секунд (пауза время не тратит)."""
+        elapsed = self.phase_elapsed_sec + (offline_sec if self.state in RUNNING_STATES else 0.0)
+        return self.phase_total_sec - elapsed
+
+
 class FocusTimer:
     """Состояние и переходы фокус/перерыв/пауза/завершение."""
     """Monotonic pomodoro engine detached from UI framework."""
 
-    def __init__(self) -> None:
+    def __init__(self, clock: Clock | None = None) -> None:
+        self._clock = clock or SYSTEM_CLOCK
         self._focus_duration_sec = 25 * 60
         self._break_duration_sec = 5 * 60
         self._auto_cycle = False
@@ -41,7 +102,15 @@ class FocusTimer:
         self._phase_total_sec = 0.0
         self._phase_elapsed_before_pause_sec = 0.0
         self._phase_started_monotonic: float | None = None
+        self._phase_origin_monotonic: float | None = None
         self._completed_focus_sessions = 0
+        self._poll_snapshot = TimerSnapshot(0, 0, 0, 0.0, self._state, True, 0)
+        self._poll_progress_step = 0
+        self._poll_valid = False
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock
 
     @property
     def state(self) -> TimerState:
@@ -49,12 +118,7 @@ class FocusTimer:
 
     @property
     def is_active(self) -> bool:
-        return self._state in {
-            TimerState.FOCUS_RUNNING,
-            TimerState.FOCUS_PAUSED,
-            TimerState.BREAK_RUNNING,
-            TimerState.BREAK_PAUSED,
-        }
+        return self._state in ACTIVE_STATES
 
     @property
     def focus_duration_sec(self) -> int:
@@ -82,20 +146,15 @@ class FocusTimer:
 
     def start(self, now: float | None = None) -> None:
         """Запускает таймер с фазы фокуса."""
-        if self._state in {
-            TimerState.FOCUS_RUNNING,
-            TimerState.FOCUS_PAUSED,
-            TimerState.BREAK_RUNNING,
-            TimerState.BREAK_PAUSED,
-        }:
+        if self._state in ACTIVE_STATES:
             return
         if now is None:
-            now = time.monotonic()
+            now = self._clock.monotonic()
         self._start_phase(TimerState.FOCUS_RUNNING, self._focus_duration_sec, now)
 
     def pause(self, now: float | None = None) -> None:
         if now is None:
-            now = time.monotonic()
+            now = self._clock.monotonic()
         if self._state == TimerState.FOCUS_RUNNING:
             self._phase_elapsed_before_pause_sec = self._current_elapsed(now)
             self._phase_started_monotonic = None
@@ -108,7 +167,7 @@ class FocusTimer:
 
     def resume(self, now: float | None = None) -> None:
         if now is None:
-            now = time.monotonic()
+            now = self._clock.monotonic()
         if self._state == TimerState.FOCUS_PAUSED:
             self._phase_started_monotonic = now
             self._state = TimerState.FOCUS_RUNNING
@@ -120,13 +179,13 @@ class FocusTimer:
     def stop(self, now: float | None = None) -> bool:
         """Останавливает таймер; `True` только для корректного завершения."""
         if now is None:
-            now = time.monotonic()
-        if self._state in {TimerState.FOCUS_RUNNING, TimerState.FOCUS_PAUSED}:
+            now = self._clock.monotonic()
+        if self._state in FOCUS_ACTIVE_STATES:
             self._state = TimerState.FAILED
             self._phase_elapsed_before_pause_sec = min(self._phase_total_sec, self._current_elapsed(now))
             self._phase_started_monotonic = None
             return False
-        if self._state in {TimerState.BREAK_RUNNING, TimerState.BREAK_PAUSED}:
+        if self._state in BREAK_ACTIVE_STATES:
             self.reset()
             return True
         if self._state == TimerState.FINISHED:
@@ -137,60 +196,211 @@ class FocusTimer:
         self._phase_total_sec = 0.0
         self._phase_elapsed_before_pause_sec = 0.0
         self._phase_started_monotonic = None
+        self._phase_origin_monotonic = None
         self._state = TimerState.IDLE
 
     def tick(self, now: float | None = None) -> TimerSnapshot:
         """Продвигает состояние на текущий момент и возвращает снимок."""
         if now is None:
-            now = time.monotonic()
+            now = self._clock.monotonic()
+        self.advance(now)
+        return self.snapshot(now)
 
-        if self._state not in {TimerState.FOCUS_RUNNING, TimerState.BREAK_RUNNING}:
-            return self.snapshot(now)
+    def advance(self, now: float | None = None) -> list[TimerTransition]:
+        """Продвигает таймер на момент `now` и возвращает все пройденные переходы.
 
-        elapsed = self._current_elapsed(now)
-        if elapsed >= self._phase_total_sec:
-            overflow = elapsed - self._phase_total_sec
-            if self._state == TimerState.FOCUS_RUNNING:
+        Число полных циклов фокус+перерыв, уместившихся в прошедшее время
+        (например, после сна ноутбука), вычисляется арифметически, без
+        пошагового перебора фаз; список содержит по событию на каждую
+        завершенную фазу с ее монотонными границами.
+        """
+        if now is None:
+            now = self._clock.monotonic()
+        if self._state not in RUNNING_STATES:
+            return []
+
+        elapsed = self._elapsed_since_start(now)
+        if elapsed < self._phase_total_sec:
+            return []
+
+        is_focus = self._state == TimerState.FOCUS_RUNNING
+        boundary = now - (elapsed - self._phase_total_sec)
+        origin = self._phase_origin_monotonic if self._phase_origin_monotonic is not None else boundary - self._phase_total_sec
+        if not self._auto_cycle:
+            transition = TimerTransition(self._state, TimerState.FINISHED, origin, boundary, int(round(self._phase_total_sec)))
+            if is_focus:
                 self._completed_focus_sessions += 1
-                if self._auto_cycle:
-                    self._start_phase(TimerState.BREAK_RUNNING, self._break_duration_sec, now - overflow)
-                else:
-                    self._phase_elapsed_before_pause_sec = self._phase_total_sec
-                    self._phase_started_monotonic = None
-                    self._state = TimerState.FINISHED
-            elif self._state == TimerState.BREAK_RUNNING:
-                if self._auto_cycle:
-                    self._start_phase(TimerState.FOCUS_RUNNING, self._focus_duration_sec, now - overflow)
-                else:
-                    self._phase_elapsed_before_pause_sec = self._phase_total_sec
-                    self._phase_started_monotonic = None
-                    self._state = TimerState.FINISHED
-        return self.snapshot(now)
+            self._phase_elapsed_before_pause_sec = self._phase_total_sec
+            self._phase_started_monotonic = None
+            self._state = TimerState.FINISHED
+            return [transition]
+
+        # После границы фазы чередуются `first`, `second`, `first`, ...: считаем целые циклы.
+        focus_sec, break_sec = float(self._focus_duration_sec), float(self._break_duration_sec)
+        cycle_sec = focus_sec + break_sec
+        first_sec, second_sec = (break_sec, focus_sec) if is_focus else (focus_sec, break_sec)
+        full_cycles = int((now - boundary) // cycle_sec)
+        extra_phase = (now - boundary) - full_cycles * cycle_sec >= first_sec
+        skipped = 2 * full_cycles + int(extra_phase)
+
+        states = (self._state, TimerState.BREAK_RUNNING if is_focus else TimerState.FOCUS_RUNNING)
+        transitions = [TimerTransition(states[0], states[1], origin, boundary, int(round(self._phase_total_sec)))]
+        for index in range(1, skipped + 1):
+            phase_start = self._auto_phase_start(boundary, index, cycle_sec, first_sec)
+            phase_sec = first_sec if index % 2 else second_sec
+            transitions.append(
+                TimerTransition(
+                    states[index % 2],
+                    states[(index + 1) % 2],
+                    phase_start,
+                    phase_start + phase_sec,
+                    int(round(phase_sec)),
+                )
+            )
+
+        self._completed_focus_sessions += sum(1 for transition in transitions if transition.completes_focus)
+        current = skipped + 1
+        self._start_phase(
+            states[current % 2],
+            int(first_sec if current % 2 else second_sec),
+            self._auto_phase_start(boundary, current, cycle_sec, first_sec),
+        )
+        return transitions
+
+    def checkpoint(self, now: float | None = None) -> TimerCheckpoint | None:
+        """Снимает контрольную точку активной фазы; вне сессии возвращает `None`."""
+        if self._state not in ACTIVE_STATES:
+            return None
+        if now is None:
+            now = self._clock.monotonic()
+        elapsed = self._current_elapsed(now)
+        origin = self._phase_origin_monotonic
+        return TimerCheckpoint(
+            state=self._state,
+            focus_seconds=self._focus_duration_sec,
+            break_seconds=self._break_duration_sec,
+            auto_cycle=self._auto_cycle,
+            phase_total_sec=self._phase_total_sec,
+            phase_elapsed_sec=elapsed,
+            phase_age_sec=(now - origin) if origin is not None else elapsed,
+            completed_focus_sessions=self._completed_focus_sessions,
+        )
+
+    def restore(self, checkpoint: TimerCheckpoint, offline_sec: float = 0.0, now: float | None = None) -> None:
+        """Восстанавливает фазу из контрольной точки, снятой `offline_sec` секунд назад.
+
+        Запущенная фаза продолжает идти и за время простоя; если она успела
+        закончиться, следующий `advance` вернет пропущенные переходы.
+        """
+        if now is None:
+            now = self._clock.monotonic()
+        self.configure(checkpoint.focus_seconds, checkpoint.break_seconds, checkpoint.auto_cycle)
+        saved_at = now - max(0.0, offline_sec)
+        self._state = checkpoint.state
+        self._phase_total_sec = checkpoint.phase_total_sec
+        self._phase_elapsed_before_pause_sec = checkpoint.phase_elapsed_sec
+        self._phase_started_monotonic = saved_at if checkpoint.state in RUNNING_STATES else None
+        self._phase_origin_monotonic = saved_at - checkpoint.phase_age_sec
+        self._completed_focus_sessions = checkpoint.completed_focus_sessions
+        self.invalidate_poll()
+
+    def next_deadline(self, now: float | None = None) -> float | None:
+        """Возвращает монотонное время следующего видимого изменения.
+
+        Это ближайшее из двух событий: смена целой секунды оставшегося
+        времени или граница текущей фазы. Вне запущенной фазы (idle, пауза,
+        завершение) изменений не ожидается и возвращается `None`.
+        """
+        if self._state not in RUNNING_STATES:
+            return None
+        if now is None:
+            now = self._clock.monotonic()
+        elapsed = self._current_elapsed(now)
+        phase_end = now + (self._phase_total_sec - elapsed)
+        next_second = now + (math.floor(elapsed) + 1 - elapsed)
+        return min(phase_end, next_second)
+
+    def phase_deadline(self, now: float | None = None) -> float | None:
+        """Монотонное время окончания текущей фазы; `None` вне запущенной фазы.
+
+        Реже, чем `next_deadline`: подходит, когда секунды никто не видит
+        (окно свернуто), а разбудить нужно только к смене фазы.
+        """
+        if self._state not in RUNNING_STATES:
+            return None
+        if now is None:
+            now = self._clock.monotonic()
+        return now + (self._phase_total_sec - self._current_elapsed(now))
 
     def snapshot(self, now: float | None = None) -> TimerSnapshot:
         if now is None:
-            now = time.monotonic()
+            now = self._clock.monotonic()
+        snapshot = TimerSnapshot(0, 0, 0, 0.0, self._state, True, 0)
+        self._fill_snapshot(snapshot, now)
+        return snapshot
+
+    def poll(self, now: float | None = None) -> TimerSnapshot | None:
+        """Возвращает переиспользуемый снимок или `None`, если показывать нечего.
+
+        Снимок считается неизменным, пока совпадают состояние, целые
+        секунды остатка, квантованный прогресс и число завершенных фокусов.
+        Фазы не продвигаются: перед опросом вызывается `advance`.
+        """
+        if now is None:
+            now = self._clock.monotonic()
+        snapshot = self._poll_snapshot
+        prev_state = snapshot.state
+        prev_remaining = snapshot.remaining_seconds
+        prev_completed = snapshot.completed_focus_sessions
+        self._fill_snapshot(snapshot, now)
+        progress_step = int(snapshot.progress * PROGRESS_STEPS)
+        if (
+            self._poll_valid
+            and snapshot.state == prev_state
+            and snapshot.remaining_seconds == prev_remaining
+            and progress_step == self._poll_progress_step
+            and snapshot.completed_focus_sessions == prev_completed
+        ):
+            return None
+        self._poll_valid = True
+        self._poll_progress_step = progress_step
+        return snapshot
+
+    def invalidate_poll(self) -> None:
+        """Заставляет следующий `poll` вернуть снимок даже без изменений."""
+        self._poll_valid = False
+
+    def _fill_snapshot(self, snapshot: TimerSnapshot, now: float) -> None:
         elapsed = self._current_elapsed(now)
         total = max(0, int(round(self._phase_total_sec)))
         elapsed_seconds = min(total, max(0, int(elapsed)))
-        remaining_seconds = max(0, total - elapsed_seconds)
         progress = (elapsed / self._phase_total_sec) if self._phase_total_sec > 0 else 0.0
-        is_focus = self._state in {TimerState.FOCUS_RUNNING, TimerState.FOCUS_PAUSED, TimerState.FAILED, TimerState.FINISHED, TimerState.IDLE}
-        return TimerSnapshot(
-            total_seconds=total,
-            remaining_seconds=remaining_seconds,
-            elapsed_seconds=elapsed_seconds,
-            progress=max(0.0, min(1.0, progress)),
-            state=self._state,
-            is_focus=is_focus,
-            completed_focus_sessions=self._completed_focus_sessions,
-        )
+        snapshot.total_seconds = total
+        snapshot.remaining_seconds = max(0, total - elapsed_seconds)
+        snapshot.elapsed_seconds = elapsed_seconds
+        snapshot.progress = max(0.0, min(1.0, progress))
+        snapshot.state = self._state
+        snapshot.is_focus = self._state in FOCUS_VIEW_STATES
+        snapshot.completed_focus_sessions = self._completed_focus_sessions
 
     def _start_phase(self, state: TimerState, total_seconds: int, started_at_monotonic: float) -> None:
         self._state = state
         self._phase_total_sec = float(total_seconds)
         self._phase_elapsed_before_pause_sec = 0.0
         self._phase_started_monotonic = started_at_monotonic
+        self._phase_origin_monotonic = started_at_monotonic
+
+    @staticmethod
+    def _auto_phase_start(boundary: float, index: int, cycle_sec: float, first_sec: float) -> float:
+        """Начало `index`-й фазы после границы; считается от границы, без накопления ошибки."""
+        return boundary + ((index - 1) // 2) * cycle_sec + (0.0 if index % 2 else first_sec)
+
+    def _elapsed_since_start(self, now: float) -> float:
+        """Прошедшее время фазы без ограничения ее длительностью."""
+        elapsed = self._phase_elapsed_before_pause_sec
+        if self._phase_started_monotonic is not None:
+            elapsed += max(0.0, now - self._phase_started_monotonic)
+        return elapsed
 
     def _current_elapsed(self, now: float) -> float:
         elapsed = self._phase_elapsed_before_pause_sec
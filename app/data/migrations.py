@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+"""Упорядоченные миграции схемы SQLite.
+
+Каждая миграция идемпотентна: `apply` выполняется в одной транзакции,
+а необязательный `backfill` вызывается пакетами (каждый пакет — своя
+транзакция), пока не вернет 0. Версия схемы повышается только после
+завершения заполнения, поэтому прерванная миграция продолжится при
+следующем запуске.
+"""
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+
+BACKFILL_BATCH_SIZE = 500
+TASK_SORT_GAP = 1024
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    backfill: Callable[[sqlite3.Connection], int] | None = None
+
+
+def session_time_columns(started_at: str) -> tuple[int, str]:
+    """Возвращает UTC epoch и локальный день (`YYYY-MM-DD`) для локального ISO-времени."""
+    try:
+        return int(datetime.fromisoformat(started_at).timestamp()), started_at[:10]
+    except (TypeError, ValueError):
+        return 0, str(started_at or "")[:10]
+
+
+def _column_names(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _create_base_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sessions(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TEXT,
+            duration_sec INTEGER,
+            theme TEXT,
+            success INTEGER,
+            coins_earned INTEGER
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tasks(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            is_done INTEGER NOT NULL DEFAULT 0,
+            sort_order INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS inventory(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            type TEXT NOT NULL,
+            code TEXT NOT NULL,
+            is_unlocked INTEGER NOT NULL DEFAULT 0,
+            unlocked_at TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings(
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS session_tasks(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id INTEGER NOT NULL,
+            task_title TEXT NOT NULL,
+            is_done INTEGER NOT NULL DEFAULT 0,
+            sort_order INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY(session_id) REFERENCES sessions(id) ON DELETE CASCADE
+        )
+        """
+    )
+
+
+def _create_coin_ledger(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS coin_ledger(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            amount INTEGER NOT NULL,
+            reason TEXT NOT NULL DEFAULT '',
+            session_id INTEGER,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY(session_id) REFERENCES sessions(id) ON DELETE SET NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS coin_balance(
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            balance INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    # Однократный перенос баланса из `settings.coins_balance` в журнал монет.
+    if conn.execute("SELECT 1 FROM coin_balance WHERE id = 1").fetchone():
+        return
+    row = conn.execute("SELECT value FROM settings WHERE key = 'coins_balance'").fetchone()
+    try:
+        legacy_balance = max(0, int(json.loads(row[0]) or 0)) if row else 0
+    except (TypeError, ValueError):
+        legacy_balance = 0
+    conn.execute("INSERT INTO coin_balance(id, balance) VALUES (1, ?)", (legacy_balance,))
+    if legacy_balance:
+        conn.execute(
+            "INSERT INTO coin_ledger(amount, reason, session_id, created_at) VALUES (?, 'legacy_import', NULL, ?)",
+            (legacy_balance, datetime.now().isoformat(timespec="seconds")),
+        )
+    conn.execute("DELETE FROM settings WHERE key = 'coins_balance'")
+
+
+def _create_daily_stats(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_stats(
+            day TEXT PRIMARY KEY,
+            successes INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0,
+            focus_seconds INTEGER NOT NULL DEFAULT 0,
+            coins INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """
+    )
+    if conn.execute("SELECT 1 FROM daily_stats LIMIT 1").fetchone():
+        return
+    conn.execute(
+        """
+        INSERT INTO daily_stats(day, successes, failures, focus_seconds, coins)
+        SELECT substr(started_at, 1, 10),
+               SUM(success != 0),
+               SUM(success = 0),
+               COALESCE(SUM(duration_sec), 0),
+               COALESCE(SUM(coins_earned), 0)
+        FROM sessions
+        GROUP BY substr(started_at, 1, 10)
+        """
+    )
+
+
+def _add_session_time_columns(conn: sqlite3.Connection) -> None:
+    columns = _column_names(conn, "sessions")
+    if "started_at_epoch" not in columns:
+        conn.execute("ALTER TABLE sessions ADD COLUMN started_at_epoch INTEGER")
+    if "local_day" not in columns:
+        conn.execute("ALTER TABLE sessions ADD COLUMN local_day TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_started_at_epoch ON sessions(started_at_epoch)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_local_day ON sessions(local_day)")
+
+
+def _backfill_session_time_columns(conn: sqlite3.Connection) -> int:
+    rows = conn.execute(
+        "SELECT id, started_at FROM sessions WHERE started_at_epoch IS NULL ORDER BY id LIMIT ?",
+        (BACKFILL_BATCH_SIZE,),
+    ).fetchall()
+    conn.executemany(
+        "UPDATE sessions SET started_at_epoch = ?, local_day = ? WHERE id = ?",
+        [(*session_time_columns(row[1]), row[0]) for row in rows],
+    )
+    return len(rows)
+
+
+def _index_task_order(conn: sqlite3.Connection) -> None:
+    """Переводит `sort_order` задач на ключи с шагом `TASK_SORT_GAP` и индексирует их."""
+    rows = conn.execute("SELECT id FROM tasks ORDER BY sort_order ASC, created_at ASC, id ASC").fetchall()
+    conn.executemany(
+        "UPDATE tasks SET sort_order = ? WHERE id = ?",
+        [((position + 1) * TASK_SORT_GAP, row[0]) for position, row in enumerate(rows)],
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_done_sort_order ON tasks(is_done, sort_order, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_sort_order ON tasks(sort_order, id)")
+
+
+def _create_active_session(conn: sqlite3.Connection) -> None:
+    # Единственная строка (id = 1) с контрольной точкой идущей сессии; пишется только на переходах таймера.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS active_session(
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            started_at TEXT NOT NULL,
+            theme TEXT NOT NULL,
+            state TEXT NOT NULL,
+            focus_seconds INTEGER NOT NULL,
+            break_seconds INTEGER NOT NULL,
+            auto_cycle INTEGER NOT NULL DEFAULT 0,
+            phase_total_sec REAL NOT NULL,
+            phase_elapsed_sec REAL NOT NULL,
+            phase_age_sec REAL NOT NULL,
+            completed_focus_sessions INTEGER NOT NULL DEFAULT 0,
+            saved_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+def _create_task_count(conn: sqlite3.Connection) -> None:
+    # Кэш числа задач (id = 1): проверка лимита бэклога не сканирует таблицу. Триггеры держат его точным.
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS task_count(
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            count INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO task_count(id, count) VALUES (1, (SELECT COUNT(*) FROM tasks))
+        ON CONFLICT(id) DO UPDATE SET count = excluded.count
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_count_insert AFTER INSERT ON tasks
+        BEGIN UPDATE task_count SET count = count + 1 WHERE id = 1; END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_count_delete AFTER DELETE ON tasks
+        BEGIN UPDATE task_count SET count = count - 1 WHERE id = 1; END
+        """
+    )
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "base schema", _create_base_schema),
+    Migration(2, "coin ledger with cached balance", _create_coin_ledger),
+    Migration(3, "daily statistics aggregates", _create_daily_stats),
+    Migration(
+        4,
+        "indexed UTC epoch and local day columns for sessions",
+        _add_session_time_columns,
+        _backfill_session_time_columns,
+    ),
+    Migration(5, "gap-based task sort keys with indexes", _index_task_order),
+    Migration(6, "active session checkpoint", _create_active_session),
+    Migration(7, "cached task count", _create_task_count),
+)
+SCHEMA_VERSION = MIGRATIONS[-1].version
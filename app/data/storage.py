@@ -3,16 +3,40 @@ from __future__ import annotations
 """SQLite-слой хранения с CRUD-операциями сессий, задач и настроек."""
 
 import json
+import logging
+import queue
 import sqlite3
+import threading
+from concurrent.futures import Future
 from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Iterator
+from typing import Any, Callable, Iterator
+
+from app.core.clock import SYSTEM_CLOCK, Clock
+from app.core.timer import TimerCheckpoint, TimerState
+from app.data.migrations import (  # noqa: F401 - SCHEMA_VERSION re-export
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    TASK_SORT_GAP,
+    session_time_columns,
+)
 
 
-SCHEMA_VERSION = 1
 MAX_TASKS = 5
+BACKLOG_TASK_LIMIT = 10_000
+MAX_IDLE_READERS = 4
+WRITE_BEHIND_BATCH_SIZE = 64
+SESSIONS_PAGE_SIZE = 200
+DEFAULT_DB_NAME = "app.db"
+
+logger = logging.getLogger(__name__)
+
+
+def default_db_path() -> Path:
+    """Возвращает стандартный путь к SQLite-файлу в текущей директории."""
+    return Path.cwd() / DEFAULT_DB_NAME
 
 
 @dataclass(frozen=True)
@@ -34,6 +58,84 @@ class TaskRow:
     created_at: str
 
 
+@dataclass(frozen=True)
+class DailyStatsRow:
+    """Агрегаты сессий за один локальный день (`YYYY-MM-DD`)."""
+    day: str
+    successes: int = 0
+    failures: int = 0
+    focus_seconds: int = 0
+    coins: int = 0
+
+
+@dataclass(frozen=True)
+class StatsSummary:
+    today: DailyStatsRow
+    streak_days: int
+
+
+@dataclass(frozen=True)
+class CoinEntry:
+    """Запрос на начисление (amount > 0) или списание (amount < 0) монет."""
+    amount: int
+    reason: str = ""
+    session_id: int | None = None
+
+
+@dataclass(frozen=True)
+class SessionResult:
+    """Результат завершенной сессии для пакетной записи `record_session_results`."""
+    started_at: str
+    duration_sec: int
+    theme: str
+    success: bool
+    coins_earned: int = 0
+
+
+@dataclass(frozen=True)
+class ActiveSessionRow:
+    """Контрольная точка идущей сессии: фаза таймера без монотонных отметок."""
+    started_at: str
+    theme: str
+    state: str
+    focus_seconds: int
+    break_seconds: int
+    auto_cycle: bool
+    phase_total_sec: float
+    phase_elapsed_sec: float
+    phase_age_sec: float
+    completed_focus_sessions: int
+    saved_at: str
+
+
+def checkpoint_from_row(row: ActiveSessionRow, now: datetime) -> tuple[TimerCheckpoint, float]:
+    """Переводит строку `active_session` в контрольную точку таймера и время простоя в секундах."""
+    checkpoint = TimerCheckpoint(
+        state=TimerState(row.state),
+        focus_seconds=row.focus_seconds,
+        break_seconds=row.break_seconds,
+        auto_cycle=row.auto_cycle,
+        phase_total_sec=row.phase_total_sec,
+        phase_elapsed_sec=row.phase_elapsed_sec,
+        phase_age_sec=row.phase_age_sec,
+        completed_focus_sessions=row.completed_focus_sessions,
+    )
+    try:
+        offline_sec = max(0.0, (now - datetime.fromisoformat(row.saved_at)).total_seconds())
+    except ValueError:
+        offline_sec = float("inf")
+    return checkpoint, offline_sec
+
+
+@dataclass(frozen=True)
+class CoinLedgerRow:
+    id: int
+    amount: int
+    reason: str
+    session_id: int | None
+    created_at: str
+
+
 @dataclass(frozen=True)
 class InventoryRow:
     id: int
@@ -43,14 +145,134 @@ class InventoryRow:
     unlocked_at: str | None
 
 
+@dataclass
+class _PendingWrite:
+    fn: Callable[..., Any]
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+    future: Future
+
+
+class _WriteBehindWorker:
+    """Фоновый поток, выполняющий очередь записей пакетными транзакциями.
+
+    Записи выполняются строго в порядке постановки. Все записи, накопившиеся
+    в очереди, объединяются в одну транзакцию (до `batch_size`), а каждая
+    отдельная запись оборачивается в SAVEPOINT: ошибка одной не откатывает
+    остальные. Future каждой записи завершается только после COMMIT пакета.
+    """
+    _STOP = object()
+
+    def __init__(self, storage: Storage, batch_size: int) -> None:
+        self._storage = storage
+        self._batch_size = batch_size
+        self._queue: queue.Queue[Any] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable[..., Any], args: tuple[Any, ...], kwargs: dict[str, Any]) -> Future:
+        future: Future = Future()
+        self._queue.put(_PendingWrite(fn, args, kwargs, future))
+        return future
+
+    def stop(self) -> None:
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            batch = [item]
+            stop_requested = False
+            while len(batch) < self._batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop_requested = True
+                    break
+                batch.append(item)
+            self._execute(batch)
+            if stop_requested:
+                return
+
+    def _execute(self, batch: list[_PendingWrite]) -> None:
+        outcomes: list[tuple[_PendingWrite, Any, BaseException | None]] = []
+        try:
+            with self._storage._transaction():
+                for pending in batch:
+                    if not pending.future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with self._storage._transaction():
+                            result = pending.fn(*pending.args, **pending.kwargs)
+                    except Exception as exc:
+                        outcomes.append((pending, None, exc))
+                    else:
+                        outcomes.append((pending, result, None))
+        except Exception as exc:
+            logger.exception("Write-behind batch of %d operations failed to commit", len(batch))
+            for pending in batch:
+                if not pending.future.cancelled():
+                    pending.future.set_exception(exc)
+            return
+        for pending, result, error in outcomes:
+            if error is not None:
+                pending.future.set_exception(error)
+            else:
+                pending.future.set_result(result)
+
+
 class Storage:
-    """Инкапсулирует подключение к SQLite и транзакционные операции."""
-    def __init__(self, db_path: str | Path) -> None:
+    """Инкапсулирует подключение к SQLite и транзакционные операции.
+
+    Хранилище владеет долгоживущими соединениями: одним writer-соединением
+    для всех транзакций и пулом переиспользуемых reader-соединений. PRAGMA
+    применяются один раз при открытии соединения, а `close()` освобождает все.
+
+    Опционально (`start_write_behind`) записи через `submit` уходят в фоновый
+    поток, чтобы UI-поток не ждал COMMIT и fsync.
+    """
+    def __init__(
+        self,
+        db_path: str | Path,
+        max_idle_readers: int = MAX_IDLE_READERS,
+        task_limit: int | None = MAX_TASKS,
+        clock: Clock | None = None,
+        read_only: bool = False,
+    ) -> None:
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.clock = clock or SYSTEM_CLOCK
+        self.task_limit = task_limit
+        self.read_only = read_only
+        if not read_only:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._max_idle_readers = max_idle_readers
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = threading.RLock()
+        self._idle_readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._transaction_depth = 0
+        self._write_behind: _WriteBehindWorker | None = None
+
+    def __enter__(self) -> Storage:
+        return self
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self.close()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
+        """Открывает новое соединение и настраивает его PRAGMA (один раз на соединение)."""
+        if self.read_only:
+            # `mode=ro`: файл не создается, журнал не переключается, любая запись падает.
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            return conn
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON;")
         try:
@@ -61,102 +283,242 @@ class Storage:
 
     @contextmanager
     def _transaction(self) -> Iterator[sqlite3.Connection]:
-        conn = self._connect()
+        """Открывает транзакцию на writer-соединении; вложенные вызовы становятся SAVEPOINT."""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            depth = self._transaction_depth
+            savepoint = f"sp_{depth}"
+            conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+            self._transaction_depth += 1
+            try:
+                yield conn
+            except BaseException:
+                self._transaction_depth -= 1
+                if depth == 0:
+                    conn.execute("ROLLBACK")
+                else:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                raise
+            self._transaction_depth -= 1
+            conn.execute("COMMIT" if depth == 0 else f"RELEASE {savepoint}")
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """Выдает reader-соединение из пула и возвращает его обратно после запроса."""
+        with self._readers_lock:
+            conn = self._idle_readers.pop() if self._idle_readers else None
+        if conn is None:
+            conn = self._connect()
         try:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
         finally:
+            with self._readers_lock:
+                if len(self._idle_readers) < self._max_idle_readers:
+                    self._idle_readers.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    @property
+    def write_behind_enabled(self) -> bool:
+        return self._write_behind is not None
+
+    def start_write_behind(self, batch_size: int = WRITE_BEHIND_BATCH_SIZE) -> None:
+        """Включает фоновый поток записи для операций, отправленных через `submit`."""
+        if self._write_behind is None:
+            self._write_behind = _WriteBehindWorker(self, batch_size)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Ставит запись в очередь и возвращает Future с ее результатом.
+
+        `fn` — обычно метод этого же `Storage`; внутри пакетной транзакции
+        его собственная транзакция выполняется как SAVEPOINT. Без включенного
+        write-behind операция выполняется сразу, а Future уже завершен.
+        """
+        if self._write_behind is not None:
+            return self._write_behind.submit(fn, args, kwargs)
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Дожидается фиксации всех записей, поставленных в очередь до вызова."""
+        if self._write_behind is not None:
+            self._write_behind.submit(lambda: None, (), {}).result(timeout)
+
+    def close(self) -> None:
+        """Сбрасывает очередь записи и закрывает все соединения; следующий запрос откроет их заново."""
+        if self._write_behind is not None:
+            self._write_behind.stop()
+            self._write_behind = None
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._readers_lock:
+            readers, self._idle_readers = self._idle_readers, []
+        for conn in readers:
             conn.close()
 
     def init_db(self) -> None:
-        """Создает все таблицы приложения при первом запуске."""
+        """Создает схему и последовательно применяет недостающие миграции."""
         with self._transaction() as conn:
             conn.execute("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+            if not conn.execute("SELECT version FROM schema_version LIMIT 1").fetchone():
+                conn.execute("INSERT INTO schema_version(version) VALUES (0)")
+        current = self.schema_version()
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            with self._transaction() as conn:
+                migration.apply(conn)
+                if migration.backfill is None:
+                    conn.execute("UPDATE schema_version SET version = ?", (migration.version,))
+            if migration.backfill is None:
+                continue
+            while True:
+                with self._transaction() as conn:
+                    if migration.backfill(conn) == 0:
+                        conn.execute("UPDATE schema_version SET version = ?", (migration.version,))
+                        break
+
+    def schema_version(self) -> int:
+        with self._read() as conn:
             row = conn.execute("SELECT version FROM schema_version LIMIT 1").fetchone()
-            if not row:
-                conn.execute("INSERT INTO schema_version(version) VALUES (?)", (SCHEMA_VERSION,))
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS sessions(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    started_at TEXT,
-                    duration_sec INTEGER,
-                    theme TEXT,
-                    success INTEGER,
-                    coins_earned INTEGER
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS tasks(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    is_done INTEGER NOT NULL DEFAULT 0,
-                    sort_order INTEGER NOT NULL DEFAULT 0,
-                    created_at TEXT NOT NULL
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS inventory(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    type TEXT NOT NULL,
-                    code TEXT NOT NULL,
-                    is_unlocked INTEGER NOT NULL DEFAULT 0,
-                    unlocked_at TEXT
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS settings(
-                    key TEXT PRIMARY KEY,
-                    value TEXT
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS session_tasks(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id INTEGER NOT NULL,
-                    task_title TEXT NOT NULL,
-                    is_done INTEGER NOT NULL DEFAULT 0,
-                    sort_order INTEGER NOT NULL DEFAULT 0,
-                    FOREIGN KEY(session_id) REFERENCES sessions(id) ON DELETE CASCADE
-                )
-                """
-            )
+        return int(row["version"]) if row else 0
 
     def get_setting(self, key: str, default: Any = None) -> Any:
-        with self._connect() as conn:
+        with self._read() as conn:
             row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
         if not row:
             return default
-        raw = row["value"]
+        return self._decode_setting(row["value"])
+
+    def get_settings(self, prefix: str) -> dict[str, Any]:
+        """Возвращает все настройки с ключом, начинающимся с `prefix` (без префикса)."""
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT key, value FROM settings WHERE key >= ? AND key < ?",
+                (prefix, prefix + "\uffff"),
+            ).fetchall()
+        return {row["key"][len(prefix):]: self._decode_setting(row["value"]) for row in rows}
+
+    def set_setting(self, key: str, value: Any) -> None:
+        self.set_settings({key: value})
+
+    def set_settings(self, values: dict[str, Any]) -> None:
+        """Сохраняет несколько настроек одной транзакцией."""
+        if not values:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                [(key, json.dumps(value)) for key, value in values.items()],
+            )
+
+    def delete_setting(self, key: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM settings WHERE key = ?", (key,))
+
+    @staticmethod
+    def _decode_setting(raw: Any) -> Any:
         try:
             return json.loads(raw)
         except (TypeError, json.JSONDecodeError):
             return raw
 
-    def set_setting(self, key: str, value: Any) -> None:
-        payload = json.dumps(value)
+    def get_coins_balance(self) -> int:
+        """Возвращает кэшированный баланс монет за O(1)."""
+        with self._read() as conn:
+            row = conn.execute("SELECT balance FROM coin_balance WHERE id = 1").fetchone()
+        return int(row["balance"]) if row else 0
+
+    def set_coins_balance(self, value: int) -> None:
+        """Приводит баланс к `value` корректирующей записью в журнале."""
+        with self._transaction() as conn:
+            current = self._read_coin_balance(conn)
+            self._append_coin_entries(conn, [CoinEntry(max(0, int(value)) - current, reason="adjustment")])
+
+    def add_coins(self, amount: int, reason: str = "", session_id: int | None = None) -> int:
+        """Начисляет или списывает монеты и возвращает новый баланс."""
+        return self.apply_coin_entries([CoinEntry(amount, reason, session_id)])
+
+    def apply_coin_entries(self, entries: list[CoinEntry]) -> int:
+        """Применяет пакет начислений/списаний одной транзакцией и возвращает баланс.
+
+        Списание, уводящее баланс ниже нуля, урезается до доступной суммы:
+        в журнал пишется фактически примененная сумма.
+        """
         with self._transaction() as conn:
+            return self._append_coin_entries(conn, entries)
+
+    def list_coin_ledger(self, limit: int = 100) -> list[CoinLedgerRow]:
+        """Возвращает последние записи журнала монет (новые первыми)."""
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT id, amount, reason, session_id, created_at FROM coin_ledger ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            CoinLedgerRow(
+                id=row["id"],
+                amount=row["amount"],
+                reason=row["reason"],
+                session_id=row["session_id"],
+                created_at=row["created_at"],
+            )
+            for row in rows
+        ]
+
+    def verify_coin_balance(self, repair: bool = True) -> bool:
+        """Сверяет кэшированный баланс с суммой журнала; при расхождении пересчитывает его."""
+        with self._read() as conn:
+            ledger_total = int(conn.execute("SELECT COALESCE(SUM(amount), 0) AS total FROM coin_ledger").fetchone()["total"])
+        consistent = ledger_total == self.get_coins_balance()
+        if not consistent and repair:
+            self.rebuild_coin_balance()
+        return consistent
+
+    def rebuild_coin_balance(self) -> int:
+        """Пересчитывает кэшированный баланс по журналу монет."""
+        with self._transaction() as conn:
+            total = int(conn.execute("SELECT COALESCE(SUM(amount), 0) AS total FROM coin_ledger").fetchone()["total"])
             conn.execute(
-                "INSERT INTO settings(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
-                (key, payload),
+                "INSERT INTO coin_balance(id, balance) VALUES (1, ?) ON CONFLICT(id) DO UPDATE SET balance=excluded.balance",
+                (total,),
             )
+        return total
 
-    def get_coins_balance(self) -> int:
-        return int(self.get_setting("coins_balance", 0) or 0)
+    def _read_coin_balance(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT balance FROM coin_balance WHERE id = 1").fetchone()
+        return int(row["balance"]) if row else 0
 
-    def set_coins_balance(self, value: int) -> None:
-        self.set_setting("coins_balance", int(value))
+    def _append_coin_entries(self, conn: sqlite3.Connection, entries: list[CoinEntry]) -> int:
+        balance = self._read_coin_balance(conn)
+        created_at = self.clock.now().isoformat(timespec="seconds")
+        rows = []
+        for entry in entries:
+            applied = max(-balance, int(entry.amount))
+            if applied == 0:
+                continue
+            balance += applied
+            rows.append((applied, entry.reason, entry.session_id, created_at))
+        if rows:
+            conn.executemany(
+                "INSERT INTO coin_ledger(amount, reason, session_id, created_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                "INSERT INTO coin_balance(id, balance) VALUES (1, ?) ON CONFLICT(id) DO UPDATE SET balance=excluded.balance",
+                (balance,),
+            )
+        return balance
 
     def insert_session(
         self,
@@ -167,74 +529,374 @@ class Storage:
         coins_earned: int,
     ) -> int:
         with self._transaction() as conn:
-            cursor = conn.execute(
+            return self._insert_session(conn, started_at, duration_sec, theme, success, coins_earned)
+
+    def record_session_result(
+        self,
+        started_at: str,
+        duration_sec: int,
+        theme: str,
+        success: bool,
+        coins_earned: int,
+        tasks: list[TaskRow],
+        close_active: bool = False,
+    ) -> int:
+        """Атомарно пишет сессию, snapshot задач и начисление монет одной транзакцией.
+
+        Для неуспешной сессии монеты не начисляются и snapshot не сохраняется.
+        """
+        result = SessionResult(started_at, duration_sec, theme, success, coins_earned)
+        return self.record_session_results([result], tasks, close_active=close_active)[0]
+
+    def record_session_results(
+        self,
+        results: list[SessionResult],
+        tasks: list[TaskRow],
+        close_active: bool = False,
+    ) -> list[int]:
+        """Пишет несколько сессий (например, догнанные после сна циклы) одной транзакцией.
+
+        Каждой успешной сессии сохраняется snapshot `tasks` и своя запись
+        в журнале монет. С `close_active=True` в той же транзакции удаляется
+        контрольная точка активной сессии. Возвращает id сессий в порядке `results`.
+        """
+        session_ids: list[int] = []
+        coin_entries: list[CoinEntry] = []
+        with self._transaction() as conn:
+            for result in results:
+                coins = result.coins_earned if result.success else 0
+                session_id = self._insert_session(
+                    conn, result.started_at, result.duration_sec, result.theme, result.success, coins
+                )
+                session_ids.append(session_id)
+                if result.success:
+                    self._insert_session_tasks(conn, session_id, tasks)
+                if coins:
+                    coin_entries.append(CoinEntry(coins, reason="session_success", session_id=session_id))
+            if coin_entries:
+                self._append_coin_entries(conn, coin_entries)
+            if close_active:
+                conn.execute("DELETE FROM active_session WHERE id = 1")
+        return session_ids
+
+    def _insert_session(
+        self,
+        conn: sqlite3.Connection,
+        started_at: str,
+        duration_sec: int,
+        theme: str,
+        success: bool,
+        coins_earned: int,
+    ) -> int:
+        started_at_epoch, local_day = session_time_columns(started_at)
+        cursor = conn.execute(
+            """
+            INSERT INTO sessions(started_at, duration_sec, theme, success, coins_earned, started_at_epoch, local_day)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (started_at, duration_sec, theme, int(success), coins_earned, started_at_epoch, local_day),
+        )
+        conn.execute(
+            """
+            INSERT INTO daily_stats(day, successes, failures, focus_seconds, coins)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET
+                successes = successes + excluded.successes,
+                failures = failures + excluded.failures,
+                focus_seconds = focus_seconds + excluded.focus_seconds,
+                coins = coins + excluded.coins
+            """,
+            (local_day, int(success), int(not success), duration_sec, coins_earned),
+        )
+        return int(cursor.lastrowid)
+
+    def save_active_session(self, row: ActiveSessionRow) -> None:
+        """Перезаписывает контрольную точку активной сессии (одна строка)."""
+        with self._transaction() as conn:
+            conn.execute(
                 """
-                INSERT INTO sessions(started_at, duration_sec, theme, success, coins_earned)
-                VALUES (?, ?, ?, ?, ?)
+                INSERT OR REPLACE INTO active_session(
+                    id, started_at, theme, state, focus_seconds, break_seconds, auto_cycle,
+                    phase_total_sec, phase_elapsed_sec, phase_age_sec, completed_focus_sessions, saved_at
+                )
+                VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (started_at, duration_sec, theme, int(success), coins_earned),
+                (
+                    row.started_at,
+                    row.theme,
+                    row.state,
+                    row.focus_seconds,
+                    row.break_seconds,
+                    int(row.auto_cycle),
+                    row.phase_total_sec,
+                    row.phase_elapsed_sec,
+                    row.phase_age_sec,
+                    row.completed_focus_sessions,
+                    row.saved_at,
+                ),
             )
-            return int(cursor.lastrowid)
+
+    def load_active_session(self) -> ActiveSessionRow | None:
+        with self._read() as conn:
+            row = conn.execute(
+                """
+                SELECT started_at, theme, state, focus_seconds, break_seconds, auto_cycle,
+                       phase_total_sec, phase_elapsed_sec, phase_age_sec, completed_focus_sessions, saved_at
+                FROM active_session
+                WHERE id = 1
+                """
+            ).fetchone()
+        if row is None:
+            return None
+        return ActiveSessionRow(
+            started_at=row["started_at"],
+            theme=row["theme"],
+            state=row["state"],
+            focus_seconds=int(row["focus_seconds"]),
+            break_seconds=int(row["break_seconds"]),
+            auto_cycle=bool(row["auto_cycle"]),
+            phase_total_sec=float(row["phase_total_sec"]),
+            phase_elapsed_sec=float(row["phase_elapsed_sec"]),
+            phase_age_sec=float(row["phase_age_sec"]),
+            completed_focus_sessions=int(row["completed_focus_sessions"]),
+            saved_at=row["saved_at"],
+        )
+
+    def clear_active_session(self) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM active_session WHERE id = 1")
+
+    def get_daily_stats(self, day: date) -> DailyStatsRow:
+        """Возвращает агрегаты за день; пустые дни дают нулевую строку."""
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT day, successes, failures, focus_seconds, coins FROM daily_stats WHERE day = ?",
+                (day.isoformat(),),
+            ).fetchone()
+        return self._daily_stats_row(row) if row else DailyStatsRow(day=day.isoformat())
+
+    def get_stats_summary(self, today: date) -> StatsSummary:
+        """Одним запросом возвращает агрегаты за сегодня и текущую серию успешных дней.
+
+        Серия считается рекурсивно по первичному ключу `daily_stats` от `today`
+        назад, поэтому стоимость зависит от длины серии, а не от размера истории.
+        """
+        day = today.isoformat()
+        with self._read() as conn:
+            row = conn.execute(
+                """
+                WITH RECURSIVE streak(day) AS (
+                    SELECT day FROM daily_stats WHERE day = :today AND successes > 0
+                    UNION ALL
+                    SELECT prev.day FROM streak
+                    JOIN daily_stats AS prev ON prev.day = date(streak.day, '-1 day') AND prev.successes > 0
+                )
+                SELECT :today AS day,
+                       COALESCE(d.successes, 0) AS successes,
+                       COALESCE(d.failures, 0) AS failures,
+                       COALESCE(d.focus_seconds, 0) AS focus_seconds,
+                       COALESCE(d.coins, 0) AS coins,
+                       (SELECT COUNT(*) FROM streak) AS streak_days
+                FROM (SELECT 1) LEFT JOIN daily_stats AS d ON d.day = :today
+                """,
+                {"today": day},
+            ).fetchone()
+        return StatsSummary(today=self._daily_stats_row(row), streak_days=int(row["streak_days"]))
+
+    @staticmethod
+    def _daily_stats_row(row: sqlite3.Row) -> DailyStatsRow:
+        return DailyStatsRow(
+            day=row["day"],
+            successes=row["successes"],
+            failures=row["failures"],
+            focus_seconds=row["focus_seconds"],
+            coins=row["coins"],
+        )
 
     def list_sessions(self, limit: int = 100) -> list[SessionRow]:
         """Возвращает последние сессии в обратном хронологическом порядке."""
-        with self._connect() as conn:
+        return self.list_sessions_page(limit=limit)
+
+    def list_sessions_page(
+        self,
+        before_id: int | None = None,
+        limit: int = SESSIONS_PAGE_SIZE,
+        theme: str | None = None,
+        success: bool | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[SessionRow]:
+        """Возвращает одну страницу истории (новые первыми) с keyset-пагинацией по `id`.
+
+        Следующая страница запрашивается с `before_id` = id последней строки;
+        `start`/`end` ограничивают время начала полуинтервалом `[start, end)`.
+        """
+        clauses: list[str] = []
+        params: list[Any] = []
+        if before_id is not None:
+            clauses.append("id < ?")
+            params.append(before_id)
+        if theme is not None:
+            clauses.append("theme = ?")
+            params.append(theme)
+        if success is not None:
+            clauses.append("success = ?")
+            params.append(int(success))
+        if start is not None:
+            clauses.append("started_at_epoch >= ?")
+            params.append(int(start.timestamp()))
+        if end is not None:
+            clauses.append("started_at_epoch < ?")
+            params.append(int(end.timestamp()))
+        query = "SELECT id, started_at, duration_sec, theme, success, coins_earned FROM sessions"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._read() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self._session_row(row) for row in rows]
+
+    def iter_sessions(
+        self,
+        before_id: int | None = None,
+        page_size: int = SESSIONS_PAGE_SIZE,
+        theme: str | None = None,
+        success: bool | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Iterator[SessionRow]:
+        """Потоково отдает историю сессий страницами, удерживая в памяти одну страницу.
+
+        Между страницами reader-соединение возвращается в пул, поэтому долгий
+        обход не держит открытую транзакцию чтения.
+        """
+        while True:
+            page = self.list_sessions_page(before_id, page_size, theme, success, start, end)
+            yield from page
+            if len(page) < page_size:
+                return
+            before_id = page[-1].id
+
+    def list_sessions_between(self, start: datetime, end: datetime) -> list[SessionRow]:
+        """Возвращает сессии, начатые в полуинтервале `[start, end)`, по индексу epoch-времени.
+
+        Наивные `datetime` трактуются как локальное время.
+        """
+        with self._read() as conn:
             rows = conn.execute(
-                "SELECT id, started_at, duration_sec, theme, success, coins_earned FROM sessions ORDER BY id DESC LIMIT ?",
-                (limit,),
+                """
+                SELECT id, started_at, duration_sec, theme, success, coins_earned FROM sessions
+                WHERE started_at_epoch >= ? AND started_at_epoch < ?
+                ORDER BY started_at_epoch ASC, id ASC
+                """,
+                (int(start.timestamp()), int(end.timestamp())),
             ).fetchall()
-        return [
-            SessionRow(
-                id=row["id"],
-                started_at=row["started_at"],
-                duration_sec=row["duration_sec"],
-                theme=row["theme"],
-                success=bool(row["success"]),
-                coins_earned=row["coins_earned"],
-            )
-            for row in rows
-        ]
+        return [self._session_row(row) for row in rows]
+
+    def list_sessions_on_day(self, day: date) -> list[SessionRow]:
+        """Возвращает сессии локального дня `day` по индексу `local_day`."""
+        with self._read() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, started_at, duration_sec, theme, success, coins_earned FROM sessions
+                WHERE local_day = ? ORDER BY id ASC
+                """,
+                (day.isoformat(),),
+            ).fetchall()
+        return [self._session_row(row) for row in rows]
 
-    def list_tasks(self, limit: int = MAX_TASKS, include_done: bool = True) -> list[TaskRow]:
-        """Возвращает задачи с сортировкой по ручному порядку."""
+    @staticmethod
+    def _session_row(row: sqlite3.Row) -> SessionRow:
+        return SessionRow(
+            id=row["id"],
+            started_at=row["started_at"],
+            duration_sec=row["duration_sec"],
+            theme=row["theme"],
+            success=bool(row["success"]),
+            coins_earned=row["coins_earned"],
+        )
+
+    def list_tasks(
+        self,
+        limit: int = MAX_TASKS,
+        include_done: bool = True,
+        after: TaskRow | None = None,
+    ) -> list[TaskRow]:
+        """Возвращает страницу задач в ручном порядке.
+
+        Пагинация keyset-ная: следующая страница запрашивается с `after` =
+        последней задачей предыдущей страницы.
+        """
+        clauses: list[str] = []
+        params: list[Any] = []
+        if not include_done:
+            clauses.append("is_done = 0")
+        if after is not None:
+            clauses.append("(sort_order, id) > (?, ?)")
+            params.extend((after.sort_order, after.id))
         query = "SELECT id, title, is_done, sort_order, created_at FROM tasks"
-        params: tuple[Any, ...]
-        if include_done:
-            query += " ORDER BY sort_order ASC, created_at ASC LIMIT ?"
-            params = (limit,)
-        else:
-            query += " WHERE is_done = 0 ORDER BY sort_order ASC, created_at ASC LIMIT ?"
-            params = (limit,)
-        with self._connect() as conn:
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY sort_order ASC, id ASC LIMIT ?"
+        params.append(limit)
+        with self._read() as conn:
             rows = conn.execute(query, params).fetchall()
-        return [
-            TaskRow(
-                id=row["id"],
-                title=row["title"],
-                is_done=bool(row["is_done"]),
-                sort_order=row["sort_order"],
-                created_at=row["created_at"],
-            )
-            for row in rows
-        ]
+        return [self._task_row(row) for row in rows]
+
+    def count_tasks(self) -> int:
+        with self._read() as conn:
+            return self._read_task_count(conn)
+
+    def get_task(self, task_id: int) -> TaskRow | None:
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT id, title, is_done, sort_order, created_at FROM tasks WHERE id = ?",
+                (task_id,),
+            ).fetchone()
+        return self._task_row(row) if row else None
+
+    @staticmethod
+    def _task_row(row: sqlite3.Row) -> TaskRow:
+        return TaskRow(
+            id=row["id"],
+            title=row["title"],
+            is_done=bool(row["is_done"]),
+            sort_order=row["sort_order"],
+            created_at=row["created_at"],
+        )
 
     def create_task(self, title: str) -> int:
+        """Добавляет задачу в конец списка; лимит `task_limit` (None — без лимита)."""
         clean_title = title.strip()
         if not clean_title:
             raise ValueError("Task title cannot be empty")
         with self._transaction() as conn:
-            count = conn.execute("SELECT COUNT(*) AS cnt FROM tasks").fetchone()["cnt"]
-            if count >= MAX_TASKS:
+            if self.task_limit is not None and self._read_task_count(conn) >= self.task_limit:
                 raise ValueError("Task limit reached")
-            next_order_row = conn.execute("SELECT COALESCE(MAX(sort_order), -1) + 1 AS next_order FROM tasks").fetchone()
-            next_order = int(next_order_row["next_order"])
-            created_at = datetime.now().isoformat(timespec="seconds")
+            next_order = self._max_sort_order(conn) + TASK_SORT_GAP
+            created_at = self.clock.now().isoformat(timespec="seconds")
             cursor = conn.execute(
                 "INSERT INTO tasks(title, is_done, sort_order, created_at) VALUES (?, 0, ?, ?)",
                 (clean_title, next_order, created_at),
             )
             return int(cursor.lastrowid)
 
+    def move_task(self, task_id: int, after_id: int | None) -> int:
+        """Ставит задачу сразу после `after_id` (None — в начало), обновляя одну строку.
+
+        Новый ключ берется посередине между соседями; только если промежуток
+        исчерпан, ключи всех задач перераспределяются с шагом `TASK_SORT_GAP`.
+        Возвращает записанный ключ задачи.
+        """
+        with self._transaction() as conn:
+            key = self._sort_key_after(conn, task_id, after_id)
+            if key is None:
+                self._respace_tasks(conn)
+                key = self._sort_key_after(conn, task_id, after_id)
+            conn.execute("UPDATE tasks SET sort_order = ? WHERE id = ?", (key, task_id))
+        return key
+
     def delete_task(self, task_id: int) -> None:
         with self._transaction() as conn:
             conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
@@ -244,20 +906,79 @@ class Storage:
             conn.execute("UPDATE tasks SET is_done = ? WHERE id = ?", (int(is_done), task_id))
 
     def reorder_tasks(self, task_ids_in_order: list[int]) -> None:
+        """Переставляет перечисленные задачи между их же текущими ключами сортировки.
+
+        Позиция остальных задач бэклога относительно этой группы не меняется.
+        """
+        if not task_ids_in_order:
+            return
+        placeholders = ", ".join("?" for _ in task_ids_in_order)
+        query = f"SELECT id, sort_order FROM tasks WHERE id IN ({placeholders})"
         with self._transaction() as conn:
-            for sort_order, task_id in enumerate(task_ids_in_order):
-                conn.execute("UPDATE tasks SET sort_order = ? WHERE id = ?", (sort_order, task_id))
+            current = {row["id"]: row["sort_order"] for row in conn.execute(query, task_ids_in_order)}
+            if len(set(current.values())) < len(current):
+                self._respace_tasks(conn)
+                current = {row["id"]: row["sort_order"] for row in conn.execute(query, task_ids_in_order)}
+            ordered_ids = [task_id for task_id in dict.fromkeys(task_ids_in_order) if task_id in current]
+            conn.executemany(
+                "UPDATE tasks SET sort_order = ? WHERE id = ?",
+                list(zip(sorted(current.values()), ordered_ids)),
+            )
+
+    def _read_task_count(self, conn: sqlite3.Connection) -> int:
+        """Число задач из строки-счетчика `task_count` (ее обновляют триггеры на `tasks`)."""
+        row = conn.execute("SELECT count FROM task_count WHERE id = 1").fetchone()
+        return int(row["count"]) if row else 0
+
+    def _max_sort_order(self, conn: sqlite3.Connection) -> int:
+        # Один шаг по `idx_tasks_sort_order` с конца.
+        row = conn.execute("SELECT COALESCE(MAX(sort_order), 0) AS max_order FROM tasks").fetchone()
+        return int(row["max_order"])
+
+    def _sort_key_after(self, conn: sqlite3.Connection, task_id: int, after_id: int | None) -> int | None:
+        """Ключ между `after_id` и следующей за ней задачей или None, если места нет."""
+        prev_row = None
+        if after_id is not None:
+            prev_row = conn.execute("SELECT sort_order, id FROM tasks WHERE id = ?", (after_id,)).fetchone()
+        if prev_row is None:
+            next_row = conn.execute(
+                "SELECT sort_order FROM tasks WHERE id != ? ORDER BY sort_order ASC, id ASC LIMIT 1",
+                (task_id,),
+            ).fetchone()
+            return (next_row["sort_order"] if next_row else 0) - TASK_SORT_GAP
+        next_row = conn.execute(
+            """
+            SELECT sort_order FROM tasks
+            WHERE (sort_order, id) > (?, ?) AND id != ?
+            ORDER BY sort_order ASC, id ASC LIMIT 1
+            """,
+            (prev_row["sort_order"], prev_row["id"], task_id),
+        ).fetchone()
+        if next_row is None:
+            return prev_row["sort_order"] + TASK_SORT_GAP
+        if next_row["sort_order"] - prev_row["sort_order"] < 2:
+            return None
+        return (prev_row["sort_order"] + next_row["sort_order"]) // 2
+
+    def _respace_tasks(self, conn: sqlite3.Connection) -> None:
+        rows = conn.execute("SELECT id FROM tasks ORDER BY sort_order ASC, id ASC").fetchall()
+        conn.executemany(
+            "UPDATE tasks SET sort_order = ? WHERE id = ?",
+            [((position + 1) * TASK_SORT_GAP, row["id"]) for position, row in enumerate(rows)],
+        )
 
     def insert_session_tasks_snapshot(self, session_id: int, tasks: list[TaskRow]) -> None:
         with self._transaction() as conn:
-            for sort_order, task in enumerate(tasks[:MAX_TASKS]):
-                conn.execute(
-                    """
-                    INSERT INTO session_tasks(session_id, task_title, is_done, sort_order)
-                    VALUES (?, ?, ?, ?)
-                    """,
-                    (session_id, task.title, int(task.is_done), sort_order),
-                )
+            self._insert_session_tasks(conn, session_id, tasks)
+
+    def _insert_session_tasks(self, conn: sqlite3.Connection, session_id: int, tasks: list[TaskRow]) -> None:
+        conn.executemany(
+            """
+            INSERT INTO session_tasks(session_id, task_title, is_done, sort_order)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(session_id, task.title, int(task.is_done), sort_order) for sort_order, task in enumerate(tasks[:MAX_TASKS])],
+        )
 
     # Backward-compatible wrappers
     def upsert_task(
@@ -280,7 +1001,7 @@ class Storage:
         self.set_task_done(task_id, is_done)
 
     def list_inventory(self, type: str | None = None) -> list[InventoryRow]:
-        with self._connect() as conn:
+        with self._read() as conn:
             if type is None:
                 rows = conn.execute(
                     "SELECT id, type, code, is_unlocked, unlocked_at FROM inventory ORDER BY id ASC"
@@ -302,7 +1023,7 @@ class Storage:
         ]
 
     def unlock_item(self, type: str, code: str) -> None:
-        unlocked_at = datetime.now().isoformat(timespec="seconds")
+        unlocked_at = self.clock.now().isoformat(timespec="seconds")
         with self._transaction() as conn:
             row = conn.execute("SELECT id FROM inventory WHERE type = ? AND code = ?", (type, code)).fetchone()
             if row:
@@ -7,22 +7,20 @@ from __future__ import annotations
 """
 
 import sys
-from pathlib import Path
 
 from PyQt6.QtWidgets import QApplication
 
 
 from app.core.app_state import AppState
-from app.data.storage import Storage
+from app.core.assets import configure_scaled_cache
+from app.core.clock import SystemClock
+from app.core.disk_cache import default_cache_dir
+from app.core.timer import FocusTimer
+from app.data.storage import BACKLOG_TASK_LIMIT, Storage, default_db_path
 from app.ui.main_window import MainWindow
 
 
 
-def default_db_path() -> Path:
-    """Возвращает стандартный путь к SQLite-файлу в текущей директории."""
-    return Path.cwd() / "app.db"
-
-
 
 def main() -> int:
     """Создает зависимости приложения и запускает главный UI-цикл."""
@@ -30,16 +28,28 @@ def main() -> int:
 
     
 
-    storage = Storage(default_db_path())
+    # Фоны и атлас, отмасштабированные под экран, переживают перезапуск.
+    configure_scaled_cache(default_cache_dir())
+
+    clock = SystemClock()
+    storage = Storage(default_db_path(), task_limit=BACKLOG_TASK_LIMIT, clock=clock)
     storage.init_db()
+    storage.verify_coin_balance()
+    storage.start_write_behind()
 
-    app_state = AppState()
+    app_state = AppState(clock)
     app_state.load_from_storage(storage)
+    # Сессия, прерванная падением процесса, продолжается или записывается как неуспешная.
+    timer = FocusTimer(clock)
+    app_state.restore_active_session(timer)
 
-    window = MainWindow(storage=storage, app_state=app_state)
+    window = MainWindow(storage=storage, app_state=app_state, timer=timer)
 
     window.show()
-    return app.exec()
+    try:
+        return app.exec()
+    finally:
+        storage.close()
 
 
 if __name__ == "__main__":
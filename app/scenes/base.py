@@ -4,19 +4,73 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 
-from PyQt6.QtCore import QRectF
-from PyQt6.QtGui import QPainter
+from PyQt6.QtCore import QRectF, QSize
+from PyQt6.QtGui import QColor, QPainter
 
+from app.core.assets import AsyncAsset
 from app.core.timer import TimerState
 
 
+def device_size(rect: QRectF, dpr: float) -> QSize:
+    """Размер `rect` в пикселях устройства: под него масштабируются фоны и ищутся варианты на диске."""
+    return QSize(max(1, round(rect.width() * dpr)), max(1, round(rect.height() * dpr)))
+
+
 class BaseScene(ABC):
     """Интерфейс сцены: отрисовка и реакция на состояние таймера."""
     name: str
+    # Потолок частоты перерисовки, пока сцена анимирована сама по себе.
+    max_fps: float = 30.0
+    # Период покадровой анимации `advance_animation_frame`; 0 — кадров у сцены нет.
+    animation_interval_sec: float = 0.0
+    # Заливка-заглушка, пока ассеты сцены декодируются в фоне (обычно цвет неба).
+    placeholder_color: str = "#eceff1"
 
-    @abstractmethod
     def render(self, painter: QPainter, rect: QRectF, progress: float, failed: bool, time_s: float) -> None:
-        """Render scene in the provided rect."""
+        """Render scene in the provided rect (both layers, without caching)."""
+        if not self.assets_ready():
+            self.render_placeholder(painter, rect)
+            return
+        self.render_static(painter, rect, failed)
+        self.render_dynamic(painter, rect, progress, failed, time_s)
+
+    def render_static(self, painter: QPainter, rect: QRectF, failed: bool) -> None:
+        """Render layers that depend only on size and failed state; the widget caches them."""
+
+    @abstractmethod
+    def render_dynamic(self, painter: QPainter, rect: QRectF, progress: float, failed: bool, time_s: float) -> None:
+        """Render layers that change with progress or time on top of the static layer."""
+
+    def render_placeholder(self, painter: QPainter, rect: QRectF) -> None:
+        """Render a cheap stand-in until `assets_ready()`."""
+        painter.fillRect(rect, QColor(self.placeholder_color))
+
+    def draw_background(self, painter: QPainter, rect: QRectF, asset: AsyncAsset) -> bool:
+        """Stretch `asset` over `rect` using a variant pre-scaled for the device (kept on disk across runs).
+
+        Return False when the asset has no image, so the scene can draw its procedural stand-in.
+        """
+        dpr = painter.device().devicePixelRatioF()
+        scaled = asset.scaled(device_size(rect, dpr))
+        if scaled is None:
+            return False
+        scaled.setDevicePixelRatio(dpr)
+        painter.drawPixmap(rect.topLeft(), scaled)
+        return True
+
+    def async_assets(self) -> tuple[AsyncAsset, ...]:
+        """Assets the scene decodes in the background."""
+        return ()
+
+    def assets_ready(self, size: QSize | None = None) -> bool:
+        """Return True once the scene can be drawn.
+
+        With `size` (the scene rect in device pixels) a variant pre-scaled on disk counts as
+        ready, so a cache hit skips decoding the source; the check may start missing decodes.
+        """
+        if size is None:
+            return all(asset.ready for asset in self.async_assets())
+        return all(asset.ready_for(size) for asset in self.async_assets())
 
     def on_timer_state_changed(self, state: TimerState) -> None:
         """Hook for scene-specific state updates."""
@@ -24,3 +78,7 @@ class BaseScene(ABC):
     def advance_animation_frame(self, state: TimerState) -> bool:
         """Advance animation frame and return True if repaint is needed."""
         return False
+
+    def is_animated(self, state: TimerState, failed: bool) -> bool:
+        """Return True while the picture changes with time alone (drift, wobble, sprite frames)."""
+        return False
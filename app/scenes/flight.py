@@ -4,49 +4,84 @@ from __future__ import annotations
 
 from math import sin
 
-from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtCore import QPointF, QRect, QRectF, QSize, Qt
 from PyQt6.QtGui import QBrush, QColor, QPainter, QPen, QPixmap, QPolygonF
 
-from app.core.assets import load_pixmap, load_pixmap_sequence
-from app.core.timer import TimerState
-from app.scenes.base import BaseScene
+from app.core.assets import AsyncAsset, AtlasLayout, async_pixmap, async_sprite_atlas, read_atlas_layout
+from app.core.timer import RUNNING_STATES, TimerState
+from app.scenes.base import BaseScene, device_size
+
+
+PLANE_FRAME_NAMES = ["plane_fly_01.png", "plane_fly_02.png", "plane_fly_03.png", "plane_fly_04.png"]
 
 
 class FlightScene(BaseScene):
     """Визуализация авиа-темы; поддерживает покадровую анимацию."""
     name = "Flight"
+    max_fps = 30.0
+    animation_interval_sec = 0.1
+    placeholder_color = "#b3e5fc"
 
     def __init__(self) -> None:
-        self._pixmap = load_pixmap("scenes/flight.png")
-        self._plane_frame_paths = [
-            "plane/plane_fly_01.png",
-            "plane/plane_fly_02.png",
-            "plane/plane_fly_03.png",
-            "plane/plane_fly_04.png",
-        ]
-        self._plane_frames = load_pixmap_sequence(self._plane_frame_paths)
-        self._use_sprite_plane = len(self._plane_frames) == 4
+        self._background = async_pixmap("scenes/flight.png")
+        self._plane_sprites = async_sprite_atlas("plane", PLANE_FRAME_NAMES)
         self._frame_index = 0
+        # Раскладка упакованного атласа читается один раз из `atlas.json`, без декодирования.
+        self._packed_layout: AtlasLayout | None = None
+        self._packed_layout_read = False
+        # Атлас, заранее отмасштабированный под (ширина, высота, DPR) сцены: кадр — блит 1:1 из одного изображения.
+        self._scaled_atlas: QPixmap | None = None
+        self._scaled_rects: tuple[QRect, ...] = ()
+        self._scaled_key: tuple[int, int, float] | None = None
+
+    def async_assets(self) -> tuple[AsyncAsset, ...]:
+        return (self._background, self._plane_sprites)
+
+    def assets_ready(self, size: QSize | None = None) -> bool:
+        if size is None:
+            return super().assets_ready()
+        if not self._background.ready_for(size):
+            return False
+        layout = self._plane_layout()
+        if layout is None:
+            # Атлас не упакован: кадры (или их отсутствие) известны только после декодирования.
+            return self._plane_sprites.ready
+        return self._plane_sprites.ready_for(self._fitted_size(layout, size)[0])
+
+    def _plane_layout(self) -> AtlasLayout | None:
+        """Раскладка кадров самолета: из `atlas.json` без декодирования, иначе из готового атласа."""
+        if not self._packed_layout_read:
+            self._packed_layout_read = True
+            self._packed_layout = read_atlas_layout("plane", PLANE_FRAME_NAMES)
+        layout = self._packed_layout
+        if layout is None:
+            atlas = self._plane_sprites.value()
+            layout = None if atlas is None else atlas.layout
+        return layout if layout is not None and len(layout.rects) == len(PLANE_FRAME_NAMES) else None
 
     def on_timer_state_changed(self, state: TimerState) -> None:
         if state in {TimerState.IDLE, TimerState.FINISHED, TimerState.FAILED}:
             self._frame_index = 0
 
+    def is_animated(self, state: TimerState, failed: bool) -> bool:
+        # Облака и покачивание самолета движутся, только пока идет таймер.
+        return state in RUNNING_STATES
+
     def advance_animation_frame(self, state: TimerState) -> bool:
-        if not self._use_sprite_plane:
+        layout = self._plane_layout()
+        if layout is None:
             return False
-        if state not in {TimerState.FOCUS_RUNNING, TimerState.BREAK_RUNNING}:
+        if state not in RUNNING_STATES:
             return False
 
-        self._frame_index = (self._frame_index + 1) % len(self._plane_frames)
+        self._frame_index = (self._frame_index + 1) % len(layout.rects)
         return True
 
-    def render(self, painter: QPainter, rect: QRectF, progress: float, failed: bool, time_s: float) -> None:
-        if self._pixmap is not None:
-            painter.drawPixmap(rect.toRect(), self._pixmap)
-        else:
+    def render_static(self, painter: QPainter, rect: QRectF, failed: bool) -> None:
+        if not self.draw_background(painter, rect, self._background):
             painter.fillRect(rect, QColor("#b3e5fc"))
 
+    def render_dynamic(self, painter: QPainter, rect: QRectF, progress: float, failed: bool, time_s: float) -> None:
         cloud_shift = (time_s * 25) % (rect.width() + 180)
         painter.setBrush(QBrush(QColor(255, 255, 255, 180)))
         painter.setPen(Qt.PenStyle.NoPen)
@@ -61,15 +96,13 @@ class FlightScene(BaseScene):
         if failed:
             y += min(rect.height() * 0.4, (1.0 - progress) * rect.height() * 0.6 + time_s * 140)
 
-        if self._use_sprite_plane:
-            self._draw_sprite_plane(painter, rect, x, y, time_s)
+        fitted = self._fitted_atlas(rect, painter.device().devicePixelRatioF())
+        if fitted is not None:
+            scaled, rects = fitted
+            self._draw_fitted_plane_frame(painter, scaled, rects[self._frame_index], x, y, time_s)
         else:
             self._draw_fallback_plane(painter, x, y, failed, time_s)
 
-    def _draw_sprite_plane(self, painter: QPainter, rect: QRectF, x: float, y: float, time_s: float) -> None:
-        frame = self._plane_frames[self._frame_index]
-        self._draw_fitted_plane_frame(painter, rect, frame, x, y, time_s)
-
     def _draw_fallback_plane(self, painter: QPainter, x: float, y: float, failed: bool, time_s: float) -> None:
         body = QPolygonF([
             QPointF(x - 35, y),
@@ -94,20 +127,52 @@ class FlightScene(BaseScene):
             painter.setPen(QPen(QColor(255, 255, 255, 180), 2, Qt.PenStyle.DashLine))
             painter.drawLine(QPointF(x - 120, trail_y), QPointF(x - 40, trail_y))
 
+    @staticmethod
+    def _fitted_size(layout: AtlasLayout, scene_size: QSize) -> tuple[QSize, float]:
+        """Размер атласа с кадрами, вписанными в 28% сцены (`scene_size` — в пикселях устройства), и масштаб."""
+        # Кадры одного размера (см. assets/plane/README.md): масштаб считается по первому.
+        first = layout.rects[0]
+        scale = min(scene_size.width() * 0.28 / first.width(), scene_size.height() * 0.28 / first.height())
+        size = QSize(max(1, round(layout.size.width() * scale)), max(1, round(layout.size.height() * scale)))
+        return size, scale
+
+    def _fitted_atlas(self, rect: QRectF, dpr: float) -> tuple[QPixmap, tuple[QRect, ...]] | None:
+        """Атлас с кадрами, вписанными в 28% сцены; пересчитывается только при смене размера или DPR."""
+        key = (round(rect.width()), round(rect.height()), dpr)
+        if self._scaled_atlas is not None and key == self._scaled_key:
+            return self._scaled_atlas, self._scaled_rects
+
+        layout = self._plane_layout()
+        if layout is None:
+            return None
+        size, scale = self._fitted_size(layout, device_size(rect, dpr))
+        scaled = self._plane_sprites.scaled(size)
+        if scaled is None:
+            return None
+        scaled.setDevicePixelRatio(dpr)
+        self._scaled_atlas = scaled
+        self._scaled_rects = tuple(
+            QRect(
+                round(source.x() * scale),
+                round(source.y() * scale),
+                max(1, round(source.width() * scale)),
+                max(1, round(source.height() * scale)),
+            )
+            for source in layout.rects
+        )
+        self._scaled_key = key
+        return scaled, self._scaled_rects
+
     def _draw_fitted_plane_frame(
         self,
         painter: QPainter,
-        rect: QRectF,
-        frame: QPixmap,
+        atlas: QPixmap,
+        source: QRect,
         x: float,
         y: float,
         time_s: float,
     ) -> None:
-        max_w = rect.width() * 0.28
-        max_h = rect.height() * 0.28
-        scale = min(max_w / frame.width(), max_h / frame.height())
-        draw_w = frame.width() * scale
-        draw_h = frame.height() * scale
+        draw_w = source.width() / atlas.devicePixelRatio()
+        draw_h = source.height() / atlas.devicePixelRatio()
         wobble_y = sin(time_s * 4.0) * 3.0
-        target = QRectF(x - draw_w * 0.55, y - draw_h * 0.5 + wobble_y, draw_w, draw_h)
-        painter.drawPixmap(target, frame, QRectF(frame.rect()))
+        painter.drawPixmap(QPointF(x - draw_w * 0.55, y - draw_h * 0.5 + wobble_y), atlas, QRectF(source))
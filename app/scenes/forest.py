@@ -6,31 +6,43 @@ from math import sin
 
 from PyQt6.QtCore import QPointF, QRectF, Qt
 from PyQt6.QtGui import QBrush, QColor, QPainter, QPen
-from app.core.assets import load_pixmap
+from app.core.assets import AsyncAsset, async_pixmap
+from app.core.timer import RUNNING_STATES, TimerState
 from app.scenes.base import BaseScene
 
 
 class ForestScene(BaseScene):
     """Визуализация лесной темы: стебель, листья, цветок."""
     name = "Forest"
+    max_fps = 15.0
+    placeholder_color = "#d9f6ff"
 
 
     def __init__(self) -> None:
-        self._pixmap = load_pixmap("scenes/forest.png")
+        self._background = async_pixmap("scenes/forest.png")
 
-    def render(self, painter: QPainter, rect: QRectF, progress: float, failed: bool, time_s: float) -> None:
-        if self._pixmap is not None:
-            painter.drawPixmap(rect.toRect(), self._pixmap)
+    def async_assets(self) -> tuple[AsyncAsset, ...]:
+        return (self._background,)
+
+    def is_animated(self, state: TimerState, failed: bool) -> bool:
+        # Готовая картинка статична; движется только процедурная сцена во время таймера.
+        return self._background.missing and state in RUNNING_STATES
+
+    def render_static(self, painter: QPainter, rect: QRectF, failed: bool) -> None:
+        if self.draw_background(painter, rect, self._background):
             return
 
         sky = QColor("#d9f6ff") if not failed else QColor("#c7c7c7")
         ground = QColor("#86c06c") if not failed else QColor("#6e6e6e")
         painter.fillRect(rect, sky)
-        ground_rect = QRectF(rect.left(), rect.bottom() - rect.height() * 0.25, rect.width(), rect.height() * 0.25)
-        painter.fillRect(ground_rect, ground)
+        painter.fillRect(self._ground_rect(rect), ground)
+
+    def render_dynamic(self, painter: QPainter, rect: QRectF, progress: float, failed: bool, time_s: float) -> None:
+        if not self._background.missing:
+            return
 
         cx = rect.center().x()
-        base_y = ground_rect.top() + 8
+        base_y = self._ground_rect(rect).top() + 8
         stem_top = base_y - rect.height() * (0.08 + 0.35 * progress)
         stem_color = QColor("#2e7d32") if not failed else QColor("#424242")
         painter.setPen(QPen(stem_color, 8, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap))
@@ -55,3 +67,7 @@ class ForestScene(BaseScene):
                 painter.drawEllipse(QRectF(center.x() + dx - 8, center.y() + dy - 8, 16 * flower_progress, 16 * flower_progress))
             painter.setBrush(QBrush(QColor("#ffeb3b") if not failed else QColor("#455a64")))
             painter.drawEllipse(QRectF(center.x() - 7, center.y() - 7, 14, 14))
+
+    @staticmethod
+    def _ground_rect(rect: QRectF) -> QRectF:
+        return QRectF(rect.left(), rect.bottom() - rect.height() * 0.25, rect.width(), rect.height() * 0.25)
@@ -7,26 +7,40 @@ from math import sin
 from PyQt6.QtCore import QPointF, QRectF, Qt
 from PyQt6.QtGui import QBrush, QColor, QPainter, QPen, QPolygonF
 
-from app.core.assets import load_pixmap
+from app.core.assets import AsyncAsset, async_pixmap
+from app.core.timer import RUNNING_STATES, TimerState
 from app.scenes.base import BaseScene
 
 
 class IceScene(BaseScene):
     """Визуализация ледяной темы с водой, каплями и трещинами."""
     name = "Ice"
+    max_fps = 15.0
+    placeholder_color = "#e1f5fe"
     def __init__(self) -> None:
-        self._pixmap = load_pixmap("scenes/ice.png")
+        self._background = async_pixmap("scenes/ice.png")
 
-    def render(self, painter: QPainter, rect: QRectF, progress: float, failed: bool, time_s: float) -> None:
-        if self._pixmap is not None:
-            painter.drawPixmap(rect.toRect(), self._pixmap)
-            return
+    def async_assets(self) -> tuple[AsyncAsset, ...]:
+        return (self._background,)
+
+    def is_animated(self, state: TimerState, failed: bool) -> bool:
+        # Капли покачиваются только в процедурной сцене и только пока идет таймер.
+        return self._background.missing and state in RUNNING_STATES
 
+    def render_static(self, painter: QPainter, rect: QRectF, failed: bool) -> None:
+        if self.draw_background(painter, rect, self._background):
+            return
 
         painter.fillRect(rect, QColor("#e1f5fe"))
         water_top = rect.bottom() - rect.height() * 0.28
         painter.fillRect(QRectF(rect.left(), water_top, rect.width(), rect.height() * 0.28), QColor("#4fc3f7"))
 
+    def render_dynamic(self, painter: QPainter, rect: QRectF, progress: float, failed: bool, time_s: float) -> None:
+        if not self._background.missing:
+            return
+
+        water_top = rect.bottom() - rect.height() * 0.28
+
         melt_scale = 1.0 - 0.65 * progress
         w = rect.width() * 0.35 * melt_scale
         h = rect.height() * 0.45 * melt_scale
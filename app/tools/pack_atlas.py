@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+"""Упаковка кадров анимации из папки `assets/` в атлас.
+
+`python -m app.tools.pack_atlas assets/plane` собирает все PNG папки
+(кроме самого атласа) в порядке имен и пишет рядом `atlas.png` и
+`atlas.json`, которые читает `app.core.assets.load_sprite_atlas`.
+Работает на `QImage`, поэтому не требует дисплея и `QApplication`.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from PyQt6.QtGui import QImage
+
+from app.core.assets import ATLAS_IMAGE_NAME, ATLAS_PADDING, ATLAS_TABLE_NAME, atlas_table, pack_frames
+
+
+def pack_directory(directory: Path, padding: int = ATLAS_PADDING) -> tuple[Path, Path]:
+    """Собирает атлас папки и возвращает пути к изображению и таблице кадров."""
+    frame_paths = sorted(path for path in directory.glob("*.png") if path.name != ATLAS_IMAGE_NAME)
+    if not frame_paths:
+        raise ValueError(f"no PNG frames in {directory}")
+    images: list[QImage] = []
+    for path in frame_paths:
+        image = QImage(str(path))
+        if image.isNull():
+            raise ValueError(f"cannot decode {path}")
+        images.append(image)
+
+    atlas, rects = pack_frames(images, padding)
+    image_path = directory / ATLAS_IMAGE_NAME
+    table_path = directory / ATLAS_TABLE_NAME
+    if not atlas.save(str(image_path), "PNG"):
+        raise OSError(f"cannot write {image_path}")
+    table = atlas_table([path.name for path in frame_paths], rects)
+    table_path.write_text(json.dumps(table, indent=2) + "\n", encoding="utf-8")
+    return image_path, table_path
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Pack animation frames of an assets folder into atlas.png + atlas.json")
+    parser.add_argument("directories", type=Path, nargs="+", help="folders with PNG frames, e.g. assets/plane")
+    parser.add_argument("--padding", type=int, default=ATLAS_PADDING, help="transparent border around each frame")
+    args = parser.parse_args(argv)
+    for directory in args.directories:
+        image_path, table_path = pack_directory(directory, args.padding)
+        print(f"{directory}: {image_path.name} + {table_path.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+"""Единый планировщик кадров главного окна.
+
+Один однократный Qt-таймер заменяет тик таймера, периодическую
+перерисовку и шаг анимации сцены. Он взводится на ближайшее из событий:
+дедлайн `FocusTimer`, следующий кадр спрайта и следующий кадр
+непрерывной анимации сцены (не чаще `BaseScene.max_fps`). Виджет
+перерисовывается только по грязному флагу или пока сцена анимирована.
+В свернутом или скрытом окне остается одно пробуждение — на границе
+фазы, чтобы сессия записалась вовремя; в простое таймер не взведен вовсе.
+"""
+
+import math
+from typing import TYPE_CHECKING, Callable
+
+from PyQt6.QtCore import QEvent, QObject, QTimer, Qt
+
+from app.core.timer import FocusTimer
+
+if TYPE_CHECKING:
+    from app.ui.main_window import SceneWidget
+
+
+# Допуск на ранний выстрел Qt-таймера: кадр, до которого осталось меньше, рисуется сразу.
+_EARLY_SEC = 0.001
+
+
+class FrameScheduler(QObject):
+    """Собирает грязные флаги виджета сцены и будит окно только по необходимости."""
+
+    def __init__(
+        self,
+        timer: FocusTimer,
+        scene_widget: SceneWidget,
+        on_timer_frame: Callable[[float], None],
+        parent: QObject | None = None,
+    ) -> None:
+        super().__init__(parent)
+        self._timer = timer
+        self._clock = timer.clock
+        self._widget = scene_widget
+        self._on_timer_frame = on_timer_frame
+        self._dirty = True
+        self._last_paint = -math.inf
+        self._next_sprite_at: float | None = None
+        self._in_wakeup = False
+
+        self._wakeup = QTimer(self)
+        self._wakeup.setSingleShot(True)
+        self._wakeup.setTimerType(Qt.TimerType.PreciseTimer)
+        self._wakeup.timeout.connect(self._on_wakeup)
+
+        scene_widget.dirty.connect(self.mark_dirty)
+        scene_widget.window().installEventFilter(self)
+
+    def mark_dirty(self) -> None:
+        """Просит перерисовать сцену в ближайший разрешенный кадр."""
+        if self._dirty:
+            return
+        self._dirty = True
+        self.reschedule()
+
+    def reschedule(self) -> None:
+        """Пересчитывает ближайшее пробуждение; вызывается после внешних команд таймера."""
+        if self._in_wakeup:
+            return  # `_on_wakeup` пересчитает сам, когда закончит
+        now = self._clock.monotonic()
+        if not self._is_visible():
+            self._next_sprite_at = None
+            self._arm(now, self._timer.phase_deadline(now))
+            return
+
+        wake = self._timer.next_deadline(now)
+        animated = self._widget.is_animated()
+        if self._dirty or animated:
+            wake = _earliest(wake, self._last_paint + 1.0 / self._widget.max_fps)
+        interval = self._widget.animation_interval_sec
+        if animated and interval > 0:
+            if self._next_sprite_at is None:
+                self._next_sprite_at = now + interval
+            wake = _earliest(wake, self._next_sprite_at)
+        else:
+            self._next_sprite_at = None
+        self._arm(now, wake)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:  # noqa: N802
+        if event.type() in (QEvent.Type.Show, QEvent.Type.Hide, QEvent.Type.WindowStateChange):
+            # После сворачивания секунды и прогресс устарели: первый кадр рисуем сразу.
+            self._dirty = True
+            self.reschedule()
+        return False
+
+    def _on_wakeup(self) -> None:
+        now = self._clock.monotonic()
+        self._in_wakeup = True
+        try:
+            # Шаг таймера дешев и идемпотентен: без видимых изменений `poll` вернет None.
+            self._on_timer_frame(now)
+            if self._is_visible():
+                self._step_animation(now)
+        finally:
+            self._in_wakeup = False
+            self.reschedule()
+
+    def _step_animation(self, now: float) -> None:
+        if self._next_sprite_at is not None and now + _EARLY_SEC >= self._next_sprite_at:
+            self._next_sprite_at = now + self._widget.animation_interval_sec
+            if self._widget.advance_animation_frame():
+                self._dirty = True
+        if not (self._dirty or self._widget.is_animated()):
+            return
+        if now + _EARLY_SEC < self._last_paint + 1.0 / self._widget.max_fps:
+            return  # потолок fps сцены: кадр дорисуется на следующем пробуждении
+        self._widget.set_time(now)
+        self._widget.update()
+        self._dirty = False
+        self._last_paint = now
+
+    def _is_visible(self) -> bool:
+        return self._widget.isVisible() and not self._widget.window().isMinimized()
+
+    def _arm(self, now: float, wake: float | None) -> None:
+        if wake is None:
+            self._wakeup.stop()
+            return
+        self._wakeup.start(math.ceil(max(0.0, wake - now) * 1000))
+
+
+def _earliest(first: float | None, second: float | None) -> float | None:
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return min(first, second)
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+"""Ленивая Qt-модель истории сессий поверх keyset-пагинации `Storage`."""
+
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from app.data.storage import SessionRow, Storage
+
+
+class SessionHistoryModel(QAbstractListModel):
+    """История сессий (новые первыми), подгружаемая страницами по мере прокрутки.
+
+    Представление само вызывает `fetchMore`, когда доходит до конца списка;
+    новые сессии добавляются в начало через `prepend_session` без перестроения.
+    """
+
+    def __init__(self, storage: Storage, page_size: int = 50, parent=None) -> None:
+        super().__init__(parent)
+        self._storage = storage
+        self._page_size = page_size
+        self._rows: list[SessionRow] = []
+        self._exhausted = False
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # noqa: N802
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.format_row(row)
+        if role == Qt.ItemDataRole.UserRole:
+            return row
+        return None
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:  # noqa: N802
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex) -> None:  # noqa: N802
+        if parent.isValid() or self._exhausted:
+            return
+        before_id = self._rows[-1].id if self._rows else None
+        page = self._storage.list_sessions_page(before_id=before_id, limit=self._page_size)
+        self._exhausted = len(page) < self._page_size
+        if not page:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._rows.extend(page)
+        self.endInsertRows()
+
+    def prepend_session(self, row: SessionRow) -> None:
+        """Вставляет только что записанную сессию в начало списка."""
+        if self._rows and self._rows[0].id >= row.id:
+            return  # уже подгружена страницей после фиксации
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._rows.insert(0, row)
+        self.endInsertRows()
+
+    def reload(self) -> None:
+        """Сбрасывает загруженные страницы; представление подгрузит их заново."""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+
+    @staticmethod
+    def format_row(row: SessionRow) -> str:
+        status = "✅" if row.success else "❌"
+        duration_text = f"{row.duration_sec // 60:02d}:{row.duration_sec % 60:02d}"
+        return f"{status} {row.started_at} · {duration_text} · {row.theme}"
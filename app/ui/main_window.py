@@ -2,11 +2,11 @@ from __future__ import annotations
 
 """Главное окно приложения: сборка UI, управление таймером и статистикой."""
 
-import time
-from datetime import date, datetime, timedelta
+from typing import Callable
+from weakref import WeakSet
 
-from PyQt6.QtCore import QRect, QTimer, Qt
-from PyQt6.QtGui import QColor, QKeySequence, QPainter, QPen, QShortcut
+from PyQt6.QtCore import QObject, QRect, QRectF, QTimer, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QKeySequence, QPainter, QPen, QPixmap, QShortcut
 from PyQt6.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -14,8 +14,7 @@ from PyQt6.QtWidgets import (
     QGridLayout,
     QHBoxLayout,
     QLabel,
-    QListWidget,
-    QListWidgetItem,
+    QListView,
     QLineEdit,
     QMainWindow,
     QMessageBox,
@@ -23,53 +22,148 @@ from PyQt6.QtWidgets import (
     QSizePolicy,
     QSpinBox,
     QSplitter,
-    QToolButton,
     QVBoxLayout,
     QWidget,
 )
 
 from app.core.app_state import AppState
-from app.core.timer import FocusTimer, TimerState
-from app.data.storage import MAX_TASKS, SessionRow, Storage, TaskRow
-from app.scenes.base import BaseScene
+from app.core.engine import STARTABLE_STATES, FocusEngine, coins_for_focus
+from app.core.timer import FocusTimer, TimerState, TimerTransition
+from app.data.storage import MAX_TASKS, SessionRow, Storage
+from app.scenes.base import BaseScene, device_size
 from app.scenes.flight import FlightScene
 from app.scenes.forest import ForestScene
 from app.scenes.ice import IceScene
+from app.ui.frame_scheduler import FrameScheduler
+from app.ui.history_model import SessionHistoryModel
+from app.ui.task_model import TaskItemDelegate, TaskListModel
+
+
+class _QtInvoker(QObject):
+    """Диспетчер `AppState` для Qt: вызов из любого потока выполняется в потоке объекта."""
+    _invoke = pyqtSignal(object, tuple)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        # AutoConnection: из чужого потока вызов ставится в очередь событий UI-потока.
+        self._invoke.connect(self._run)
+
+    def __call__(self, fn, *args) -> None:
+        self._invoke.emit(fn, args)
+
+    @staticmethod
+    def _run(fn, args: tuple) -> None:
+        fn(*args)
 
 
 class SceneWidget(QWidget):
-    """Виджет отрисовки текущей сцены и кругового индикатора времени."""
-    def __init__(self, parent: QWidget | None = None) -> None:
+    """Виджет отрисовки текущей сцены и кругового индикатора времени.
+
+    Сам себя не перерисовывает: изменения поднимают `dirty`, а кадр
+    рисует `FrameScheduler`, когда подойдет его время. Кадр собирается
+    из слоев: статический слой сцены рендерится один раз в `QPixmap` на
+    размер, DPR, сцену и признак провала, поверх каждый кадр рисуются
+    динамический слой сцены и кольцо прогресса. Пока ассеты сцены
+    декодируются в фоне, вместо нее рисуется заглушка (или растянутый
+    прежний слой той же сцены, если сменился только размер).
+    """
+    dirty = pyqtSignal()
+    # Из потока декодера: AutoConnection доставляет сигнал в UI-поток.
+    _assets_loaded = pyqtSignal(object)
+
+    def __init__(self, scene: BaseScene, parent: QWidget | None = None) -> None:
         super().__init__(parent)
         self.setMinimumSize(600, 420)
-        self._scene: BaseScene = ForestScene()
+        self._assets_loaded.connect(self._on_assets_loaded)
+        self._scene = scene
+        self._attach_scene(scene)
+        self._timer_state = TimerState.IDLE
         self._progress = 0.0
         self._failed = False
         self._time_s = 0.0
         self._remaining_text = "00:00"
+        self._static_layer: QPixmap | None = None
+        self._static_key: tuple | None = None
+        # Декодирования, по готовности которых уже назначена перерисовка.
+        self._awaited: WeakSet = WeakSet()
+
+    @property
+    def max_fps(self) -> float:
+        return self._scene.max_fps
+
+    @property
+    def animation_interval_sec(self) -> float:
+        return self._scene.animation_interval_sec
+
+    def is_animated(self) -> bool:
+        return self._scene.is_animated(self._timer_state, self._failed)
 
     def set_scene(self, scene: BaseScene) -> None:
+        if scene is self._scene:
+            return
+        for asset in self._scene.async_assets():
+            asset.unpin()
         self._scene = scene
-        self.update()
+        self._attach_scene(scene)
+        self.dirty.emit()
 
     def set_timer_state(self, state: TimerState) -> None:
+        self._timer_state = state
         self._scene.on_timer_state_changed(state)
 
-    def advance_animation_frame(self, state: TimerState) -> bool:
-        return self._scene.advance_animation_frame(state)
+    def advance_animation_frame(self) -> bool:
+        return self._scene.advance_animation_frame(self._timer_state)
+
+    def set_time(self, time_s: float) -> None:
+        self._time_s = time_s
 
     def set_state(self, progress: float, failed: bool, time_s: float, remaining_text: str) -> None:
+        self._time_s = time_s
+        if (progress, failed, remaining_text) == (self._progress, self._failed, self._remaining_text):
+            return
         self._progress = progress
         self._failed = failed
-        self._time_s = time_s
         self._remaining_text = remaining_text
-        self.update()
+        self.dirty.emit()
+
+    def _attach_scene(self, scene: BaseScene) -> None:
+        """Закрепляет ассеты показанной сцены в кэше; декодировать их решит первый кадр."""
+        for asset in scene.async_assets():
+            asset.pin()
+
+    def _await_assets(self) -> None:
+        """Перерисовывает сцену, когда закончатся декодирования, запущенные проверкой готовности."""
+        scene = self._scene
+        for asset in scene.async_assets():
+            future = asset.pending
+            if future is not None and future not in self._awaited:
+                self._awaited.add(future)
+                future.add_done_callback(lambda _future, scene=scene: self._emit_assets_loaded(scene))
+
+    def _emit_assets_loaded(self, scene: BaseScene) -> None:
+        try:
+            self._assets_loaded.emit(scene)
+        except RuntimeError:
+            pass  # виджет уже удален: окно закрылось раньше, чем декодер закончил
+
+    def _on_assets_loaded(self, scene: BaseScene) -> None:
+        if scene is self._scene:
+            self.dirty.emit()
 
     def paintEvent(self, event) -> None:  # noqa: N802
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         rect = self.rect().adjusted(10, 10, -10, -10)
-        self._scene.render(painter, rect, self._progress, self._failed, self._time_s)
+        ready = self._scene.assets_ready(device_size(QRectF(rect), self.devicePixelRatioF()))
+        if not ready:
+            self._await_assets()
+        if not ready and self._static_key is not None and self._static_key[3:] == (self._scene, self._failed, True):
+            # Новый размер ждет декодирования исходника: растягиваем прежний слой вместо заглушки.
+            painter.drawPixmap(rect, self._static_layer)
+        else:
+            painter.drawPixmap(rect.topLeft(), self._static_pixmap(rect.width(), rect.height(), ready))
+        if ready:
+            self._scene.render_dynamic(painter, QRectF(rect), self._progress, self._failed, self._time_s)
 
         diameter = int(min(rect.width(), rect.height()) * 0.35)
         x = rect.left() + 16
@@ -86,6 +180,27 @@ class SceneWidget(QWidget):
         painter.setFont(self.font())
         painter.drawText(circle_rect, Qt.AlignmentFlag.AlignCenter, self._remaining_text)
 
+    def _static_pixmap(self, width: int, height: int, ready: bool) -> QPixmap:
+        dpr = self.devicePixelRatioF()
+        key = (width, height, dpr, self._scene, self._failed, ready)
+        if self._static_layer is not None and self._static_key == key:
+            return self._static_layer
+
+        layer = QPixmap(max(1, round(width * dpr)), max(1, round(height * dpr)))
+        layer.setDevicePixelRatio(dpr)
+        layer.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(layer)
+        # Слой рисуется редко, поэтому фон масштабируется качественно.
+        painter.setRenderHints(QPainter.RenderHint.Antialiasing | QPainter.RenderHint.SmoothPixmapTransform)
+        if ready:
+            self._scene.render_static(painter, QRectF(0, 0, width, height), self._failed)
+        else:
+            self._scene.render_placeholder(painter, QRectF(0, 0, width, height))
+        painter.end()
+        self._static_layer = layer
+        self._static_key = key
+        return layer
+
 
 class MainWindow(QMainWindow):
     """Оркестратор интерфейса, таймера, сцен и пользовательских действий."""
@@ -96,47 +211,48 @@ class MainWindow(QMainWindow):
         "Custom": (25, 5),
     }
 
-    def __init__(self, storage: Storage, app_state: AppState) -> None:
+    def __init__(self, storage: Storage, app_state: AppState, timer: FocusTimer | None = None) -> None:
         super().__init__()
         self.setWindowTitle("Focus Scenes")
         self.resize(1200, 740)
         self.storage = storage
         self.app_state = app_state
-        self.timer = FocusTimer()
+        self.clock = app_state.clock
+        # Таймер можно передать снаружи: так `main.py` возвращает сессию, восстановленную после сбоя.
+        self.timer = timer or FocusTimer(self.clock)
+        self.engine = FocusEngine(self.timer, app_state)
+        # Сигналы фоновой записи приходят из потока хранилища: мост переносит их в UI-поток.
+        self._invoker = _QtInvoker(self)
+        self.app_state.set_dispatcher(self._invoker)
         self.failed_animation = False
 
-        self.scenes: dict[str, BaseScene] = {
-            "Forest": ForestScene(),
-            "Flight": FlightScene(),
-            "Ice": IceScene(),
+        # Сцены создаются при первом выборе: старт окна не зависит от числа тем.
+        self.scene_factories: dict[str, Callable[[], BaseScene]] = {
+            "Forest": ForestScene,
+            "Flight": FlightScene,
+            "Ice": IceScene,
         }
+        self.scenes: dict[str, BaseScene] = {}
         self.theme_to_ui = {"forest": "Forest", "flight": "Flight", "ice": "Ice"}
         self.ui_to_theme = {v: k for k, v in self.theme_to_ui.items()}
 
+        # Серии изменений настроек (смена пресета, прокрутка spinbox) сбрасываются в БД одной записью.
+        self.settings_flush_timer = QTimer(self)
+        self.settings_flush_timer.setSingleShot(True)
+        self.settings_flush_timer.setInterval(400)
+        self.settings_flush_timer.timeout.connect(self.app_state.flush_settings)
+
         self._build_ui()
         self._load_timer_settings()
         self._connect_signals()
         self._sync_theme_from_state()
 
-        self.frame_timer = QTimer(self)
-        self.frame_timer.setInterval(250)
-        self.frame_timer.timeout.connect(self._on_frame)
-        self.frame_timer.start()
+        # Единственный источник кадров: дедлайны таймера, анимация сцены и грязные перерисовки.
+        self.frame_scheduler = FrameScheduler(self.timer, self.scene_widget, self._render_frame, parent=self)
 
-        self.repaint_timer = QTimer(self)
-        self.repaint_timer.setInterval(33)
-        self.repaint_timer.timeout.connect(self.scene_widget.update)
-        self.repaint_timer.start()
-
-        self.scene_animation_timer = QTimer(self)
-        self.scene_animation_timer.setInterval(100)
-        self.scene_animation_timer.timeout.connect(self._on_scene_animation_frame)
-        self.scene_animation_timer.start()
-
-        self.scene_widget.set_timer_state(self.timer.state)
         self.refresh_stats()
         self._refresh_tasks_panel()
-        self._update_buttons()
+        self._refresh_frame()
 
     def _build_ui(self) -> None:
         """Создает и композитит все визуальные блоки главного окна."""
@@ -175,7 +291,7 @@ class MainWindow(QMainWindow):
 
         # Выбор визуальной сцены (тематическое оформление анимации прогресса).
         self.scene_combo = QComboBox()
-        self.scene_combo.addItems(list(self.scenes.keys()))
+        self.scene_combo.addItems(list(self.scene_factories.keys()))
 
         top_grid.addWidget(QLabel("Preset:"), 0, 0)
         top_grid.addWidget(self.preset_combo, 0, 1)
@@ -192,7 +308,7 @@ class MainWindow(QMainWindow):
         left_layout.addLayout(top_grid)
 
         # Центральный визуальный блок: отрисовка текущей сцены и кругового прогресса.
-        self.scene_widget = SceneWidget()
+        self.scene_widget = SceneWidget(self._scene(self.theme_to_ui.get(self.app_state.selected_theme, "Forest")))
         left_layout.addWidget(self.scene_widget, 1)
 
         # Нижняя полоса управления таймером: запуск/пауза/продолжение/остановка.
@@ -222,8 +338,11 @@ class MainWindow(QMainWindow):
         stats_form.addRow("Current streak:", self.streak_label)
         stats_form.addRow("Completed cycles:", self.cycles_label)
 
-        # Список недавних сессий (дата, длительность, тема, статус).
-        self.history_list = QListWidget()
+        # Список недавних сессий (дата, длительность, тема, статус): страницы грузятся лениво.
+        self.history_model = SessionHistoryModel(self.storage, parent=self)
+        self.history_list = QListView()
+        self.history_list.setUniformItemSizes(True)
+        self.history_list.setModel(self.history_model)
         right_layout.addWidget(QLabel("Statistics"))
         right_layout.addWidget(stats_box)
 
@@ -248,7 +367,13 @@ class MainWindow(QMainWindow):
         self.max_tasks_label.setVisible(False)
         tasks_layout.addWidget(self.max_tasks_label)
 
-        self.tasks_list = QListWidget()
+        self.tasks_model = TaskListModel(self.app_state, parent=self)
+        self.tasks_delegate = TaskItemDelegate(self)
+        self.tasks_list = QListView()
+        self.tasks_list.setModel(self.tasks_model)
+        self.tasks_list.setItemDelegate(self.tasks_delegate)
+        self.tasks_list.setUniformItemSizes(True)
+        self.tasks_list.setMouseTracking(True)
         tasks_layout.addWidget(self.tasks_list, 1)
 
         right_layout.addWidget(self.tasks_panel, 1)
@@ -275,65 +400,34 @@ class MainWindow(QMainWindow):
 
         self.scene_combo.currentTextChanged.connect(self._on_scene_changed)
         self.app_state.theme_changed.connect(self._sync_theme_from_state)
-        self.app_state.coins_changed.connect(lambda _coins: self.refresh_stats())
+        self.app_state.coins_changed.connect(self._on_coins_changed)
+        self.app_state.settings_changed.connect(self._schedule_settings_flush)
+        self.app_state.session_recorded.connect(self._on_session_recorded)
         self.app_state.tasks_changed.connect(self._refresh_tasks_panel)
+        self.tasks_delegate.toggle_requested.connect(self.app_state.toggle_task_done)
+        self.tasks_delegate.move_up_requested.connect(self.app_state.move_task_up)
+        self.tasks_delegate.move_down_requested.connect(self.app_state.move_task_down)
+        self.tasks_delegate.delete_requested.connect(self.app_state.remove_task)
 
         self.add_task_btn.clicked.connect(self._on_add_task)
         self.task_input.returnPressed.connect(self._on_add_task)
 
     def _refresh_tasks_panel(self) -> None:
-        """Перестраивает список задач и синхронизирует счетчик/ограничения панели."""
-        self.tasks_list.clear()
+        """Синхронизирует счетчик и ограничения панели; строки обновляет `TaskListModel`."""
         tasks = self.app_state.tasks
-        for index, task in enumerate(tasks):
-            item = QListWidgetItem(self.tasks_list)
-            row_widget = self._build_task_row(task, index, len(tasks))
-            item.setSizeHint(row_widget.sizeHint())
-            self.tasks_list.addItem(item)
-            self.tasks_list.setItemWidget(item, row_widget)
-
         done_count = sum(1 for task in tasks if task.is_done)
         self.tasks_title.setText(self._tasks_counter_text(done_count=done_count, total_count=len(tasks)))
-        limit_reached = len(tasks) >= MAX_TASKS
+        limit_reached = self.app_state.task_limit_reached
         self.add_task_btn.setEnabled(not limit_reached)
-        self.task_input.setToolTip("Максимум 5 задач" if limit_reached else "")
+        self.task_input.setToolTip(self._task_limit_text() if limit_reached else "")
+        self.max_tasks_label.setText(self._task_limit_text())
         self.max_tasks_label.setVisible(limit_reached)
 
-    def _build_task_row(self, task: TaskRow, index: int, total: int) -> QWidget:
-        row = QWidget()
-        layout = QHBoxLayout(row)
-        layout.setContentsMargins(4, 2, 4, 2)
-
-        done_checkbox = QCheckBox()
-        done_checkbox.setChecked(task.is_done)
-        done_checkbox.toggled.connect(lambda checked, task_id=task.id: self.app_state.toggle_task_done(task_id, checked))
-
-        title = QLabel(task.title)
-        title.setWordWrap(True)
-
-        up_btn = QToolButton()
-        up_btn.setText("↑")
-        up_btn.setEnabled(index > 0)
-        up_btn.clicked.connect(lambda _checked=False, task_id=task.id: self.app_state.move_task_up(task_id))
-
-        down_btn = QToolButton()
-        down_btn.setText("↓")
-        down_btn.setEnabled(index < total - 1)
-        down_btn.clicked.connect(lambda _checked=False, task_id=task.id: self.app_state.move_task_down(task_id))
-
-        delete_btn = QToolButton()
-        delete_btn.setText("×")
-        delete_btn.clicked.connect(lambda _checked=False, task_id=task.id: self.app_state.remove_task(task_id))
-
-        layout.addWidget(done_checkbox)
-        layout.addWidget(title, 1)
-        layout.addWidget(up_btn)
-        layout.addWidget(down_btn)
-        layout.addWidget(delete_btn)
-        return row
+    def _task_limit_text(self) -> str:
+        return f"Максимум {self.storage.task_limit or MAX_TASKS} задач"
 
     def _on_add_task(self) -> None:
-        if len(self.app_state.tasks) >= MAX_TASKS:
+        if self.app_state.task_limit_reached:
             self.max_tasks_label.setVisible(True)
             self.task_input.setFocus()
             return
@@ -355,17 +449,28 @@ class MainWindow(QMainWindow):
         self._apply_preset()
 
     def _save_timer_settings(self) -> None:
-        self.app_state.save_setting("preset", self.preset_combo.currentText())
-        self.app_state.save_setting("focus_minutes", self.focus_minutes.value())
-        self.app_state.save_setting("break_minutes", self.break_minutes.value())
-        self.app_state.save_setting("auto_cycle", self.auto_cycle_checkbox.isChecked())
+        self.app_state.save_setting("preset", self.preset_combo.currentText(), defer=True)
+        self.app_state.save_setting("focus_minutes", self.focus_minutes.value(), defer=True)
+        self.app_state.save_setting("break_minutes", self.break_minutes.value(), defer=True)
+        self.app_state.save_setting("auto_cycle", self.auto_cycle_checkbox.isChecked(), defer=True)
+
+    def _schedule_settings_flush(self, *_args) -> None:
+        """Любая отложенная настройка (включая причину начисления монет) уходит в БД общим сбросом."""
+        if self.app_state.has_pending_settings:
+            self.settings_flush_timer.start()
 
     def _sync_theme_from_state(self, *_args) -> None:
         ui_theme = self.theme_to_ui.get(self.app_state.selected_theme, "Forest")
         self.scene_combo.setCurrentText(ui_theme)
-        self.scene_widget.set_scene(self.scenes[ui_theme])
+        self.scene_widget.set_scene(self._scene(ui_theme))
         self.scene_widget.set_timer_state(self.timer.state)
 
+    def _scene(self, ui_theme: str) -> BaseScene:
+        scene = self.scenes.get(ui_theme)
+        if scene is None:
+            scene = self.scenes[ui_theme] = self.scene_factories[ui_theme]()
+        return scene
+
     def _apply_preset(self, *_args) -> None:
         text = self.preset_combo.currentText()
         focus_min, break_min = self.PRESETS.get(text, (25, 5))
@@ -408,7 +513,7 @@ class MainWindow(QMainWindow):
 
     def _on_scene_changed(self) -> None:
         ui_theme = self.scene_combo.currentText()
-        self.scene_widget.set_scene(self.scenes[ui_theme])
+        self.scene_widget.set_scene(self._scene(ui_theme))
         self.scene_widget.set_timer_state(self.timer.state)
         self.app_state.set_theme(self.ui_to_theme.get(ui_theme, "forest"))
 
@@ -420,70 +525,65 @@ class MainWindow(QMainWindow):
 
     def start_session(self) -> None:
         """Запускает новую фокус-сессию из текущих настроек."""
-        if self.timer.state not in {TimerState.IDLE, TimerState.FINISHED, TimerState.FAILED}:
+        if self.timer.state not in STARTABLE_STATES:
             return
         self._apply_preset()
-        self.timer.start()
-        self.app_state.start_session(self.timer.focus_duration_sec, self.ui_to_theme.get(self.scene_combo.currentText(), "forest"))
+        self.engine.start(self.ui_to_theme.get(self.scene_combo.currentText(), "forest"))
         self.failed_animation = False
-        self.scene_widget.set_timer_state(self.timer.state)
-        self._update_buttons()
+        self._refresh_frame()
 
     def pause_session(self) -> None:
-        self.timer.pause()
-        self.scene_widget.set_timer_state(self.timer.state)
-        self._update_buttons()
+        self.engine.pause()
+        self._refresh_frame()
 
     def resume_session(self) -> None:
-        self.timer.resume()
-        self.scene_widget.set_timer_state(self.timer.state)
-        self._update_buttons()
+        self.engine.resume()
+        self._refresh_frame()
 
     def stop_session(self) -> None:
-        state_before_stop = self.timer.state
-        success_stop = self.timer.stop()
+        state_before_stop = self.engine.stop()
 
         if state_before_stop in {TimerState.FOCUS_RUNNING, TimerState.FOCUS_PAUSED}:
-            snapshot = self.timer.snapshot()
-            self.app_state.finish_session(success=False, coins_earned=0, duration_sec=snapshot.elapsed_seconds)
             self.failed_animation = True
             QMessageBox.warning(self, "Session failed", "Session stopped early and was not counted.")
-            self.refresh_stats()
             self._reset_after_finish()
             return
 
-        if state_before_stop in {TimerState.BREAK_RUNNING, TimerState.BREAK_PAUSED}:
+        if state_before_stop in {TimerState.BREAK_RUNNING, TimerState.BREAK_PAUSED, TimerState.FINISHED}:
             self._reset_after_finish()
-            return
 
-        if success_stop:
-            self._reset_after_finish()
-
-    def _handle_focus_success(self, elapsed_seconds: int) -> None:
-        coins_earned = max(1, self.timer.focus_duration_sec // 300)
-        self.app_state.finish_session(success=True, coins_earned=coins_earned, duration_sec=elapsed_seconds)
-        self.refresh_stats()
-        if not self.auto_cycle_checkbox.isChecked():
-            QMessageBox.information(self, "Session completed", f"Great job! +{coins_earned} coins")
-            self._reset_after_finish()
+    def _handle_transitions(self, transitions: list[TimerTransition]) -> bool:
+        """Показывает итог законченного цикла; `True`, если UI сброшен."""
+        if self.timer.state != TimerState.FINISHED:
+            return False
+        recorded = sum(1 for transition in transitions if transition.completes_focus)
+        if recorded:
+            coins = coins_for_focus(self.timer.focus_duration_sec) * recorded
+            QMessageBox.information(self, "Session completed", f"Great job! +{coins} coins")
+        self._reset_after_finish()
+        return True
 
     def _reset_after_finish(self) -> None:
         self.timer.reset()
         self.failed_animation = False
-        self.scene_widget.set_timer_state(self.timer.state)
-        self._update_buttons()
-
-    def _on_frame(self) -> None:
-        """Периодический тик: обновляет таймер, сцену, прогресс и кнопки."""
-        now = time.monotonic()
-        prev_state = self.timer.state
-        snapshot = self.timer.tick(now)
-
-        if prev_state == TimerState.FOCUS_RUNNING and snapshot.state in {TimerState.BREAK_RUNNING, TimerState.FINISHED}:
-            self._handle_focus_success(self.timer.focus_duration_sec)
-            if snapshot.state == TimerState.FINISHED:
-                return
-            snapshot = self.timer.snapshot(now)
+        self._refresh_frame()
+
+    def _refresh_frame(self) -> None:
+        """Немедленно обновляет кадр после команды, даже если снимок таймера не изменился."""
+        self.timer.invalidate_poll()
+        try:
+            self._render_frame(self.clock.monotonic())
+        finally:
+            self.frame_scheduler.reschedule()
+
+    def _render_frame(self, now: float) -> None:
+        """Шаг таймера: записывает фазы, обновляет прогресс сцены и кнопки."""
+        transitions = self.engine.step(now)
+        if transitions and self._handle_transitions(transitions):
+            return
+        snapshot = self.timer.poll(now)
+        if snapshot is None:
+            return  # ни состояние, ни секунды, ни видимый прогресс не изменились
 
         self.app_state.update_session_state(snapshot.state.value, snapshot.progress)
         self.scene_widget.set_timer_state(snapshot.state)
@@ -493,11 +593,6 @@ class MainWindow(QMainWindow):
         self.scene_widget.set_state(snapshot.progress, self.failed_animation, now, remaining_text)
         self._update_buttons()
 
-
-    def _on_scene_animation_frame(self) -> None:
-        if self.scene_widget.advance_animation_frame(self.timer.state):
-            self.scene_widget.update()
-
     def _update_buttons(self) -> None:
         state = self.timer.state
         self.start_btn.setEnabled(state in {TimerState.IDLE, TimerState.FAILED, TimerState.FINISHED})
@@ -505,34 +600,25 @@ class MainWindow(QMainWindow):
         self.resume_btn.setEnabled(state in {TimerState.FOCUS_PAUSED, TimerState.BREAK_PAUSED})
         self.stop_btn.setEnabled(state in {TimerState.FOCUS_RUNNING, TimerState.FOCUS_PAUSED, TimerState.BREAK_RUNNING, TimerState.BREAK_PAUSED})
 
-    def _success_today(self, rows: list[SessionRow]) -> int:
-        today = date.today().isoformat()
-        return sum(1 for r in rows if r.success and r.started_at.startswith(today))
+    def _on_coins_changed(self, coins: int) -> None:
+        self.coins_label.setText(str(coins))
 
-    def _streak_days(self, rows: list[SessionRow]) -> int:
-        success_days = {datetime.fromisoformat(r.started_at).date() for r in rows if r.success}
-        cursor = date.today()
-        streak = 0
-        while cursor in success_days:
-            streak += 1
-            cursor -= timedelta(days=1)
-        return streak
+    def _on_session_recorded(self, row: SessionRow) -> None:
+        """Добавляет зафиксированную в БД сессию в историю и обновляет статистику."""
+        self.history_model.prepend_session(row)
+        self.refresh_stats()
 
     def refresh_stats(self) -> None:
-        """Пересчитывает и отображает статистику из БД."""
-        rows = self.storage.list_sessions(limit=50)
+        """Отображает статистику из агрегатов БД."""
+        summary = self.storage.get_stats_summary(self.clock.now().date())
         self.coins_label.setText(str(self.app_state.coins_balance))
-        self.today_success_label.setText(str(self._success_today(rows)))
-        self.streak_label.setText(str(self._streak_days(rows)))
-        self.history_list.clear()
-        for row in rows:
-            status = "✅" if row.success else "❌"
-            duration_text = f"{row.duration_sec // 60:02d}:{row.duration_sec % 60:02d}"
-            item_text = f"{status} {row.started_at} · {duration_text} · {row.theme}"
-            QListWidgetItem(item_text, self.history_list)
+        self.today_success_label.setText(str(summary.today.successes))
+        self.streak_label.setText(str(summary.streak_days))
 
     def closeEvent(self, event) -> None:  # noqa: N802
         if not self.timer.is_active:
+            self.app_state.flush_settings()
+            self.storage.flush()
             event.accept()
             return
 
@@ -549,5 +635,9 @@ class MainWindow(QMainWindow):
         if self.timer.state in {TimerState.FOCUS_RUNNING, TimerState.FOCUS_PAUSED}:
             self.stop_session()
         else:
-            self.timer.stop()
+            # Через движок: он закрывает цикл и удаляет контрольную точку, иначе
+            # следующий запуск восстановит перерыв, который пользователь завершил.
+            self.engine.stop()
+        self.app_state.flush_settings()
+        self.storage.flush()
         event.accept()
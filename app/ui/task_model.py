@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+"""Модель и делегат панели задач с точечными обновлениями строк."""
+
+from dataclasses import replace
+
+from PyQt6.QtCore import QAbstractListModel, QEvent, QModelIndex, QRect, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QMouseEvent, QPainter
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton, QStyleOptionViewItem
+
+from app.core.app_state import AppState
+from app.data.storage import TaskRow
+
+
+class TaskListModel(QAbstractListModel):
+    """Список задач панели, синхронизируемый diff-сигналами `AppState`.
+
+    Модель держит собственную копию строк и применяет вставку/удаление/
+    перемещение/переключение между begin*/end*, поэтому представление
+    перерисовывает только затронутые строки.
+    """
+
+    def __init__(self, app_state: AppState, parent=None) -> None:
+        super().__init__(parent)
+        self._app_state = app_state
+        self._tasks: list[TaskRow] = list(app_state.tasks)
+        app_state.tasks_reset.connect(self._on_reset)
+        app_state.task_inserted.connect(self._on_inserted)
+        app_state.task_removed.connect(self._on_removed)
+        app_state.task_moved.connect(self._on_moved)
+        app_state.task_toggled.connect(self._on_toggled)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # noqa: N802
+        return 0 if parent.isValid() else len(self._tasks)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._tasks):
+            return None
+        task = self._tasks[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return task.title
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if task.is_done else Qt.CheckState.Unchecked
+        if role == Qt.ItemDataRole.UserRole:
+            return task
+        return None
+
+    def _on_reset(self) -> None:
+        self.beginResetModel()
+        self._tasks = list(self._app_state.tasks)
+        self.endResetModel()
+
+    def _on_inserted(self, row: int, task: TaskRow) -> None:
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tasks.insert(row, task)
+        self.endInsertRows()
+        self._refresh_neighbours(row)
+
+    def _on_removed(self, row: int) -> None:
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._tasks[row]
+        self.endRemoveRows()
+        self._refresh_neighbours(row)
+
+    def _on_moved(self, source: int, destination: int) -> None:
+        # Для beginMoveRows позиция назначения указывается "до перемещения".
+        destination_child = destination + 1 if destination > source else destination
+        self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), destination_child)
+        self._tasks.insert(destination, self._tasks.pop(source))
+        self.endMoveRows()
+        top, bottom = min(source, destination), max(source, destination)
+        self.dataChanged.emit(self.index(top), self.index(bottom))
+
+    def _on_toggled(self, row: int, done: bool) -> None:
+        self._tasks[row] = replace(self._tasks[row], is_done=done)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+
+    def _refresh_neighbours(self, row: int) -> None:
+        """Обновляет соседние строки: у первой/последней меняется доступность стрелок."""
+        for neighbour in (row - 1, row):
+            if 0 <= neighbour < len(self._tasks):
+                index = self.index(neighbour)
+                self.dataChanged.emit(index, index)
+
+
+class TaskItemDelegate(QStyledItemDelegate):
+    """Рисует строку задачи (чекбокс, заголовок, ↑/↓/×) без виджетов на строку."""
+    toggle_requested = pyqtSignal(int, bool)
+    move_up_requested = pyqtSignal(int)
+    move_down_requested = pyqtSignal(int)
+    delete_requested = pyqtSignal(int)
+
+    ROW_HEIGHT = 30
+    BUTTON_WIDTH = 22
+
+    def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:  # noqa: N802
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        task: TaskRow | None = index.data(Qt.ItemDataRole.UserRole)
+        if task is None:
+            return
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+        rects = self._layout(option.rect)
+
+        checkbox = QStyleOptionButton()
+        checkbox.rect = rects["check"]
+        checkbox.state = QStyle.StateFlag.State_Enabled | (
+            QStyle.StateFlag.State_On if task.is_done else QStyle.StateFlag.State_Off
+        )
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_IndicatorCheckBox, checkbox, painter, option.widget)
+
+        painter.save()
+        font = QFont(option.font)
+        font.setStrikeOut(task.is_done)
+        painter.setFont(font)
+        painter.setPen(option.palette.color(option.palette.ColorRole.Text) if not task.is_done else QColor("#9e9e9e"))
+        title = option.fontMetrics.elidedText(task.title, Qt.TextElideMode.ElideRight, rects["title"].width())
+        painter.drawText(rects["title"], Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, title)
+
+        last_row = index.model().rowCount() - 1
+        enabled = {"up": index.row() > 0, "down": index.row() < last_row, "delete": True}
+        for key, glyph in (("up", "↑"), ("down", "↓"), ("delete", "×")):
+            painter.setPen(QColor("#37474f") if enabled[key] else QColor("#cfd8dc"))
+            painter.drawText(rects[key], Qt.AlignmentFlag.AlignCenter, glyph)
+        painter.restore()
+
+    def editorEvent(self, event: QEvent, model, option: QStyleOptionViewItem, index: QModelIndex) -> bool:  # noqa: N802
+        if event.type() != QEvent.Type.MouseButtonRelease or not isinstance(event, QMouseEvent):
+            return False
+        task: TaskRow | None = index.data(Qt.ItemDataRole.UserRole)
+        if task is None or event.button() != Qt.MouseButton.LeftButton:
+            return False
+        rects = self._layout(option.rect)
+        pos = event.position().toPoint()
+        if rects["check"].adjusted(-4, -4, 4, 4).contains(pos):
+            self.toggle_requested.emit(task.id, not task.is_done)
+        elif rects["up"].contains(pos) and index.row() > 0:
+            self.move_up_requested.emit(task.id)
+        elif rects["down"].contains(pos) and index.row() < model.rowCount() - 1:
+            self.move_down_requested.emit(task.id)
+        elif rects["delete"].contains(pos):
+            self.delete_requested.emit(task.id)
+        else:
+            return False
+        return True
+
+    def _layout(self, rect: QRect) -> dict[str, QRect]:
+        inner = rect.adjusted(4, 2, -4, -2)
+        check_size = 16
+        check = QRect(inner.left(), inner.center().y() - check_size // 2, check_size, check_size)
+        delete = QRect(inner.right() - self.BUTTON_WIDTH + 1, inner.top(), self.BUTTON_WIDTH, inner.height())
+        down = delete.translated(-self.BUTTON_WIDTH, 0)
+        up = down.translated(-self.BUTTON_WIDTH, 0)
+        title = QRect(check.right() + 8, inner.top(), max(0, up.left() - check.right() - 12), inner.height())
+        return {"check": check, "title": title, "up": up, "down": down, "delete": delete}
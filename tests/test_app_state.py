@@ -1,5 +1,10 @@
+import threading
+from datetime import datetime
+
 from app.core.app_state import AppState
-from app.data.storage import Storage
+from app.core.clock import ManualClock
+from app.core.timer import FocusTimer
+from app.data.storage import BACKLOG_TASK_LIMIT, Storage
 
 
 def test_load_and_theme_persist(tmp_path) -> None:
@@ -74,3 +79,242 @@ def test_task_methods_and_snapshot_on_success(tmp_path) -> None:
         ("Task B", 1, 0),
         ("Task A", 0, 1),
     ]
+
+
+def test_write_behind_state_is_persisted_after_flush(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    storage.start_write_behind()
+    state = AppState()
+    state.load_from_storage(storage)
+
+    state.add_task("Task A")
+    storage.flush()  # строка попадает в панель, когда запись зафиксирована
+    task_id = state.tasks[0].id
+    state.toggle_task_done(task_id, True)
+    state.start_session(60, "forest")
+    state.finish_session(success=True, coins_earned=2, duration_sec=60)
+    storage.close()
+
+    assert storage.list_tasks()[0].is_done is True
+    assert storage.get_coins_balance() == 2
+    assert len(storage.list_sessions()) == 1
+
+
+def test_deferred_settings_flush_writes_only_changed_keys(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    state = AppState()
+    state.load_from_storage(storage)
+    state.save_setting("focus_minutes", 25)
+    state.save_setting("break_minutes", 5)
+
+    writes: list[dict] = []
+    original = storage.set_settings
+    storage.set_settings = lambda values: (writes.append(values), original(values))[1]
+
+    state.save_setting("focus_minutes", 30, defer=True)
+    state.save_setting("focus_minutes", 50, defer=True)
+    state.save_setting("break_minutes", 5, defer=True)
+    assert state.has_pending_settings is True
+    state.flush_settings()
+
+    assert writes == [{"settings.focus_minutes": 50}]
+    assert storage.get_settings("settings.") == {"focus_minutes": 50, "break_minutes": 5}
+
+
+def test_coin_reason_is_deferred_and_announced_for_flush(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    state = AppState()
+    state.load_from_storage(storage)
+    changed: list[tuple] = []
+    state.settings_changed.connect(lambda key, value: changed.append((key, value)))
+
+    state.add_coins(3, "bonus")
+    state.add_coins(2, "bonus")
+
+    assert changed == [("last_coin_reason", "bonus")]
+    assert state.has_pending_settings is True
+    state.flush_settings()
+    assert storage.get_settings("settings.") == {"last_coin_reason": "bonus"}
+
+
+def test_legacy_settings_blob_is_split_per_key(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    storage.set_setting("settings", {"preset": "Deep 50/10", "auto_cycle": True})
+
+    state = AppState()
+    state.load_from_storage(storage)
+
+    assert state.settings == {"preset": "Deep 50/10", "auto_cycle": True}
+    assert storage.get_setting("settings") is None
+    assert storage.get_setting("settings.preset") == "Deep 50/10"
+
+
+def test_session_recorded_emitted_after_commit(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    state = AppState()
+    state.load_from_storage(storage)
+    recorded: list = []
+    state.session_recorded.connect(recorded.append)
+
+    state.start_session(60, "forest")
+    state.finish_session(success=True, coins_earned=1, duration_sec=60)
+
+    assert recorded == storage.list_sessions()
+
+
+def test_catch_up_transitions_are_recorded_in_one_batch(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    state = AppState()
+    state.load_from_storage(storage)
+    recorded: list = []
+    state.session_recorded.connect(recorded.append)
+    timer = FocusTimer()
+    timer.configure(focus_seconds=1500, break_seconds=300, auto_cycle=True)
+    timer.start(now=0.0)
+    state.start_session(1500, "forest")
+
+    transitions = timer.advance(7800.0)
+    count = state.record_focus_transitions(transitions, coins_per_session=5, now=7800.0)
+
+    sessions = storage.list_sessions()
+    assert count == 4
+    assert len(sessions) == 4 and all(row.success and row.duration_sec == 1500 for row in sessions)
+    assert recorded == sessions[::-1]
+    assert storage.get_coins_balance() == state.coins_balance == 20
+    assert state.current_session is not None  # авто-цикл продолжается
+
+
+def test_active_session_checkpoint_survives_restart(tmp_path) -> None:
+    clock = ManualClock(datetime(2026, 2, 2, 10, 0, 0))
+    storage = Storage(tmp_path / "app.db", clock=clock)
+    storage.init_db()
+    state = AppState(clock)
+    state.load_from_storage(storage)
+    timer = FocusTimer(clock)
+    timer.configure(focus_seconds=1500, break_seconds=300, auto_cycle=False)
+    timer.start()
+    state.start_session(1500, "forest")
+    state.checkpoint_session(timer.checkpoint())
+    clock.advance(600)
+    timer.pause()
+    state.checkpoint_session(timer.checkpoint())
+    timer.resume()
+    state.checkpoint_session(timer.checkpoint())
+
+    # Процесс "падает" через 5 минут после последнего перехода.
+    clock.advance(300)
+    restarted, restored_timer = AppState(clock), FocusTimer(clock)
+    restarted.load_from_storage(storage)
+
+    assert restarted.restore_active_session(restored_timer) is True
+    assert restored_timer.snapshot().remaining_seconds == 600
+    assert restarted.current_session.started_at == "2026-02-02T10:00:00"
+
+    # Второй сбой: фокус истек, пока процесс не работал, — сессия записывается неуспешной
+    # с фактическим временем фазы (600 с до контрольной точки + простой, но не больше фазы).
+    clock.advance(3600)
+    again = AppState(clock)
+    again.load_from_storage(storage)
+
+    assert again.restore_active_session(FocusTimer(clock)) is False
+    assert [(row.success, row.duration_sec) for row in storage.list_sessions()] == [(False, 1500)]
+    assert storage.load_active_session() is None
+
+
+def test_task_mutations_emit_row_diffs_without_requery(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    state = AppState()
+    state.load_from_storage(storage)
+    events: list[tuple] = []
+    state.task_inserted.connect(lambda row, task: events.append(("inserted", row, task.title)))
+    state.task_removed.connect(lambda row: events.append(("removed", row)))
+    state.task_moved.connect(lambda src, dst: events.append(("moved", src, dst)))
+    state.task_toggled.connect(lambda row, done: events.append(("toggled", row, done)))
+
+    state.add_task("A")
+    state.add_task("B")
+    storage.list_tasks = None  # any re-query below would fail
+    first_id, second_id = (task.id for task in state.tasks)
+    state.toggle_task_done(second_id, True)
+    state.move_task_up(second_id)
+    state.remove_task(first_id)
+
+    assert events == [
+        ("inserted", 0, "A"),
+        ("inserted", 1, "B"),
+        ("toggled", 1, True),
+        ("moved", 1, 0),
+        ("removed", 1),
+    ]
+    assert [(task.title, task.is_done) for task in state.tasks] == [("B", True)]
+
+
+def test_focus_panel_is_a_view_over_the_backlog(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db", task_limit=None)
+    storage.init_db()
+    state = AppState()
+    state.load_from_storage(storage)
+
+    for i in range(7):
+        assert state.add_task(f"Task {i}") is True
+    assert [task.title for task in state.tasks] == [f"Task {i}" for i in range(5)]
+    assert state.backlog_size == 7
+    assert state.task_limit_reached is False
+
+    state.remove_task(state.tasks[0].id)
+    assert [task.title for task in state.tasks] == [f"Task {i}" for i in range(1, 6)]
+
+    state.move_task_down(state.tasks[0].id)
+    assert [task.title for task in storage.list_tasks(limit=3)] == ["Task 2", "Task 1", "Task 3"]
+
+
+def test_moved_task_keeps_db_key_for_panel_refill(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db", task_limit=BACKLOG_TASK_LIMIT)
+    storage.init_db()
+    state = AppState()
+    for title in "ABCDEFG":
+        storage.create_task(title)
+    state.load_from_storage(storage)
+
+    state.move_task_down(state.tasks[3].id)
+    state.remove_task(state.tasks[0].id)
+
+    assert [task.title for task in state.tasks] == ["B", "C", "E", "D", "F"]
+    assert [(task.id, task.sort_order) for task in state.tasks] == [
+        (task.id, task.sort_order) for task in storage.list_tasks(limit=5)
+    ]
+
+
+def test_task_edits_do_not_wait_for_write_behind_queue(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db", task_limit=BACKLOG_TASK_LIMIT)
+    storage.init_db()
+    for title in "ABCDEF":
+        storage.create_task(title)
+    state = AppState()
+    state.load_from_storage(storage)
+    storage.start_write_behind()
+    writer_released = threading.Event()
+    storage.submit(writer_released.wait)  # writer stays busy until the end of the test
+
+    state.remove_task(state.tasks[-1].id)
+    state.move_task_up(state.tasks[-1].id)
+    assert state.add_task("G") is True
+
+    assert [task.title for task in state.tasks] == ["A", "B", "D", "C"]
+    assert state.backlog_size == 6
+    writer_released.set()
+    storage.flush(timeout=5)
+    # Refill runs after the delete is committed, so E is not read back.
+    assert [task.title for task in state.tasks] == ["A", "B", "D", "C", "F"]
+    assert [task.id for task in state.tasks] == [task.id for task in storage.list_tasks(limit=5)]
+    assert [(task.id, task.sort_order) for task in state.tasks] == [
+        (task.id, task.sort_order) for task in storage.list_tasks(limit=5)
+    ]
+    storage.close()
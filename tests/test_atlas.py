@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QSize
+from PyQt6.QtGui import QColor, QGuiApplication, QImage, QPixmap
+
+from app.core import assets
+from app.core.lru import LRUCache
+from app.tools.pack_atlas import pack_directory
+
+
+@pytest.fixture
+def assets_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "ASSETS_DIR", tmp_path)
+    monkeypatch.setattr(assets, "PIXMAP_CACHE", LRUCache(assets.PIXMAP_CACHE_BUDGET_BYTES, assets._asset_bytes))
+    monkeypatch.setattr(assets, "_PENDING_DECODES", {})
+    frames = tmp_path / "anim"
+    frames.mkdir()
+    for index, color in enumerate(("red", "green", "blue"), start=1):
+        image = QImage(30, 20, QImage.Format.Format_ARGB32)
+        image.fill(QColor(color))
+        image.save(str(frames / f"frame_{index}.png"))
+    return tmp_path
+
+
+@pytest.fixture(scope="module")
+def qt_app():
+    return QGuiApplication.instance() or QGuiApplication([])
+
+
+def test_pack_directory_writes_non_overlapping_frames(assets_dir) -> None:
+    image_path, table_path = pack_directory(assets_dir / "anim")
+
+    table = json.loads(table_path.read_text(encoding="utf-8"))
+    atlas = QImage(str(image_path))
+    assert [frame["name"] for frame in table["frames"]] == ["frame_1.png", "frame_2.png", "frame_3.png"]
+    rects = [(frame["x"], frame["y"], frame["w"], frame["h"]) for frame in table["frames"]]
+    assert all(w == 30 and h == 20 for _, _, w, h in rects)
+    assert len({(x, y) for x, y, _, _ in rects}) == 3
+    assert atlas.pixelColor(rects[1][0] + 5, rects[1][1] + 5) == QColor("green")
+    assert atlas.pixelColor(0, 0).alpha() == 0  # прозрачная рамка вокруг кадров
+
+
+def test_load_sprite_atlas_prefers_atlas_and_falls_back_to_frames(assets_dir, qt_app) -> None:
+    names = ["frame_3.png", "frame_1.png"]
+    separate = assets.load_sprite_atlas("anim", names)
+    assert separate is not None
+    assert separate.frame(0).toImage().pixelColor(5, 5) == QColor("blue")
+
+    pack_directory(assets_dir / "anim")
+    for frame in (assets_dir / "anim").glob("frame_*.png"):
+        frame.unlink()  # атлас должен читаться без отдельных кадров
+    assets.PIXMAP_CACHE.clear()
+
+    atlas = assets.load_sprite_atlas("anim", names)
+    assert atlas is not None and len(atlas) == 2
+    assert atlas.frame(1).toImage().pixelColor(5, 5) == QColor("red")
+    assert assets.load_sprite_atlas("anim", ["missing.png"]) is None
+
+
+def test_async_assets_live_in_lru_and_redecode_after_eviction(assets_dir, qt_app) -> None:
+    sprites = assets.async_sprite_atlas("anim", ["frame_2.png"])
+    missing = assets.async_pixmap("anim/missing.png")
+    sprites.future.result(timeout=5)
+    missing.future.result(timeout=5)
+
+    assert sprites.ready and missing.ready
+    atlas = sprites.value()
+    assert atlas is sprites.value()
+    assert atlas.frame(0).toImage().pixelColor(5, 5) == QColor("green")
+    assert missing.value() is None
+
+    sprites.pin()
+    assets.PIXMAP_CACHE.set_budget(0)
+    assert sprites.key in assets.PIXMAP_CACHE and missing.key not in assets.PIXMAP_CACHE
+
+    sprites.unpin()
+    assert sprites.key not in assets.PIXMAP_CACHE
+    sprites.future.result(timeout=5)  # обращение после вытеснения заново ставит декодирование
+    assert sprites.ready and sprites.value() is not atlas
+    assert assets.PIXMAP_CACHE.stats().evictions == 2
+
+
+def test_scaled_variant_is_reused_from_disk(assets_dir, qt_app, monkeypatch) -> None:
+    monkeypatch.setattr(assets, "_scaled_cache", None)
+    assets.configure_scaled_cache(assets_dir / "cache")
+    atlas = assets.load_sprite_atlas("anim", ["frame_1.png", "frame_2.png"])
+    size = QSize(atlas.pixmap.width() // 2, atlas.pixmap.height() // 2)
+
+    scaled = assets.scaled_variant(atlas.sources, atlas.pixmap, size)
+    deadline = time.monotonic() + 5
+    while not list((assets_dir / "cache").glob("*.raw")) and time.monotonic() < deadline:
+        time.sleep(0.01)  # запись на диск идет в фоновом пуле
+    assert len(list((assets_dir / "cache").glob("*.raw"))) == 1
+
+    cached = assets.scaled_variant(atlas.sources, QPixmap(), size)  # исходник не нужен при попадании
+    assert cached.size() == size
+    assert cached.toImage().pixelColor(3, 3) == scaled.toImage().pixelColor(3, 3)
+
+
+def test_disk_variant_makes_asset_ready_without_decoding(assets_dir, qt_app, monkeypatch) -> None:
+    monkeypatch.setattr(assets, "_scaled_cache", None)
+    assets.configure_scaled_cache(assets_dir / "cache")
+    pack_directory(assets_dir / "anim")
+    names = ["frame_1.png", "frame_2.png"]
+    layout = assets.read_atlas_layout("anim", names)
+    atlas = assets.load_sprite_atlas("anim", names)
+    assert layout == atlas.layout
+    size = QSize(layout.size.width() // 2, layout.size.height() // 2)
+    assets.scaled_variant(atlas.sources, atlas.pixmap, size)
+    deadline = time.monotonic() + 5
+    while not list((assets_dir / "cache").glob("*.raw")) and time.monotonic() < deadline:
+        time.sleep(0.01)  # запись на диск идет в фоновом пуле
+
+    # "Перезапуск": в памяти ничего нет, вариант — только на диске.
+    assets.PIXMAP_CACHE.clear()
+    sprites = assets.async_sprite_atlas("anim", names)
+    assert sprites.ready_for(size) is True
+    assert sprites.scaled(size).size() == size
+    assert sprites.pending is None and assets._PENDING_DECODES == {}  # исходник не декодировался
+
+    assert sprites.ready_for(QSize(7, 7)) is False  # другого размера на диске нет — пошло декодирование
+    assert sprites.pending is not None
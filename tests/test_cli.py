@@ -0,0 +1,106 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from app.cli import main
+from app.core.app_state import AppState
+from app.data.storage import Storage
+
+
+def test_status_on_missing_database_does_not_create_it(tmp_path, capsys) -> None:
+    db_path = tmp_path / "app.db"
+
+    assert main(["--db", str(db_path), "status"]) == 1
+    assert "database not found" in capsys.readouterr().err
+    assert not db_path.exists()
+
+
+def test_start_status_stop_round_trip(tmp_path, capsys) -> None:
+    db = ["--db", str(tmp_path / "app.db")]
+
+    assert main([*db, "start", "--minutes", "10", "--theme", "ice"]) == 0
+    assert main([*db, "start"]) == 1
+    capsys.readouterr()
+
+    assert main([*db, "status", "--json"]) == 0
+    status = json.loads(capsys.readouterr().out)
+    assert status["state"] == "focus_running" and status["theme"] == "ice"
+    assert 595 <= status["remaining_seconds"] <= 600
+
+    assert main([*db, "stop"]) == 0
+    assert "recorded as failed" in capsys.readouterr().out
+    assert main([*db, "status"]) == 0
+    assert capsys.readouterr().out.strip() == "idle"
+
+    storage = Storage(tmp_path / "app.db")
+    assert [(row.success, row.theme) for row in storage.list_sessions()] == [(False, "ice")]
+    storage.close()
+
+
+def test_queries_read_stats_tasks_and_export(tmp_path, capsys) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    storage.create_task("Write report")
+    storage.set_task_done(storage.create_task("Review PR"), True)
+    storage.record_session_result("2026-05-01T10:00:00", 1500, "forest", True, 5, [])
+    storage.close()
+    db = ["--db", str(tmp_path / "app.db")]
+
+    assert main([*db, "tasks", "--open"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["[ ] Write report"]
+
+    assert main([*db, "stats", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["coins_balance"] == 5
+
+    export_path = tmp_path / "sessions.csv"
+    assert main([*db, "export", "--output", str(export_path)]) == 0
+    assert export_path.read_text(encoding="utf-8").splitlines() == [
+        "id,started_at,duration_sec,theme,success,coins_earned",
+        "1,2026-05-01T10:00:00,1500,forest,1,5",
+    ]
+
+
+def test_json_export_streams_a_valid_array(tmp_path, capsys) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    db = ["--db", str(tmp_path / "app.db")]
+    assert main([*db, "export", "--format", "json"]) == 0
+    assert json.loads(capsys.readouterr().out) == []
+
+    storage.record_session_result("2026-05-01T10:00:00", 1500, "forest", True, 5, [])
+    storage.record_session_result("2026-05-02T10:00:00", 600, "ice", False, 0, [])
+    storage.close()
+    assert main([*db, "export", "--format", "json", "--since", "2026-05-02"]) == 0
+    assert json.loads(capsys.readouterr().out) == [
+        {"id": 2, "started_at": "2026-05-02T10:00:00", "duration_sec": 600, "theme": "ice", "success": False, "coins_earned": 0}
+    ]
+    assert main([*db, "export", "--format", "json"]) == 0
+    assert [row["id"] for row in json.loads(capsys.readouterr().out)] == [2, 1]  # новые первыми
+
+
+def test_writable_commands_close_storage_when_state_fails_to_load(tmp_path, monkeypatch) -> None:
+    closed: list[bool] = []
+    monkeypatch.setattr(Storage, "close", lambda self: closed.append(True))
+
+    def load_from_storage(self, storage) -> None:
+        raise ValueError("corrupt settings")
+
+    monkeypatch.setattr(AppState, "load_from_storage", load_from_storage)
+
+    for command in ("start", "stop"):
+        with pytest.raises(ValueError, match="corrupt settings"):
+            main(["--db", str(tmp_path / "app.db"), command])
+    assert closed == [True, True]
+
+
+def test_cli_never_imports_qt(tmp_path) -> None:
+    code = (
+        "import sys; from app.cli import main; "
+        f"main(['--db', {str(tmp_path / 'app.db')!r}, 'start']); "
+        f"main(['--db', {str(tmp_path / 'app.db')!r}, 'status']); "
+        "print(any(m.startswith('PyQt6') for m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "False"
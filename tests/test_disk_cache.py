@@ -0,0 +1,77 @@
+import os
+
+from app.core.disk_cache import ScaledImageCache
+
+
+def _pixels(width: int, height: int, value: int) -> bytes:
+    return bytes([value]) * (width * 4 * height)
+
+
+def test_round_trip_is_memory_mapped_and_keyed_by_size(tmp_path) -> None:
+    source = tmp_path / "bg.png"
+    source.write_bytes(b"png-1")
+    cache = ScaledImageCache(tmp_path / "cache")
+
+    assert cache.get([source], 4, 2) is None
+    cache.put([source], 4, 2, 16, 6, _pixels(4, 2, 7))
+
+    with cache.get([source], 4, 2) as raw:
+        assert (raw.width, raw.height, raw.stride, raw.pixel_format) == (4, 2, 16, 6)
+        assert bytes(raw.pixels) == _pixels(4, 2, 7)
+    assert cache.get([source], 8, 4) is None
+    assert ScaledImageCache(tmp_path / "cache").get([source], 4, 2) is not None  # новый запуск
+
+
+def test_changed_source_drops_old_variants(tmp_path) -> None:
+    source = tmp_path / "bg.png"
+    source.write_bytes(b"png-1")
+    cache = ScaledImageCache(tmp_path / "cache")
+    cache.put([source], 4, 2, 16, 6, _pixels(4, 2, 1))
+    cache.put([source], 2, 2, 8, 6, _pixels(2, 2, 1))
+
+    source.write_bytes(b"png-2, other size")
+    assert cache.get([source], 4, 2) is None
+    cache.put([source], 4, 2, 16, 6, _pixels(4, 2, 2))
+
+    assert len(list((tmp_path / "cache").glob("*.raw"))) == 1
+    with cache.get([source], 4, 2) as raw:
+        assert bytes(raw.pixels) == _pixels(4, 2, 2)
+
+
+def test_least_recently_used_variants_evicted_over_budget(tmp_path) -> None:
+    sources = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.png"
+        path.write_bytes(name.encode())
+        sources.append(path)
+    entry_bytes = 32 + 16 * 2
+    cache = ScaledImageCache(tmp_path / "cache", budget_bytes=2 * entry_bytes)
+    cache.put([sources[0]], 4, 2, 16, 6, _pixels(4, 2, 0))
+    cache.put([sources[1]], 4, 2, 16, 6, _pixels(4, 2, 0))
+    for path in (tmp_path / "cache").glob("*.raw"):
+        os.utime(path, ns=(1, 1))  # обе записи старые
+    cache.get([sources[0]], 4, 2).close()  # попадание обновляет время использования
+
+    cache.put([sources[2]], 4, 2, 16, 6, _pixels(4, 2, 0))
+
+    assert cache.get([sources[1]], 4, 2) is None
+    assert cache.get([sources[0]], 4, 2) is not None
+    assert cache.size_bytes() == 2 * entry_bytes
+
+
+def test_source_hash_is_reused_until_stat_changes(tmp_path, monkeypatch) -> None:
+    source = tmp_path / "bg.png"
+    source.write_bytes(b"png-1")
+    ScaledImageCache(tmp_path / "cache").put([source], 4, 2, 16, 6, _pixels(4, 2, 1))
+
+    reads: list[object] = []
+    original = type(source).read_bytes
+    monkeypatch.setattr(type(source), "read_bytes", lambda self: (reads.append(self), original(self))[1])
+
+    restarted = ScaledImageCache(tmp_path / "cache")
+    assert restarted.contains([source], 4, 2)
+    assert reads == []  # холодный старт: хэш взят из индекса по (mtime, размер)
+
+    os.utime(source, ns=(1, 1))  # mtime изменился, содержимое то же
+    assert restarted.contains([source], 4, 2)
+    assert reads == [source]
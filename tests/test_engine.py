@@ -0,0 +1,86 @@
+import asyncio
+import subprocess
+import sys
+from datetime import datetime
+
+from app.core.app_state import AppState
+from app.core.clock import ManualClock
+from app.core.engine import FocusEngine
+from app.core.events import Signal
+from app.core.timer import FocusTimer, TimerState
+from app.data.storage import Storage
+
+
+def _engine(tmp_path, clock=None) -> tuple[FocusEngine, Storage]:
+    storage = Storage(tmp_path / "app.db", clock=clock)
+    storage.init_db()
+    state = AppState(clock)
+    state.load_from_storage(storage)
+    return FocusEngine(FocusTimer(clock), state), storage
+
+
+def test_signal_is_per_instance() -> None:
+    class Source:
+        changed = Signal(int)
+
+    first, second = Source(), Source()
+    received: list[int] = []
+    first.changed.connect(received.append)
+
+    first.changed.emit(1)
+    second.changed.emit(2)
+    first.changed.disconnect(received.append)
+    first.changed.emit(3)
+
+    assert received == [1]
+
+
+def test_step_records_phases_and_checkpoints(tmp_path) -> None:
+    clock = ManualClock(datetime(2026, 4, 1, 9, 0, 0))
+    engine, storage = _engine(tmp_path, clock)
+    engine.timer.configure(focus_seconds=1500, break_seconds=300, auto_cycle=True)
+
+    assert engine.start("forest") is True
+    assert engine.start("forest") is False
+    clock.advance(1600)
+    engine.step()
+
+    assert [row.success for row in storage.list_sessions()] == [True]
+    assert storage.load_active_session().state == TimerState.BREAK_RUNNING.value
+
+    clock.advance(400)
+    engine.step()
+    assert engine.stop() == TimerState.FOCUS_RUNNING
+    assert [(row.success, row.duration_sec) for row in storage.list_sessions()] == [(False, 200), (True, 1500)]
+    assert storage.load_active_session() is None
+
+
+def test_run_sleeps_until_deadlines_without_qt(tmp_path) -> None:
+    engine, storage = _engine(tmp_path)
+    engine.timer.configure(focus_seconds=1, break_seconds=1, auto_cycle=False)
+    frames: list[TimerState] = []
+
+    def on_frame(snapshot) -> None:
+        frames.append(snapshot.state)
+        if snapshot.state == TimerState.FINISHED:
+            engine.shutdown()
+
+    engine.frame.connect(on_frame)
+
+    async def scenario() -> None:
+        runner = asyncio.create_task(engine.run())
+        await asyncio.sleep(0)
+        engine.start("forest")
+        await asyncio.wait_for(runner, timeout=5)
+
+    asyncio.run(scenario())
+
+    assert frames[-1] == TimerState.FINISHED
+    assert len(frames) <= 4  # пробуждения только на дедлайнах, без опроса
+    assert [row.success for row in storage.list_sessions()] == [True]
+
+
+def test_core_imports_do_not_load_qt() -> None:
+    code = "import sys, app.core.engine, app.core.app_state; print(any(m.startswith('PyQt6') for m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
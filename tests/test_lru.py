@@ -0,0 +1,48 @@
+from app.core.lru import LRUCache
+
+
+def _cache(budget: int) -> LRUCache[str, bytes]:
+    return LRUCache(budget, size_of=len)
+
+
+def test_evicts_least_recently_used_over_budget() -> None:
+    cache = _cache(10)
+    cache.put("a", b"1234")
+    cache.put("b", b"1234")
+    assert cache.get("a") == b"1234"  # теперь самой старой стала "b"
+
+    cache.put("c", b"1234")
+
+    assert list(cache) == ["a", "c"]
+    assert cache.size_bytes == 8
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (1, 0, 1, 2)
+
+
+def test_pinned_entries_survive_and_new_entry_is_kept() -> None:
+    cache = _cache(6)
+    cache.pin("bg")
+    cache.put("bg", b"12345")
+    cache.put("sprite", b"1234")
+
+    assert "bg" in cache and "sprite" in cache  # закрепленная и только что добавленная
+    assert cache.size_bytes == 9
+
+    cache.put("other", b"1")
+    assert "sprite" not in cache and cache.size_bytes == 6
+
+    cache.unpin("bg")
+    cache.put("next", b"12")
+    assert "bg" not in cache
+    assert cache.get("bg") is None and cache.stats().misses == 1
+
+
+def test_replacing_key_updates_size_and_budget_shrink_evicts() -> None:
+    cache = _cache(100)
+    cache.put("a", b"x" * 40)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 30)
+    assert cache.size_bytes == 40
+
+    cache.set_budget(35)
+    assert list(cache) == ["b"] and cache.stats().evictions == 1
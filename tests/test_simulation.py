@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from app.core.clock import ManualClock
+from app.core.simulation import SimulationConfig, run_simulation
+from app.data.storage import Storage
+
+
+def test_manual_clock_drives_storage_timestamps(tmp_path) -> None:
+    clock = ManualClock(datetime(2026, 3, 1, 8, 0, 0))
+    storage = Storage(tmp_path / "app.db", clock=clock)
+    storage.init_db()
+
+    first = storage.get_task(storage.create_task("A"))
+    clock.advance(90)
+    second = storage.get_task(storage.create_task("B"))
+
+    assert (first.created_at, second.created_at) == ("2026-03-01T08:00:00", "2026-03-01T08:01:30")
+    assert clock.monotonic() == 90
+
+
+def test_simulation_runs_weeks_against_sqlite(tmp_path) -> None:
+    config = SimulationConfig(days=28, seed=7)
+
+    report = run_simulation(tmp_path / "sim.db", config)
+
+    storage = Storage(tmp_path / "sim.db")
+    sessions = list(storage.iter_sessions())
+    assert report.sessions == len(sessions) > 28
+    assert report.failures == sum(1 for row in sessions if not row.success)
+    assert report.coins_balance == report.successes * config.coins_per_session == storage.get_coins_balance()
+    assert storage.verify_coin_balance(repair=False)
+    assert report.simulated_seconds >= 27 * 86400
+    storage.close()
+
+    again = run_simulation(tmp_path / "again.db", config)
+    assert (again.successes, again.failures) == (report.successes, report.failures)
+
+
+def test_simulation_days_that_overrun_midnight_continue_next_day(tmp_path) -> None:
+    # 8 блоков по 4 часовых цикла плюс перерывы не помещаются в сутки.
+    config = SimulationConfig(days=3, focus_seconds=50 * 60, break_seconds=10 * 60, blocks_per_day=8, seed=1)
+
+    report = run_simulation(tmp_path / "sim.db", config)
+
+    assert report.simulated_seconds > 3 * 86400
+    assert report.sessions > 0
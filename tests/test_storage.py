@@ -1,4 +1,10 @@
-from app.data.storage import MAX_TASKS, Storage
+import sqlite3
+from datetime import date, datetime
+
+import pytest
+
+from app.data import migrations
+from app.data.storage import MAX_TASKS, SCHEMA_VERSION, CoinEntry, Storage
 
 
 def test_init_db_creates_tables(tmp_path) -> None:
@@ -64,3 +70,256 @@ def test_toggle_done_and_delete(tmp_path) -> None:
 
     storage.delete_task(task_id)
     assert storage.list_tasks(limit=MAX_TASKS, include_done=True) == []
+
+
+def test_connections_are_reused_until_close(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    storage.set_setting("a", 1)
+    writer = storage._writer  # noqa: SLF001 - tests may inspect connection manager
+    storage.set_setting("b", 2)
+    assert storage._writer is writer  # noqa: SLF001
+
+    assert storage.get_setting("a") == 1
+    reader = storage._idle_readers[-1]  # noqa: SLF001
+    assert storage.get_setting("b") == 2
+    assert storage._idle_readers == [reader]  # noqa: SLF001
+
+    storage.close()
+    assert storage._writer is None  # noqa: SLF001
+    assert storage._idle_readers == []  # noqa: SLF001
+    assert storage.get_setting("b") == 2
+
+
+def test_failed_transaction_rolls_back(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+
+    try:
+        with storage._transaction() as conn:  # noqa: SLF001
+            conn.execute("INSERT INTO settings(key, value) VALUES ('x', '1')")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert storage.get_setting("x") is None
+    storage.set_setting("x", 2)
+    assert storage.get_setting("x") == 2
+
+
+def test_write_behind_batches_and_resolves_futures(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    storage.start_write_behind()
+
+    futures = [storage.submit(storage.set_setting, f"key{i}", i) for i in range(20)]
+    session_future = storage.submit(storage.insert_session, "2026-01-01T10:00:00", 60, "ice", True, 1)
+    storage.flush()
+
+    assert all(future.done() for future in futures)
+    assert session_future.result() == 1
+    assert storage.get_setting("key19") == 19
+    storage.close()
+    assert storage.write_behind_enabled is False
+
+
+def test_write_behind_failure_isolated_to_one_operation(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    storage.start_write_behind()
+
+    before = storage.submit(storage.set_setting, "before", 1)
+    failing = storage.submit(storage.create_task, "   ")
+    after = storage.submit(storage.set_setting, "after", 2)
+    storage.flush()
+
+    assert before.result() is None
+    assert isinstance(failing.exception(), ValueError)
+    assert after.result() is None
+    storage.close()
+    assert storage.get_setting("before") == 1
+    assert storage.get_setting("after") == 2
+
+
+def test_record_session_result_is_atomic(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    storage.create_task("Task A")
+    tasks = storage.list_tasks()
+
+    session_id = storage.record_session_result("2026-01-01T10:00:00", 1500, "forest", True, 5, tasks)
+    assert storage.get_coins_balance() == 5
+    with storage._read() as conn:  # noqa: SLF001 - tests may inspect DB directly
+        snapshot = conn.execute("SELECT session_id, task_title FROM session_tasks").fetchall()
+    assert [(r["session_id"], r["task_title"]) for r in snapshot] == [(session_id, "Task A")]
+
+    broken_tasks = [None]  # type: ignore[list-item] - forces a failure after the session INSERT
+    with pytest.raises(AttributeError, match="'NoneType' object has no attribute"):
+        storage.record_session_result("2026-01-01T11:00:00", 1500, "forest", True, 5, broken_tasks)
+    assert len(storage.list_sessions()) == 1
+    assert storage.get_coins_balance() == 5
+
+
+def test_coin_ledger_bulk_entries_and_clamped_debit(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+
+    balance = storage.apply_coin_entries([CoinEntry(10, "reward"), CoinEntry(5, "reward"), CoinEntry(-40, "purchase")])
+
+    assert balance == 0
+    assert storage.get_coins_balance() == 0
+    assert [(row.amount, row.reason) for row in storage.list_coin_ledger()] == [
+        (-15, "purchase"),
+        (5, "reward"),
+        (10, "reward"),
+    ]
+    assert storage.add_coins(3, "bonus") == 3
+
+
+def test_verify_coin_balance_repairs_cached_value(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    storage.add_coins(7, "reward")
+    with storage._transaction() as conn:  # noqa: SLF001 - simulate a corrupted cache
+        conn.execute("UPDATE coin_balance SET balance = 100")
+
+    assert storage.verify_coin_balance() is False
+    assert storage.get_coins_balance() == 7
+    assert storage.verify_coin_balance() is True
+
+
+def test_daily_stats_maintained_and_streak_summary(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    for day in ["2026-03-08", "2026-03-09", "2026-03-10"]:
+        storage.insert_session(f"{day}T09:00:00", 1500, "forest", True, 5)
+    storage.insert_session("2026-03-10T11:00:00", 300, "forest", False, 0)
+    storage.insert_session("2026-03-06T11:00:00", 1500, "forest", True, 5)
+
+    summary = storage.get_stats_summary(date(2026, 3, 10))
+    assert summary.streak_days == 3
+    assert summary.today.successes == 1
+    assert summary.today.failures == 1
+    assert summary.today.focus_seconds == 1800
+    assert summary.today.coins == 5
+    assert storage.get_stats_summary(date(2026, 3, 11)).streak_days == 0
+    assert storage.get_daily_stats(date(2026, 3, 7)).successes == 0
+
+
+def _create_v1_database(db_path) -> None:
+    """Создает БД в формате схемы версии 1 (до миграций)."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE schema_version (version INTEGER NOT NULL)")
+    conn.execute("INSERT INTO schema_version(version) VALUES (1)")
+    migrations._create_base_schema(conn)  # noqa: SLF001
+    conn.executemany(
+        "INSERT INTO sessions(started_at, duration_sec, theme, success, coins_earned) VALUES (?, ?, ?, ?, ?)",
+        [(f"2026-03-{day:02d}T09:30:00", 1500, "forest", 1, 5) for day in range(1, 11)],
+    )
+    conn.execute("INSERT INTO settings(key, value) VALUES ('coins_balance', '12')")
+    conn.commit()
+    conn.close()
+
+
+def test_init_db_migrates_v1_database_in_batches(tmp_path, monkeypatch) -> None:
+    db_path = tmp_path / "app.db"
+    _create_v1_database(db_path)
+    monkeypatch.setattr(migrations, "BACKFILL_BATCH_SIZE", 3)
+
+    storage = Storage(db_path)
+    storage.init_db()
+
+    assert storage.schema_version() == SCHEMA_VERSION
+    assert storage.get_coins_balance() == 12
+    assert storage.get_setting("coins_balance") is None
+    assert storage.list_coin_ledger()[0].reason == "legacy_import"
+    assert storage.get_stats_summary(date(2026, 3, 10)).streak_days == 10
+    with storage._read() as conn:  # noqa: SLF001 - tests may inspect DB directly
+        missing = conn.execute("SELECT COUNT(*) AS cnt FROM sessions WHERE started_at_epoch IS NULL").fetchone()["cnt"]
+        plan = " ".join(
+            row["detail"]
+            for row in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT id FROM sessions WHERE started_at_epoch >= 0 AND started_at_epoch < 1"
+            )
+        )
+    assert missing == 0
+    assert "idx_sessions_started_at_epoch" in plan
+
+    storage.init_db()
+    assert storage.get_coins_balance() == 12
+
+
+def test_list_sessions_by_date_range_and_day(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    for started_at in ["2026-03-09T23:59:59", "2026-03-10T00:00:00", "2026-03-10T18:00:00", "2026-03-11T00:00:00"]:
+        storage.insert_session(started_at, 60, "ice", True, 1)
+
+    rows = storage.list_sessions_between(datetime(2026, 3, 10), datetime(2026, 3, 11))
+
+    assert [row.started_at for row in rows] == ["2026-03-10T00:00:00", "2026-03-10T18:00:00"]
+    assert [row.started_at for row in storage.list_sessions_on_day(date(2026, 3, 11))] == ["2026-03-11T00:00:00"]
+
+
+def test_iter_sessions_pages_with_filters(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db")
+    storage.init_db()
+    for day in range(1, 11):
+        theme = "ice" if day % 2 else "forest"
+        storage.insert_session(f"2026-03-{day:02d}T09:00:00", 60, theme, day != 5, 1)
+
+    all_ids = [row.id for row in storage.iter_sessions(page_size=3)]
+    assert all_ids == list(range(10, 0, -1))
+
+    ice_success = list(storage.iter_sessions(page_size=2, theme="ice", success=True))
+    assert [row.started_at[:10] for row in ice_success] == ["2026-03-09", "2026-03-07", "2026-03-03", "2026-03-01"]
+
+    ranged = storage.iter_sessions(page_size=2, before_id=9, start=datetime(2026, 3, 4), end=datetime(2026, 3, 8))
+    assert [row.id for row in ranged] == [7, 6, 5, 4]
+
+
+def test_move_task_rewrites_single_row_and_respaces_when_needed(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db", task_limit=None)
+    storage.init_db()
+    ids = [storage.create_task(f"Task {i}") for i in range(4)]
+    before = {task.id: task.sort_order for task in storage.list_tasks(limit=10)}
+
+    storage.move_task(ids[3], after_id=ids[0])
+
+    after = {task.id: task.sort_order for task in storage.list_tasks(limit=10)}
+    assert [task_id for task_id in ids if before[task_id] != after[task_id]] == [ids[3]]
+    assert [task.id for task in storage.list_tasks(limit=10)] == [ids[0], ids[3], ids[1], ids[2]]
+
+    for _ in range(12):  # halving the same gap eventually forces a respace
+        storage.move_task(ids[2], after_id=ids[0])
+        storage.move_task(ids[3], after_id=ids[0])
+    assert [task.id for task in storage.list_tasks(limit=10)] == [ids[0], ids[3], ids[2], ids[1]]
+    storage.move_task(ids[1], after_id=None)
+    assert storage.list_tasks(limit=1)[0].id == ids[1]
+
+
+def test_backlog_limit_and_keyset_pages(tmp_path) -> None:
+    storage = Storage(tmp_path / "app.db", task_limit=12)
+    storage.init_db()
+    ids = [storage.create_task(f"Task {i}") for i in range(12)]
+    with pytest.raises(ValueError, match="Task limit reached"):
+        storage.create_task("overflow")
+    storage.delete_task(ids[-1])
+    assert storage.count_tasks() == 11  # счетчик ведут триггеры, без COUNT(*)
+    ids[-1] = storage.create_task("Task 11 again")
+    with storage._read() as conn:  # noqa: SLF001 - tests may inspect DB directly
+        assert conn.execute("SELECT count FROM task_count").fetchone()["count"] == 12
+    storage.set_task_done(ids[1], True)
+
+    first = storage.list_tasks(limit=5)
+    second = storage.list_tasks(limit=5, after=first[-1])
+    undone = storage.list_tasks(limit=3, include_done=False)
+
+    assert [task.id for task in first + second] == ids[:10]
+    assert [task.id for task in undone] == [ids[0], ids[2], ids[3]]
+    with storage._read() as conn:  # noqa: SLF001 - tests may inspect DB directly
+        plan = " ".join(
+            row["detail"]
+            for row in conn.execute("EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE is_done = 0 ORDER BY sort_order LIMIT 5")
+        )
+    assert "idx_tasks_done_sort_order" in plan
@@ -41,3 +41,79 @@ def test_stop_focus_marks_failed() -> None:
 
     assert success is False
     assert timer.state == TimerState.FAILED
+
+
+def test_next_deadline_tracks_whole_seconds_and_phase_end() -> None:
+    timer = FocusTimer()
+    timer.configure(focus_seconds=3, break_seconds=2, auto_cycle=True)
+    assert timer.next_deadline(0.0) is None
+
+    timer.start(now=10.0)
+    assert timer.next_deadline(10.0) == 11.0
+    assert timer.next_deadline(11.25) == 12.0
+    assert timer.next_deadline(12.5) == 13.0
+    assert timer.phase_deadline(12.5) == 13.0
+    assert timer.phase_deadline(11.25) == 13.0
+
+    timer.pause(now=12.5)
+    assert timer.next_deadline(14.0) is None
+    assert timer.phase_deadline(14.0) is None
+    timer.resume(now=20.0)
+    assert timer.next_deadline(20.0) == 20.5
+    snapshot = timer.tick(20.5)
+    assert snapshot.state == TimerState.BREAK_RUNNING
+    assert snapshot.remaining_seconds == 2
+
+
+def test_advance_catches_up_all_cycles_after_suspend() -> None:
+    timer = FocusTimer()
+    timer.configure(focus_seconds=25 * 60, break_seconds=5 * 60, auto_cycle=True)
+    timer.start(now=0.0)
+
+    # Сон на 2 часа 10 минут: 4 полных цикла по 30 минут и 10 минут пятого фокуса.
+    transitions = timer.advance(130 * 60.0)
+    snapshot = timer.snapshot(130 * 60.0)
+
+    assert len(transitions) == 8
+    assert [t.completes_focus for t in transitions] == [True, False] * 4
+    assert [t.ended_at for t in transitions if t.completes_focus] == [1500.0, 3300.0, 5100.0, 6900.0]
+    assert all(t.ended_at - t.phase_started_at == t.phase_seconds for t in transitions)
+    assert timer.completed_focus_sessions == 4
+    assert snapshot.state == TimerState.FOCUS_RUNNING
+    assert snapshot.elapsed_seconds == 10 * 60
+    assert timer.advance(130 * 60.0) == []
+
+
+def test_advance_without_auto_cycle_stops_at_first_boundary() -> None:
+    timer = FocusTimer()
+    timer.configure(focus_seconds=10, break_seconds=5, auto_cycle=False)
+    timer.start(now=0.0)
+    timer.pause(now=4.0)
+    timer.resume(now=6.0)
+
+    transitions = timer.advance(100.0)
+
+    assert len(transitions) == 1
+    assert transitions[0].to_state == TimerState.FINISHED
+    assert (transitions[0].phase_started_at, transitions[0].ended_at) == (0.0, 12.0)
+    assert timer.completed_focus_sessions == 1
+    assert timer.state == TimerState.FINISHED
+
+
+def test_poll_reuses_snapshot_and_skips_unchanged_frames() -> None:
+    timer = FocusTimer()
+    timer.configure(focus_seconds=10, break_seconds=5, auto_cycle=False)
+    timer.start(now=0.0)
+
+    first = timer.poll(0.0)
+    assert first is not None and first.remaining_seconds == 10
+    assert timer.poll(0.001) is None  # ни секунды, ни видимого прогресса
+    second = timer.poll(1.0)
+    assert second is first and second.remaining_seconds == 9
+
+    timer.pause(now=1.0)
+    assert timer.poll(1.0).state == TimerState.FOCUS_PAUSED
+    assert timer.poll(5.0) is None
+    timer.invalidate_poll()
+    assert timer.poll(5.0) is first
+    assert timer.snapshot(5.0) is not first